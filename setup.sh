@@ -34,12 +34,28 @@ sleep 10
 
 # 4. Create database tables (resumes table)
 echo "4. Executing database migrations..."
-docker-compose run --rm api python -c "from src.models import Base, engine; Base.metadata.create_all(bind=engine)"
+docker-compose run --rm api python -c "from src.models import init_db; init_db()"
 
 if [ $? -ne 0 ]; then
     echo "WARNING: Database creation script failed. Check if DB is accessible."
 fi
 
+# 5. Compile the skill taxonomy into the memory-mapped matcher shared by API and workers
+echo "5. Compiling the skill taxonomy..."
+docker-compose run --rm api python -m src.skill_taxonomy
+
+if [ $? -ne 0 ]; then
+    echo "WARNING: Skill taxonomy compilation failed. It will be compiled on first use."
+fi
+
+# 6. Precompute the skill embedding matrix used for per-skill semantic matching
+echo "6. Building skill vectors..."
+docker-compose run --rm api python -m src.skill_vectors
+
+if [ $? -ne 0 ]; then
+    echo "WARNING: Skill vector build failed. It will be built on first use."
+fi
+
 
 echo "--- Setup Complete! ---"
 echo "API is accessible at: http://localhost:8000"
@@ -2,35 +2,86 @@
 
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 from transformers import pipeline
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import os
+
+from .regex_extractor import extract_fast_fields, mask_spans
+from .section_segmenter import segment_sections, handle_cheap_sections, NER_SECTIONS
+from .rule_parser import parse_with_rules, low_confidence_fields, RULE_CONFIDENCE_THRESHOLD, FIELD_SECTIONS
+from .ner_cache import cached_ner
+from .skills import dedupe_skills, extract_skill_names
+from .skill_taxonomy import get_skill_matcher
+from . import metrics
 
 # --- 1. Model Setup ---
 # For a hackathon, we'll use a pre-trained model fine-tuned for NER
 # A popular choice for fine-tuning on custom entities is a BERT/RoBERTa variant.
-# NOTE: Replace 'path/to/your/custom/model' with a real Hugging Face model or your fine-tuned model path later.
-# For simplicity, let's use a robust general NER model for demonstration.
-MODEL_NAME = "dslim/bert-base-NER" # A general NER model. You'd train a custom one for higher accuracy.
+# Set NER_MODEL_NAME to a Hugging Face model id or the path of our fine-tuned model.
+MODEL_NAME = os.getenv("NER_MODEL_NAME", "dslim/bert-base-NER") # A general NER model. You'd train a custom one for higher accuracy.
 
-try:
-    # Initialize the NER pipeline (This will download the model the first time)
-    ner_pipeline = pipeline(
+# Inference backend: 'pytorch' (eager fp32) or 'onnx' (ONNX Runtime, dynamic int8)
+NER_BACKEND = os.getenv("NER_BACKEND", "pytorch").lower()
+
+# Identifies the model output in the NER cache: int8 ONNX output may differ slightly from fp32
+NER_MODEL_VERSION = f"{MODEL_NAME}@{NER_BACKEND}"
+
+def load_ner_pipeline(backend: str = NER_BACKEND, model_name: str = MODEL_NAME):
+    """
+    Loads the NER pipeline for the requested backend.
+    Both backends return the same entity dicts consumed by group_entities.
+    """
+    if backend == "onnx":
+        # Imported lazily so the PyTorch path does not require optimum/onnxruntime
+        from .onnx_ner import load_onnx_ner_pipeline
+        return load_onnx_ner_pipeline(model_name)
+
+    return pipeline(
         "ner", 
-        model=MODEL_NAME, 
-        tokenizer=MODEL_NAME, 
+        model=model_name, 
+        tokenizer=model_name, 
         aggregation_strategy="simple"
     )
+
+try:
+    # Initialize the NER pipeline (This will download the model the first time)
+    ner_pipeline = load_ner_pipeline()
+    print(f"INFO: NER model loaded with the '{NER_BACKEND}' backend.")
 except Exception as e:
     print(f"Warning: Could not load NER model. Running in simulation mode. Error: {e}")
     ner_pipeline = None
 
 # --- 2. Post-Processing Function ---
 
-def group_entities(entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _nearest_date_range(date_ranges: List[Dict[str, Any]], offset: Optional[int], used: set) -> Optional[Dict[str, Any]]:
+    """Returns the closest unused date range to a character offset (ranges usually sit on the same line)."""
+    if offset is None:
+        return None
+    candidates = [r for i, r in enumerate(date_ranges) if i not in used and abs(r['offset'] - offset) <= 200]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda r: abs(r['offset'] - offset))
+    used.add(date_ranges.index(best))
+    return best
+
+def group_entities(
+    entities: List[Dict[str, Any]],
+    fast_fields: Optional[Dict[str, Any]] = None,
+    section_fields: Optional[Dict[str, Any]] = None,
+    taxonomy_skills: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
     Groups and structures the flat list of extracted entities into the required JSON structure.
     This is the most complex step and requires sophisticated custom logic.
     For the hackathon, we'll implement a simplified version.
+    `fast_fields` is the output of extract_fast_fields (contact info, links, date ranges),
+    `section_fields` the output of handle_cheap_sections. Entities may carry a 'section' key.
+    `taxonomy_skills` are the skill-taxonomy matches found in the whole text.
     """
+    fast_fields = fast_fields or {}
+    skill_matcher = get_skill_matcher()
+    date_ranges = fast_fields.get('dateRanges', [])
+    used_ranges = set()
+
     structured_data = {
         "personalInfo": {"name": "", "contact": {"email": "", "phone": ""}},
         "experience": [],
@@ -45,12 +96,29 @@ def group_entities(entities: List[Dict[str, Any]]) -> Dict[str, Any]:
         label = entity['entity_group']
         word = entity['word'].strip()
         
+        section = entity.get('section')
+        
         if label == 'PER': # Person (Name)
-            structured_data['personalInfo']['name'] += word + " "
+            # Names outside the header are usually managers/referees, not the candidate
+            if section in (None, 'header'):
+                structured_data['personalInfo']['name'] += word + " "
+        elif label == 'ORG' and section == 'education': # Institution
+            education = {"institution": word}
+            date_range = _nearest_date_range(date_ranges, entity.get('start'), used_ranges)
+            if date_range:
+                education.update({"startDate": date_range['start'], "endDate": date_range['end']})
+            structured_data['education'].append(education)
         elif label == 'ORG': # Organization (Company/Institution)
             if current_experience is None or 'title' in current_experience:
                 # Simple logic to start a new experience block
                 current_experience = {"company": word, "title": "", "duration": "TBD"}
+                date_range = _nearest_date_range(date_ranges, entity.get('start'), used_ranges)
+                if date_range:
+                    current_experience.update({
+                        "startDate": date_range['start'],
+                        "endDate": date_range['end'],
+                        "duration": date_range['duration'],
+                    })
                 structured_data['experience'].append(current_experience)
             else:
                  current_experience['company'] = word
@@ -58,42 +126,152 @@ def group_entities(entities: List[Dict[str, Any]]) -> Dict[str, Any]:
              if "engineer" in word.lower() or "developer" in word.lower():
                  if current_experience:
                       current_experience['title'] = word
+             elif skill_matcher is not None:
+                 # MISC is noisy: only keep entities the skill taxonomy knows
+                 if skill_matcher.canonicalize(word):
+                     structured_data['skills']['technical'].append(word)
              elif len(word) > 2:
                  # Simple filtering for short words
                  structured_data['skills']['technical'].append(word)
         
         # NOTE: Custom logic for dates, skills, and address needs a resume-specific NER model.
 
+    # Contact details come from the regex fast path, not from the model
+    emails = fast_fields.get('emails', [])
+    phones = fast_fields.get('phones', [])
+    links = fast_fields.get('links', {})
+    contact = structured_data['personalInfo']['contact']
+    contact['email'] = emails[0] if emails else ""
+    contact['phone'] = phones[0] if phones else ""
+    contact['linkedin'] = links.get('linkedin', "")
+    contact['github'] = links.get('github', "")
+    if links.get('urls'):
+        contact['websites'] = links['urls']
+
+    # Fields taken directly from their sections (no model involved)
+    section_fields = section_fields or {}
+    if section_fields.get('summary'):
+        structured_data['summary'] = {"text": section_fields['summary']}
+    structured_data['skills']['technical'].extend(section_fields.get('skills', []))
+    # Taxonomy skills mentioned anywhere in the resume (one matcher pass over the text)
+    structured_data['skills']['technical'].extend(taxonomy_skills or [])
+    if section_fields.get('projects'):
+        structured_data['projects'] = section_fields['projects']
+    if section_fields.get('certifications'):
+        structured_data['certifications'] = section_fields['certifications']
+
     # Clean up name and deduplicate skills
     structured_data['personalInfo']['name'] = structured_data['personalInfo']['name'].strip()
-    structured_data['skills']['technical'] = sorted(list(set(structured_data['skills']['technical'])))
+    structured_data['skills']['technical'] = sorted(dedupe_skills(structured_data['skills']['technical']))
     
     return structured_data
 
 # --- 3. Main AI Processing Function ---
 
+def run_ner_on_sections(text: str, sections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Runs NER over the given sections in one batched pipeline call, skipping sections
+    whose normalized content is already in the NER cache.
+    Entity offsets are shifted back to positions in `text` and tagged with their section.
+    """
+    if not sections:
+        return []
+
+    batch_results = cached_ner([text[s['start']:s['end']] for s in sections], ner_pipeline, NER_MODEL_VERSION)
+    
+    entities = []
+    for section, section_entities in zip(sections, batch_results):
+        for entity in section_entities:
+            entity = dict(entity)
+            entity['section'] = section['name']
+            if entity.get('start') is not None:
+                entity['start'] += section['start']
+                entity['end'] += section['start']
+            entities.append(entity)
+    return entities
+
+def merge_rule_fields(structured_data: Dict[str, Any], rule_fields: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Overlays confident rule-parser fields onto the NER-based structure.
+    A low-confidence rule value is still used when the transformer found nothing for that field.
+    """
+    def use_rule(field: str, ner_value: Any) -> bool:
+        rule = rule_fields.get(field, {})
+        return bool(rule.get('value')) and (rule['confidence'] >= RULE_CONFIDENCE_THRESHOLD or not ner_value)
+
+    if use_rule('name', structured_data['personalInfo']['name']):
+        structured_data['personalInfo']['name'] = rule_fields['name']['value']
+    if use_rule('experience', structured_data['experience']):
+        structured_data['experience'] = rule_fields['experience']['value']
+    if use_rule('education', structured_data['education']):
+        structured_data['education'] = rule_fields['education']['value']
+
 def process_ai_extraction(raw_text: str) -> Dict[str, Any]:
     """
-    Runs NER on the raw text and structures the result.
+    Runs the extraction cascade on the raw text and structures the result:
+    regex fast path -> rule/layout parser -> NER only for low-confidence fields.
     """
     if not ner_pipeline:
         # Simulation Mode
         print("Running AI extraction in SIMULATION MODE.")
+        metrics.increment("parser_tier", "simulation")
         return {
             "personalInfo": {"name": "John Doe (Simulated)", "contact": {"email": "sim@example.com", "phone": "555-555-5555"}},
             "experience": [{"title": "Software Engineer", "company": "Simulated Tech Co.", "duration": "5 years"}],
             "skills": {"technical": ["Python", "Docker", "AWS", "Simulated Skill"], "soft": ["Leadership"]}
         }
         
-    print("Running Hugging Face NER pipeline...")
+    # 3.1. Regex Fast Path (contact info, links, date ranges) - no model needed
+    fast_fields = extract_fast_fields(raw_text)
     
-    # 3.1. Run Model Inference
-    ner_results = ner_pipeline(raw_text)
+    # 3.2. Section Segmentation - only header/experience/education can need the model
+    sections = segment_sections(raw_text)
+    section_fields = handle_cheap_sections(sections)
+    
+    # 3.3. Tier 1: rule/layout parser with per-field confidence
+    rule_fields = parse_with_rules(sections, fast_fields, section_fields)
+    fallback_fields = low_confidence_fields(rule_fields)
+    present_sections = {s['name'] for s in sections}
+    # A field whose section has no heading is searched for in the unsegmented header text
+    fallback_sections = {
+        FIELD_SECTIONS[field] if FIELD_SECTIONS[field] in present_sections else 'header'
+        for field in fallback_fields
+    }
+    ner_sections = [s for s in sections if s['name'] in NER_SECTIONS and s['name'] in fallback_sections]
     
-    # 3.2. Post-Process and Structure
-    structured_json = group_entities(ner_results)
+    # 3.4. Tier 2: transformer, only on the sections behind low-confidence fields.
+    # Masking keeps character offsets stable and stops emails/URLs from producing noise entities.
+    ner_results = []
+    if ner_sections:
+        print(f"Running Hugging Face NER pipeline on {len(ner_sections)} of {len(sections)} sections "
+              f"(low-confidence fields: {', '.join(fallback_fields)})...")
+        ner_results = run_ner_on_sections(mask_spans(raw_text, fast_fields['spans']), ner_sections)
+    else:
+        print("All fields extracted by the rule parser, skipping NER.")
     
-    # 3.3. Add required status and metadata
+    # 3.5. Post-Process, Structure and Merge the two tiers
+    structured_json = group_entities(ner_results, fast_fields, section_fields, extract_skill_names(raw_text))
+    merge_rule_fields(structured_json, rule_fields)
+    
+    # Without NER, a document is only a rules hit when no field came from fallback text and
+    # every low-confidence field had a section for the transformer to re-read
+    from_fallback = any(result.get('source') == 'fallback' for result in rule_fields.values())
+    if ner_sections:
+        tier = "transformer"
+    elif from_fallback or fallback_fields:
+        tier = "fallback"
+    else:
+        tier = "rules"
+    metrics.increment("parser_tier", tier)
+    for field in fallback_fields:
+        metrics.increment("parser_fallback_fields", field)
+    
+    # 3.6. Add required status and metadata
     structured_json['status'] = 'parsed'
+    structured_json['extraction'] = {
+        "tier": tier,
+        "fieldConfidence": {field: result['confidence'] for field, result in rule_fields.items()},
+        "transformerFields": fallback_fields,
+    }
     
-    return structured_json
\ No newline at end of file
+    return structured_json
@@ -0,0 +1,149 @@
+# src/benchmark_embeddings.py
+#
+# Compares the embedding backends on a local sample: encode latency, and how closely each
+# backend reproduces the candidate ranking of the reference backend (Kendall tau, top-k overlap).
+# Usage (inside the api/worker container):
+#   python -m src.benchmark_embeddings --samples-dir samples/ --jobs-file jobs.json --runs 5
+
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from .embedding_backends import load_embedding_model, EMBEDDING_BACKENDS
+from .document_parser import parse_document
+
+# Used when no samples are given, so the benchmark always has something to rank
+SAMPLE_RESUMES = [
+    "Senior backend engineer. Python, Django, PostgreSQL, Celery and Redis; designed REST APIs serving 20k rps on AWS.",
+    "Frontend developer building React and TypeScript single-page apps, design systems and accessibility audits.",
+    "Data scientist: pandas, scikit-learn and PyTorch models for churn prediction, A/B testing and forecasting.",
+    "DevOps engineer running Kubernetes clusters with Terraform, Helm, Prometheus and GitLab CI pipelines.",
+    "Mobile developer shipping Swift and Kotlin apps, offline sync and push notifications for 1M users.",
+    "Registered nurse with eight years of ICU experience, patient triage and electronic health records.",
+    "Accountant preparing monthly closes, IFRS reporting and audits; advanced Excel and SAP.",
+    "Machine learning engineer deploying transformer models with ONNX Runtime, FastAPI and Docker.",
+]
+SAMPLE_JOBS = [
+    "We are hiring a Python backend developer to build APIs with Django and PostgreSQL on AWS.",
+    "Looking for a platform engineer with Kubernetes, Terraform and observability experience.",
+    "ML engineer to productionize NLP models; experience with PyTorch and model serving required.",
+]
+
+# --- 1. Helpers ---
+
+def load_resumes(samples_dir: str = None) -> List[str]:
+    """Loads resume texts from a directory (any format supported by parse_document)."""
+    if not samples_dir:
+        return list(SAMPLE_RESUMES)
+
+    texts = []
+    for path in sorted(Path(samples_dir).iterdir()):
+        if path.is_file():
+            text = parse_document(str(path))
+            if text.strip():
+                texts.append(text)
+    return texts or list(SAMPLE_RESUMES)
+
+def load_jobs(jobs_file: str = None) -> List[str]:
+    """Job descriptions from a JSON list (strings or {"description": ...} objects)."""
+    if not jobs_file:
+        return list(SAMPLE_JOBS)
+    with open(jobs_file, "r", encoding="utf-8") as f:
+        jobs = json.load(f)
+    return [job if isinstance(job, str) else job.get("description", "") for job in jobs] or list(SAMPLE_JOBS)
+
+def kendall_tau(x: np.ndarray, y: np.ndarray) -> float:
+    """Kendall tau-b between two score vectors over the same items (1.0 = identical ordering)."""
+    upper = np.triu_indices(len(x), k=1)
+    dx = np.sign(np.subtract.outer(x, x)[upper])
+    dy = np.sign(np.subtract.outer(y, y)[upper])
+    denominator = np.sqrt(np.count_nonzero(dx) * np.count_nonzero(dy))
+    return float((dx * dy).sum() / denominator) if denominator else 1.0
+
+def top_k_overlap(x: np.ndarray, y: np.ndarray, k: int) -> float:
+    """Fraction of the reference top-k that the candidate also ranks in its top-k."""
+    k = min(k, len(x))
+    return len(set(np.argsort(-x)[:k]) & set(np.argsort(-y)[:k])) / k if k else 1.0
+
+def time_encode(model, texts: List[str], runs: int, batch_size: int) -> Tuple[List[float], np.ndarray]:
+    """Encodes the texts `runs` times in batches; returns per-text latencies (ms) and the embeddings."""
+    model.encode(texts[:1], normalize_embeddings=True)  # Warm-up (graph initialization, memory allocation)
+
+    latencies = []
+    embeddings = None
+    for _ in range(runs):
+        batches = []
+        for offset in range(0, len(texts), batch_size):
+            batch = texts[offset:offset + batch_size]
+            start = time.perf_counter()
+            batches.append(model.encode(batch, convert_to_numpy=True, normalize_embeddings=True))
+            latencies.extend([(time.perf_counter() - start) * 1000 / len(batch)] * len(batch))
+        embeddings = np.vstack(batches).astype(np.float32)
+    return latencies, embeddings
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+# --- 2. Benchmark ---
+
+def run_benchmark(
+    samples_dir: str = None,
+    jobs_file: str = None,
+    backends: List[str] = EMBEDDING_BACKENDS,
+    reference: str = "minilm",
+    runs: int = 3,
+    batch_size: int = 32,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    resumes = load_resumes(samples_dir)
+    jobs = load_jobs(jobs_file)
+    backends = [reference] + [b for b in backends if b != reference]
+    print(f"Benchmarking {', '.join(backends)} on {len(resumes)} resume(s) x {len(jobs)} job(s), {runs} run(s) each...")
+
+    results = {}
+    scores = {}
+    for backend in backends:
+        model = load_embedding_model(backend)
+        latencies, resume_matrix = time_encode(model, resumes, runs, batch_size)
+        _, job_matrix = time_encode(model, jobs, 1, batch_size)
+        scores[backend] = job_matrix @ resume_matrix.T  # (jobs, resumes) cosine scores
+        results[backend] = {
+            "p50_ms": round(statistics.median(latencies), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "docs_per_s": round(1000 / max(statistics.mean(latencies), 1e-6), 1),
+        }
+
+    # Ranking agreement per job description, against the reference backend
+    for backend in backends:
+        taus = [kendall_tau(ref, cand) for ref, cand in zip(scores[reference], scores[backend])]
+        overlaps = [top_k_overlap(ref, cand, top_k) for ref, cand in zip(scores[reference], scores[backend])]
+        results[backend]["kendall_tau"] = round(statistics.mean(taus), 4)
+        results[backend][f"top{top_k}_overlap"] = round(statistics.mean(overlaps), 4)
+        results[backend]["speedup_p50"] = round(results[reference]["p50_ms"] / max(results[backend]["p50_ms"], 1e-6), 2)
+    return results
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare embedding backends: latency and ranking agreement.")
+    arg_parser.add_argument("--samples-dir", default=None, help="Directory of resume files to rank.")
+    arg_parser.add_argument("--jobs-file", default=None, help="JSON list of job descriptions to rank the resumes against.")
+    arg_parser.add_argument("--backends", default=",".join(EMBEDDING_BACKENDS), help="Comma-separated backends to compare.")
+    arg_parser.add_argument("--reference", default="minilm", help="Backend whose ranking is treated as the reference.")
+    arg_parser.add_argument("--runs", type=int, default=3, help="Number of passes over the resumes.")
+    arg_parser.add_argument("--batch-size", type=int, default=32, help="Texts per encode call.")
+    arg_parser.add_argument("--top-k", type=int, default=10, help="Cut-off for the top-k overlap.")
+    args = arg_parser.parse_args()
+
+    report = run_benchmark(args.samples_dir, args.jobs_file, args.backends.split(","), args.reference,
+                           args.runs, args.batch_size, args.top_k)
+    for backend, stats in report.items():
+        print(f"{backend:>7}: p50={stats['p50_ms']}ms/doc  p95={stats['p95_ms']}ms/doc  {stats['docs_per_s']} docs/s  "
+              f"speedup={stats['speedup_p50']}x  kendall_tau={stats['kendall_tau']}  "
+              f"top{args.top_k}_overlap={stats[f'top{args.top_k}_overlap']}")
@@ -0,0 +1,111 @@
+# src/benchmark_ner.py
+#
+# Compares the PyTorch and ONNX Runtime (int8) NER backends on a local sample.
+# Usage (inside the api/worker container):
+#   python -m src.benchmark_ner --samples-dir samples/ --runs 5
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Set, Tuple
+
+from .ai_parser import load_ner_pipeline, MODEL_NAME
+from .document_parser import parse_document
+
+# Used when no sample directory is given, so the benchmark always has something to run
+SAMPLE_RESUME = """John Smith
+Senior Software Engineer at Google, Mountain View, California.
+Previously worked at Microsoft in Seattle as a Backend Developer on Azure services.
+Education: Stanford University, M.S. Computer Science.
+Skills: Python, Docker, Kubernetes, AWS, PostgreSQL, React.
+"""
+
+# --- 1. Helpers ---
+
+def load_samples(samples_dir: str = None) -> List[str]:
+    """Loads resume texts from a directory (any format supported by parse_document)."""
+    if not samples_dir:
+        return [SAMPLE_RESUME]
+
+    texts = []
+    for path in sorted(Path(samples_dir).iterdir()):
+        if path.is_file():
+            text = parse_document(str(path))
+            if text.strip():
+                texts.append(text)
+    return texts or [SAMPLE_RESUME]
+
+def entity_set(entities: List[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+    """Reduces pipeline output to comparable (label, normalized word) pairs."""
+    return {(e['entity_group'], e['word'].strip().lower()) for e in entities}
+
+def time_pipeline(ner, texts: List[str], runs: int) -> Tuple[List[float], List[List[Dict[str, Any]]]]:
+    """Runs the pipeline over every text `runs` times and returns per-document latencies (ms)."""
+    ner(texts[0])  # Warm-up (graph initialization, memory allocation)
+
+    latencies = []
+    outputs = []
+    for _ in range(runs):
+        outputs = []
+        for text in texts:
+            start = time.perf_counter()
+            outputs.append(ner(text))
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, outputs
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+# --- 2. Benchmark ---
+
+def run_benchmark(samples_dir: str = None, runs: int = 3) -> Dict[str, Any]:
+    texts = load_samples(samples_dir)
+    print(f"Benchmarking {MODEL_NAME} on {len(texts)} document(s), {runs} run(s) each...")
+
+    results = {}
+    outputs = {}
+    for backend in ("pytorch", "onnx"):
+        ner = load_ner_pipeline(backend)
+        latencies, outputs[backend] = time_pipeline(ner, texts, runs)
+        results[backend] = {
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "mean_ms": round(statistics.mean(latencies), 2),
+        }
+
+    # Entity-level agreement, treating the PyTorch output as the reference
+    true_positive = false_positive = false_negative = 0
+    for reference, candidate in zip(outputs["pytorch"], outputs["onnx"]):
+        reference_set, candidate_set = entity_set(reference), entity_set(candidate)
+        true_positive += len(reference_set & candidate_set)
+        false_positive += len(candidate_set - reference_set)
+        false_negative += len(reference_set - candidate_set)
+
+    precision = true_positive / (true_positive + false_positive) if (true_positive + false_positive) else 1.0
+    recall = true_positive / (true_positive + false_negative) if (true_positive + false_negative) else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0.0
+
+    results["agreement"] = {
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(f1, 4),
+    }
+    results["speedup_p50"] = round(results["pytorch"]["p50_ms"] / max(results["onnx"]["p50_ms"], 1e-6), 2)
+    return results
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX int8 NER backends.")
+    arg_parser.add_argument("--samples-dir", default=None, help="Directory of resume files to benchmark on.")
+    arg_parser.add_argument("--runs", type=int, default=3, help="Number of passes over the sample set.")
+    args = arg_parser.parse_args()
+
+    report = run_benchmark(args.samples_dir, args.runs)
+    for backend in ("pytorch", "onnx"):
+        stats = report[backend]
+        print(f"{backend:>8}: p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms  mean={stats['mean_ms']}ms")
+    print(f" speedup: {report['speedup_p50']}x (p50)")
+    agreement = report["agreement"]
+    print(f"agreement vs pytorch: precision={agreement['precision']} recall={agreement['recall']} f1={agreement['f1']}")
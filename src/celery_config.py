@@ -1,8 +1,12 @@
 # src/celery_config.py
 
 from celery import Celery
+from celery.signals import celeryd_init, worker_process_init, worker_process_shutdown
 import os
 
+from .resource_governor import configure_process, available_cpus
+from . import metrics
+
 # Get Redis URL from environment variable set in docker-compose.yml
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
@@ -18,4 +22,30 @@ celery_app = Celery(
 celery_app.conf.update(
     enable_utc=True,
     timezone='Asia/Kolkata', # Set a timezone appropriate for you
-)
\ No newline at end of file
+    # Pool size defaults to the governor's CPU budget (cgroup quota aware), not os.cpu_count(),
+    # so the number of children and the thread plan agree. --concurrency still overrides both.
+    worker_concurrency=int(os.getenv('CELERY_CONCURRENCY', '0')) or available_cpus()[0],
+)
+
+# --- Resource Governor ---
+# celeryd_init fires before the task modules (and torch) are imported, so the thread
+# environment is in place when the libraries size their pools; each forked child then
+# applies the plan to itself and publishes it for GET /diagnostics/resources.
+
+def _worker_key() -> str:
+    return f"{os.uname().nodename}:{os.getpid()}"
+
+@celeryd_init.connect
+def _govern_worker(sender=None, conf=None, options=None, **kwargs):
+    concurrency = (options or {}).get('concurrency') or celery_app.conf.worker_concurrency
+    configure_process("worker", concurrency)
+
+@worker_process_init.connect
+def _govern_worker_child(**kwargs):
+    from billiard.process import current_process
+    settings = configure_process("worker", slot=current_process().index)
+    metrics.publish("resources", _worker_key(), settings)
+
+@worker_process_shutdown.connect
+def _forget_worker_child(**kwargs):
+    metrics.unpublish("resources", _worker_key())
@@ -1,8 +1,13 @@
 # src/crud.py
 
 from sqlalchemy.orm import Session
-from typing import Dict, Any
-from .models import Resume, SessionLocal
+from sqlalchemy import text, func, cast
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import TSQUERY, REAL, insert as pg_insert
+from typing import Dict, Any, Optional, List, Tuple
+from functools import reduce
+import datetime
+from .models import Resume, Job, ResumeSkill, ResumeLSHBand, MatchResult, JobRanking, RankingJob, SessionLocal
 
 # Dependency to get the database session (used in FastAPI endpoints)
 def get_db():
@@ -25,11 +30,32 @@ def create_resume_record(db: Session, resume_id: str, file_name: str, status: st
     return db_resume
 
 # CRUD function to update the parsed data after AI processing
-def update_resume_data(db: Session, resume_id: str, parsed_data: Dict[str, Any], status: str = "completed"):
+def update_resume_data(
+    db: Session,
+    resume_id: str,
+    parsed_data: Dict[str, Any],
+    status: str = "completed",
+    embedding: Optional[List[float]] = None,
+    embedding_model: Optional[str] = None,
+    chunk_embeddings: Optional[bytes] = None,
+    chunk_sections: Optional[List[str]] = None,
+    raw_text: Optional[str] = None,
+    minhash: Optional[bytes] = None
+):
     db_resume = db.query(Resume).filter(Resume.id == resume_id).first()
     if db_resume:
         db_resume.parsed_data = parsed_data
         db_resume.status = status
+        if raw_text is not None:
+            # Postgres text columns cannot hold NUL bytes, which PDF extraction sometimes produces
+            db_resume.raw_text = raw_text.replace("\x00", "")
+        if minhash is not None:
+            db_resume.minhash = minhash
+        if embedding is not None:
+            db_resume.embedding = embedding
+            db_resume.embedding_model = embedding_model
+            db_resume.chunk_embeddings = chunk_embeddings
+            db_resume.chunk_sections = chunk_sections
         db.commit()
         db.refresh(db_resume)
         return db_resume
@@ -37,4 +63,401 @@ def update_resume_data(db: Session, resume_id: str, parsed_data: Dict[str, Any],
 
 # CRUD function to retrieve data for the API endpoint
 def get_resume(db: Session, resume_id: str):
-    return db.query(Resume).filter(Resume.id == resume_id).first()
\ No newline at end of file
+    return db.query(Resume).filter(Resume.id == resume_id).first()
+
+# CRUD function to delete a resume (its ANN index entry is removed by Postgres)
+def delete_resume(db: Session, resume_id: str) -> bool:
+    deleted = db.query(Resume).filter(Resume.id == resume_id).delete(synchronize_session=False)
+    db.commit()
+    return deleted > 0
+
+# CRUD functions for the embedding backfill job
+def get_resumes_missing_embeddings(db: Session, embedding_model: str, limit: int = 100, exclude_ids: Optional[List[str]] = None):
+    """Completed resumes without embeddings/chunk vectors, or with ones from a different model version."""
+    query = (
+        db.query(Resume)
+        .filter(Resume.status == "completed")
+        .filter(
+            Resume.embedding.is_(None)
+            | Resume.chunk_embeddings.is_(None)
+            | (Resume.embedding_model != embedding_model)
+        )
+    )
+    if exclude_ids:
+        query = query.filter(Resume.id.notin_(exclude_ids))
+    return query.order_by(Resume.uploaded_at).limit(limit).all()
+
+def get_jobs_missing_embeddings(db: Session, embedding_model: str, limit: int = 100, exclude_ids: Optional[List[str]] = None):
+    """Registered jobs without an embedding, or with one from a different model version."""
+    query = db.query(Job).filter(Job.embedding.is_(None) | (Job.embedding_model != embedding_model))
+    if exclude_ids:
+        query = query.filter(Job.id.notin_(exclude_ids))
+    return query.order_by(Job.created_at).limit(limit).all()
+
+# CRUD functions for the job description registry
+def create_job_record(db: Session, job_id: str, title: str, description: str, requirements: Dict[str, Any],
+                      normalized_requirements: Dict[str, Any], jd_hash: str,
+                      embedding: Optional[List[float]] = None, embedding_model: Optional[str] = None):
+    db_job = Job(
+        id=job_id,
+        title=title,
+        description=description,
+        requirements=requirements,
+        normalized_requirements=normalized_requirements,
+        jd_hash=jd_hash,
+        embedding=embedding,
+        embedding_model=embedding_model
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_job(db: Session, job_id: str):
+    return db.query(Job).filter(Job.id == job_id).first()
+
+def get_job_by_hash(db: Session, jd_hash: str):
+    return db.query(Job).filter(Job.jd_hash == jd_hash).first()
+
+# CRUD function for maintenance jobs that walk every completed resume
+def get_completed_resumes_page(db: Session, offset: int = 0, limit: int = 500):
+    return (
+        db.query(Resume)
+        .filter(Resume.status == "completed")
+        .order_by(Resume.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+def get_resumes_missing_text(db: Session, limit: int = 500):
+    """Completed resumes parsed before extracted text was stored."""
+    return (
+        db.query(Resume)
+        .filter(Resume.status == "completed")
+        .filter(Resume.raw_text.is_(None))
+        .limit(limit)
+        .all()
+    )
+
+def get_resumes_missing_signatures(db: Session, limit: int = 500, exclude_ids: Optional[List[str]] = None):
+    """Completed resumes with extracted text but no MinHash signature (parsed before near-duplicate detection)."""
+    query = (
+        db.query(Resume)
+        .filter(Resume.status == "completed")
+        .filter(Resume.raw_text.isnot(None))
+        .filter(Resume.minhash.is_(None))
+    )
+    if exclude_ids:
+        query = query.filter(Resume.id.notin_(exclude_ids))
+    return query.limit(limit).all()
+
+# CRUD functions for the inverted skill index
+def replace_resume_skills(db: Session, resume_id: str, skills: List[str]):
+    """Replaces the indexed skills of a resume with the given (already canonical) skills."""
+    db.query(ResumeSkill).filter(ResumeSkill.resume_id == resume_id).delete(synchronize_session=False)
+    db.add_all([ResumeSkill(resume_id=resume_id, skill=skill) for skill in dict.fromkeys(skills)])
+    db.commit()
+
+def skill_match_subquery(db: Session, skills: List[str], min_match: int):
+    """(resume_id, matched) for resumes having at least min_match of the given skills."""
+    matched = func.count(ResumeSkill.skill).label("matched")
+    return (
+        db.query(ResumeSkill.resume_id.label("resume_id"), matched)
+        .filter(ResumeSkill.skill.in_(skills))
+        .group_by(ResumeSkill.resume_id)
+        .having(func.count(ResumeSkill.skill) >= min_match)
+    )
+
+def get_resumes_with_skills(db: Session, skills: List[str], min_match: int, limit: int = 100, offset: int = 0):
+    """Returns [(resume_id, matched_count)] ordered by matched count, computed in the database."""
+    subquery = skill_match_subquery(db, skills, min_match).subquery()
+    return (
+        db.query(subquery.c.resume_id, subquery.c.matched)
+        .order_by(subquery.c.matched.desc(), subquery.c.resume_id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+# CRUD functions for the near-duplicate LSH index
+def replace_resume_lsh_bands(db: Session, resume_id: str, buckets: List[int]):
+    """Replaces the (band, bucket) rows of a resume; `buckets` holds one key per band, in band order."""
+    db.query(ResumeLSHBand).filter(ResumeLSHBand.resume_id == resume_id).delete(synchronize_session=False)
+    db.add_all([ResumeLSHBand(band=band, bucket=bucket, resume_id=resume_id) for band, bucket in enumerate(buckets)])
+    db.commit()
+
+def get_lsh_candidates(db: Session, resume_id: str, limit: int = 200) -> List[str]:
+    """Ids of the resumes sharing at least one (band, bucket) with the given resume, most shared bands first."""
+    own = db.query(ResumeLSHBand.band, ResumeLSHBand.bucket).filter(ResumeLSHBand.resume_id == resume_id).subquery()
+    shared = func.count().label("shared")
+    rows = (
+        db.query(ResumeLSHBand.resume_id, shared)
+        .join(own, (ResumeLSHBand.band == own.c.band) & (ResumeLSHBand.bucket == own.c.bucket))
+        .filter(ResumeLSHBand.resume_id != resume_id)
+        .group_by(ResumeLSHBand.resume_id)
+        .order_by(shared.desc(), ResumeLSHBand.resume_id)
+        .limit(limit)
+        .all()
+    )
+    return [row.resume_id for row in rows]
+
+def get_resume_signatures(db: Session, resume_ids: List[str]) -> Dict[str, Optional[bytes]]:
+    """{resume id: MinHash signature} for the given resumes, in one query."""
+    if not resume_ids:
+        return {}
+    rows = db.query(Resume.id, Resume.minhash).filter(Resume.id.in_(resume_ids)).all()
+    return {row.id: row.minhash for row in rows}
+
+# CRUD functions for batch scoring: candidate resumes selected by one filtered query
+def scoring_candidates_query(
+    db: Session,
+    resume_ids: Optional[List[str]] = None,
+    uploaded_after: Optional[datetime.datetime] = None,
+    uploaded_before: Optional[datetime.datetime] = None,
+    file_name_contains: Optional[str] = None,
+    skills: Optional[List[str]] = None,
+    min_skill_match: Optional[int] = None
+):
+    """Completed resumes matching the batch-scoring filters (unordered, unlimited)."""
+    query = db.query(Resume).filter(Resume.status == "completed")
+    if resume_ids is not None:
+        query = query.filter(Resume.id.in_(resume_ids))
+    if skills:
+        # Pre-filter through the inverted skill index before anything is loaded or scored.
+        # min_skill_match is clamped to 1..len(skills), as in POST /resumes/filter/skills
+        min_match = max(1, min(min_skill_match or 1, len(skills)))
+        candidates = skill_match_subquery(db, skills, min_match).subquery()
+        query = query.filter(Resume.id.in_(db.query(candidates.c.resume_id)))
+    if uploaded_after is not None:
+        query = query.filter(Resume.uploaded_at >= uploaded_after)
+    if uploaded_before is not None:
+        query = query.filter(Resume.uploaded_at < uploaded_before)
+    if file_name_contains:
+        query = query.filter(Resume.file_name.ilike(f"%{file_name_contains}%"))
+    return query
+
+def get_resumes_for_scoring(db: Session, limit: Optional[int] = None, **filters):
+    """All candidate resumes in a single query, newest first (filters: see scoring_candidates_query)."""
+    query = scoring_candidates_query(db, **filters).order_by(Resume.uploaded_at.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def count_resumes_for_scoring(db: Session, **filters) -> int:
+    return scoring_candidates_query(db, **filters).order_by(None).count()
+
+def stream_resumes_for_scoring(db: Session, batch_size: int = 500, limit: Optional[int] = None, **filters):
+    """
+    Yields lists of at most batch_size candidate resumes through a server-side cursor,
+    so scoring the whole table never holds more than one batch of rows in memory.
+    The cursor lives in the session's transaction: do not commit `db` while iterating.
+    """
+    query = scoring_candidates_query(db, **filters).order_by(Resume.uploaded_at.desc(), Resume.id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    batch = []
+    for resume in query.execution_options(stream_results=True, max_row_buffer=batch_size).yield_per(batch_size):
+        batch.append(resume)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# CRUD function for approximate nearest-neighbor candidate search (pgvector HNSW)
+def get_nearest_resumes(db: Session, embedding: List[float], embedding_model: str, k: int = 10):
+    """
+    Returns [(Resume, cosine_distance)] for the k closest completed resumes.
+    hnsw.ef_search is raised to at least k so the index can return k rows.
+    """
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, int(k))}"))
+    distance = Resume.embedding.cosine_distance(embedding)
+    return (
+        db.query(Resume, distance.label("distance"))
+        .filter(Resume.status == "completed")
+        .filter(Resume.embedding.isnot(None))
+        .filter(Resume.embedding_model == embedding_model)
+        .order_by(distance)
+        .limit(k)
+        .all()
+    )
+
+# CRUD function for reverse matching: closest registered jobs to a resume (pgvector HNSW)
+def get_nearest_jobs(db: Session, embedding: List[float], embedding_model: str, k: int = 50):
+    """Returns [(Job, cosine_distance)] for the k closest registered jobs."""
+    db.execute(text(f"SET LOCAL hnsw.ef_search = {max(40, int(k))}"))
+    distance = Job.embedding.cosine_distance(embedding)
+    return (
+        db.query(Job, distance.label("distance"))
+        .filter(Job.embedding.isnot(None))
+        .filter(Job.embedding_model == embedding_model)
+        .order_by(distance)
+        .limit(k)
+        .all()
+    )
+
+# CRUD function for lexical recall (Postgres full-text search over the GIN-indexed tsvector)
+def any_terms_tsquery(terms: List[str]):
+    """
+    One phraseto_tsquery per term ('machine learning' stays a phrase), ORed together.
+    The terms are specific (title, skills), so the GIN index narrows the candidates before
+    ts_rank_cd runs; ts_rank_cd then favors documents containing more of them.
+    """
+    queries = [func.phraseto_tsquery('english', term) for term in terms]
+    return cast(reduce(lambda left, right: left.op('||')(right), queries), TSQUERY)
+
+def lexical_search_resumes(db: Session, terms: List[str], limit: int = 200):
+    """Returns [(resume_id, lexical_rank)] for the completed resumes matching any of the terms, best first."""
+    if not terms:
+        return []
+    tsquery = any_terms_tsquery(terms)
+    rank = func.ts_rank_cd(Resume.search_vector, tsquery).label("rank")
+    return (
+        db.query(Resume.id, rank)
+        .filter(Resume.status == "completed")
+        .filter(Resume.search_vector.op('@@')(tsquery))
+        .order_by(rank.desc())
+        .limit(limit)
+        .all()
+    )
+
+# CRUD function for the free-text search endpoint (same GIN-indexed tsvector)
+SEARCH_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=3, MaxWords=30, MinWords=10, FragmentDelimiter= ... "
+
+def search_resumes(db: Session, query_text: str, limit: int = 20, after: Optional[Tuple[float, str]] = None):
+    """
+    One page of completed resumes matching a web-search style query ("quoted phrases", OR, -term),
+    ordered by ts_rank_cd then id. `after` is the (rank, id) of the last row of the previous page:
+    keyset pagination, so deep pages cost the same as the first one.
+    Returns [(resume_id, file_name, uploaded_at, rank, headline)]; ts_headline (which re-parses
+    the document) only runs on the rows of the page.
+    """
+    tsquery = func.websearch_to_tsquery('english', query_text)
+    rank = func.ts_rank_cd(Resume.search_vector, tsquery).label("rank")
+    page = (
+        db.query(Resume.id.label("id"), rank)
+        .filter(Resume.status == "completed")
+        .filter(Resume.search_vector.op('@@')(tsquery))
+    )
+    if after is not None:
+        # ts_rank_cd returns real: compare against the cursor as real, or equal ranks would not match
+        after_rank = cast(after[0], REAL)
+        page = page.filter((rank < after_rank) | ((rank == after_rank) & (Resume.id > after[1])))
+    page = page.order_by(rank.desc(), Resume.id).limit(limit).subquery()
+
+    headline = func.ts_headline('english', Resume.raw_text, tsquery, SEARCH_HEADLINE_OPTIONS)
+    return (
+        db.query(Resume.id, Resume.file_name, Resume.uploaded_at, page.c.rank, headline.label("headline"))
+        .join(page, Resume.id == page.c.id)
+        .order_by(page.c.rank.desc(), Resume.id)
+        .all()
+    )
+
+# CRUD functions for persisted match results
+def get_match_result(db: Session, resume_id: str, jd_hash: str, model_version: str):
+    return db.query(MatchResult).filter(
+        MatchResult.resume_id == resume_id,
+        MatchResult.jd_hash == jd_hash,
+        MatchResult.model_version == model_version,
+    ).first()
+
+def get_match_result_by_id(db: Session, match_id: str):
+    return db.query(MatchResult).filter(MatchResult.id == match_id).first()
+
+def save_match_result(db: Session, match_id: str, resume_id: str, jd_hash: str, model_version: str, components: Dict[str, Any]):
+    """Stores match components; if a concurrent request stored the same key first, returns that row."""
+    db_match = MatchResult(id=match_id, resume_id=resume_id, jd_hash=jd_hash, model_version=model_version, components=components)
+    db.add(db_match)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return get_match_result(db, resume_id, jd_hash, model_version)
+    db.refresh(db_match)
+    return db_match
+
+def delete_match_results(db: Session, resume_id: str) -> int:
+    """Drops the stored matches of a resume (its parsed data or embeddings changed)."""
+    deleted = db.query(MatchResult).filter(MatchResult.resume_id == resume_id).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+# CRUD functions for standing job queries and their materialized rankings
+def set_job_standing(db: Session, job_id: str, standing: bool):
+    db_job = get_job(db, job_id)
+    if db_job is None:
+        return None
+    db_job.standing = standing
+    if not standing:
+        db.query(JobRanking).filter(JobRanking.job_id == job_id).delete(synchronize_session=False)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_standing_jobs(db: Session, embedding_model: str):
+    """Standing jobs whose embedding was produced by the current model (the others cannot be scored)."""
+    return (
+        db.query(Job)
+        .filter(Job.standing.is_(True))
+        .filter(Job.embedding.isnot(None))
+        .filter(Job.embedding_model == embedding_model)
+        .all()
+    )
+
+def upsert_job_rankings(db: Session, rows: List[Dict[str, Any]]):
+    """Inserts or refreshes (job, resume) ranking rows in one statement."""
+    if not rows:
+        return
+    statement = pg_insert(JobRanking).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[JobRanking.job_id, JobRanking.resume_id],
+        set_={
+            "overall_score": statement.excluded.overall_score,
+            "skill_score": statement.excluded.skill_score,
+            "semantic_score": statement.excluded.semantic_score,
+            "category_scores": statement.excluded.category_scores,
+            "scored_at": statement.excluded.scored_at,
+        },
+    )
+    db.execute(statement)
+    db.commit()
+
+def get_job_ranking(db: Session, job_id: str, limit: int = 50, offset: int = 0):
+    """(ranking row, resume file name) pairs, best first, read through ix_job_rankings_job_score."""
+    return (
+        db.query(JobRanking, Resume.file_name)
+        .join(Resume, Resume.id == JobRanking.resume_id)
+        .filter(JobRanking.job_id == job_id)
+        .order_by(JobRanking.overall_score.desc(), JobRanking.resume_id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+# CRUD functions for asynchronous ranking jobs
+def create_ranking_job(db: Session, ranking_id: str, job_description: Dict[str, Any], filters: Dict[str, Any],
+                       top_k: int, job_id: Optional[str] = None):
+    db_ranking = RankingJob(
+        id=ranking_id,
+        status="queued",
+        job_id=job_id,
+        job_description=job_description,
+        filters=filters,
+        top_k=top_k,
+        processed=0,
+        results=[],
+    )
+    db.add(db_ranking)
+    db.commit()
+    db.refresh(db_ranking)
+    return db_ranking
+
+def get_ranking_job(db: Session, ranking_id: str):
+    return db.query(RankingJob).filter(RankingJob.id == ranking_id).first()
+
+def update_ranking_job(db: Session, ranking_id: str, **fields):
+    """Writes progress fields (status, processed, total, results, ...) and commits them for pollers."""
+    db.query(RankingJob).filter(RankingJob.id == ranking_id).update(fields, synchronize_session=False)
+    db.commit()
@@ -0,0 +1,94 @@
+# src/embedding_backends.py
+
+from pathlib import Path
+import os
+
+from .resource_governor import onnx_session_options
+
+# Every backend is loaded as a SentenceTransformer, so matching.py encodes the same way
+# whichever one is configured (model.encode(..., normalize_embeddings=True)).
+
+# --- 1. Configuration ---
+# 'minilm' (default, PyTorch fp32), 'static' (static token embeddings, no transformer pass)
+# or 'onnx' (MiniLM exported to ONNX Runtime with dynamic int8 quantization)
+EMBEDDING_BACKENDS = ("minilm", "static", "onnx")
+
+MINILM_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Static embeddings trained with Matryoshka loss: the first 384 dimensions are a valid
+# embedding on their own, so they fit the existing pgvector columns (models.EMBEDDING_DIM)
+STATIC_MODEL_NAME = os.getenv("STATIC_EMBEDDING_MODEL", "sentence-transformers/static-retrieval-mrl-en-v1")
+EMBEDDING_DIM = 384
+
+# Target instruction set of the int8 kernels: 'avx2', 'avx512', 'avx512_vnni' or 'arm64'
+ONNX_QUANTIZATION_ARCH = os.getenv("ONNX_QUANTIZATION_ARCH", "avx2")
+# Where a locally quantized export is cached when the model repository does not ship one
+ONNX_EMBEDDING_DIR = Path(os.getenv("ONNX_EMBEDDING_DIR", "models/onnx-embedding"))
+# Weight type optimum's dynamic config uses per arch (avx2 has no signed int8 VNNI path)
+_ONNX_WEIGHTS_DTYPES = {"avx2": "quint8", "avx512": "qint8", "avx512_vnni": "qint8", "arm64": "qint8"}
+
+def onnx_weights_dtype(arch: str = ONNX_QUANTIZATION_ARCH) -> str:
+    """
+    'qint8' or 'quint8': the suffix sentence-transformers gives quantized files
+    (model_<dtype>_<arch>.onnx), taken from the quantization config when optimum is installed.
+    """
+    try:
+        from optimum.onnxruntime import AutoQuantizationConfig
+        return getattr(AutoQuantizationConfig, arch)(is_static=False).weights_dtype.name.lower()
+    except ImportError:
+        return _ONNX_WEIGHTS_DTYPES.get(arch, "qint8")
+
+def backend_model_name(backend: str) -> str:
+    return STATIC_MODEL_NAME if backend == "static" else MINILM_MODEL_NAME
+
+def backend_model_version(backend: str) -> str:
+    """
+    Identifies the vectors a backend produces. Stored embeddings, skill vectors and match
+    components of another version are recomputed. 'minilm' keeps the bare model name,
+    so embeddings stored before backends existed stay valid.
+    """
+    if backend == "minilm":
+        return MINILM_MODEL_NAME
+    if backend == "onnx":
+        return f"{MINILM_MODEL_NAME}@onnx-{_ONNX_WEIGHTS_DTYPES.get(ONNX_QUANTIZATION_ARCH, 'qint8')}-{ONNX_QUANTIZATION_ARCH}"
+    return f"{backend_model_name(backend)}@{backend}-{EMBEDDING_DIM}"
+
+# --- 2. Loading ---
+
+def _load_onnx_int8(device: str):
+    """
+    MiniLM on ONNX Runtime with int8 weights. Uses the quantized file published with the model
+    when there is one, else exports and quantizes it once into ONNX_EMBEDDING_DIR.
+    """
+    from sentence_transformers import SentenceTransformer
+    file_suffix = f"{onnx_weights_dtype()}_{ONNX_QUANTIZATION_ARCH}"
+    file_name = f"model_{file_suffix}.onnx"
+    local_dir = ONNX_EMBEDDING_DIR / MINILM_MODEL_NAME.replace("/", "__")
+    # Thread pool sized by the resource governor (ORT would otherwise use every core)
+    model_kwargs = {"file_name": f"onnx/{file_name}", "session_options": onnx_session_options()}
+
+    if (local_dir / "onnx" / file_name).exists():
+        return SentenceTransformer(str(local_dir), device=device, backend="onnx", model_kwargs=model_kwargs)
+    try:
+        return SentenceTransformer(MINILM_MODEL_NAME, device=device, backend="onnx", model_kwargs=model_kwargs)
+    except Exception as e:
+        print(f"INFO: No published {file_name} for {MINILM_MODEL_NAME} ({e}); quantizing locally (only happens once)...")
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    model = SentenceTransformer(MINILM_MODEL_NAME, device=device, backend="onnx")
+    model.save(str(local_dir))
+    export_dynamic_quantized_onnx_model(model, ONNX_QUANTIZATION_ARCH, str(local_dir), file_suffix=file_suffix)
+    return SentenceTransformer(str(local_dir), device=device, backend="onnx", model_kwargs=model_kwargs)
+
+def load_embedding_model(backend: str, device: str = "cpu"):
+    """Loads the SentenceTransformer behind an embedding backend (optional dependencies imported lazily)."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of {', '.join(EMBEDDING_BACKENDS)}.")
+
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx":
+        # The int8 kernels are CPU kernels
+        return _load_onnx_int8("cpu")
+    if backend == "static":
+        # A lookup and a mean per text: the GPU would only add transfer overhead
+        return SentenceTransformer(STATIC_MODEL_NAME, device="cpu", truncate_dim=EMBEDDING_DIM)
+    return SentenceTransformer(MINILM_MODEL_NAME, device=device)
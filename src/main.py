@@ -1,24 +1,48 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Path as FastAPIPath
+from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, Path as FastAPIPath, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
+import asyncio
+import base64
 import datetime
+import json
 import os
 import uuid
 import time
 from pathlib import Path
 
 # Project specific imports
-from .tasks import process_resume
-from .crud import create_resume_record, get_db, get_resume
+# Thread pools are sized before the model imports below create them
+from .resource_governor import configure_process, effective_settings, API_INFERENCE_CONCURRENCY
+configure_process("api", API_INFERENCE_CONCURRENCY)
+from .tasks import process_resume, seed_standing_ranking, run_ranking_job
+from .crud import create_resume_record, get_db, get_resume, create_job_record, get_job, get_job_by_hash
+from .crud import get_resumes_for_scoring, get_nearest_resumes, delete_resume, get_nearest_jobs, get_resumes_with_skills
+from .crud import get_match_result, save_match_result, get_match_result_by_id, set_job_standing, get_job_ranking
+from .crud import create_ranking_job, get_ranking_job
+from .crud import get_lsh_candidates, get_resume_signatures, search_resumes
+from .near_duplicates import collapse_duplicates, unpack_signature, estimated_jaccard, DUPLICATE_THRESHOLD
+from .skills import normalize_skills
+from .retrieval import hybrid_rank
+from .rerank import RERANK_DEFAULT_BUDGET_MS, RERANK_PRELOAD, get_cross_encoder
 from .models import Resume as ResumeDBModel # Import the SQLAlchemy Model
-from .matching import calculate_match_score # Import the matching logic
+from .matching import score_resumes_batch, score_jobs_for_resume # Import the matching logic
+from .matching import compute_match_components, combine_match_components, fallback_match_result, resolve_match_weights, match_model_version
+from .matching import build_match_explanation
+from .matching import encode_texts, get_stored_embedding, normalize_requirements, compute_jd_hash, EMBEDDING_MODEL_VERSION
+from . import metrics
 
 # Define the directory where raw resumes will be stored
 UPLOAD_DIR = Path("uploads")
 # Ensure the directory exists when the API starts. This is safe to run multiple times.
 UPLOAD_DIR.mkdir(exist_ok=True) 
 
+# Ranking job event streams end after this long without progress, or this long in total
+RANKING_EVENTS_STALL_SECONDS = float(os.getenv("RANKING_EVENTS_STALL_SECONDS", "300"))
+RANKING_EVENTS_MAX_SECONDS = float(os.getenv("RANKING_EVENTS_MAX_SECONDS", "3600"))
+
 # --- 1. FastAPI Application Initialization ---
 app = FastAPI(
     title="AI Resume Parser API",
@@ -26,6 +50,11 @@ app = FastAPI(
     description="Intelligent Resume Parser integrated with LLMs."
 )
 
+@app.on_event("startup")
+def preload_cross_encoder():
+    if RERANK_PRELOAD:
+        get_cross_encoder()
+
 # --- 2. Pydantic Models (API Response Schemas) ---
 
 class UploadResponse(BaseModel):
@@ -57,23 +86,322 @@ class JobDescriptionInput(BaseModel):
     description: str
     requirements: JobRequirementsInput
 
+class MatchWeightsInput(BaseModel):
+    # Relative weights of the 0-100 component scores in overallScore (normalized to sum to 1)
+    skills: float = 0.40
+    semantic: float = 0.60
+    semanticSkills: float = 0.0
+
 class MatchOptionsInput(BaseModel):
     includeExplanation: Optional[bool] = True
+    weights: Optional[MatchWeightsInput] = None
+    # Ranked lists only: keep the best-ranked copy of each near-duplicate resume group
+    collapseDuplicates: Optional[bool] = False
+
+class BatchMatchOptionsInput(MatchOptionsInput):
+    # Ranked lists return only a gap analysis per candidate, and only when asked for
+    includeExplanation: Optional[bool] = False
 
 class MatchRequestInput(BaseModel):
-    jobDescription: JobDescriptionInput
-    options: MatchOptionsInput
+    # Either an inline job description or the id of a registered job (POST /jobs)
+    jobDescription: Optional[JobDescriptionInput] = None
+    jobId: Optional[str] = None
+    options: MatchOptionsInput = MatchOptionsInput()
+
+class ResumeFilterInput(BaseModel):
+    uploadedAfter: Optional[datetime.datetime] = None
+    uploadedBefore: Optional[datetime.datetime] = None
+    fileNameContains: Optional[str] = None
+    # Skill pre-filter, evaluated in the database: at least minSkillMatch of these skills
+    skills: Optional[list[str]] = None
+    minSkillMatch: Optional[int] = None
+    limit: Optional[int] = 1000
+
+class RankingFilterInput(ResumeFilterInput):
+    # Ranking jobs cover every matching resume unless a limit is given explicitly
+    limit: Optional[int] = None
+
+class SkillFilterInput(BaseModel):
+    skills: list[str]
+    minMatch: int = 1
+    limit: int = 100
+    offset: int = 0
+
+class SkillFilterResult(BaseModel):
+    resumeId: str
+    matchedSkills: int
+
+class SkillFilterResponse(BaseModel):
+    skills: list[str]
+    minMatch: int
+    results: list[SkillFilterResult]
+
+class BatchMatchRequestInput(BaseModel):
+    # Same job reference as MatchRequestInput
+    jobDescription: Optional[JobDescriptionInput] = None
+    jobId: Optional[str] = None
+    # Candidates: explicit ids, or a filter over completed resumes
+    resumeIds: Optional[list[str]] = None
+    filter: Optional[ResumeFilterInput] = None
+    topK: Optional[int] = None
+    options: BatchMatchOptionsInput = BatchMatchOptionsInput()
+
+class RankedMatchResponse(BaseModel):
+    resumeId: str
+    rank: int
+    overallScore: int
+    recommendation: str
+    categoryScores: Dict[str, Any]
+    gapAnalysis: Optional[Dict[str, Any]] = None  # Only with options.includeExplanation
+    duplicates: Optional[list[str]] = None         # Near-duplicates collapsed into this result
+
+class BatchMatchResponse(BaseModel):
+    jobId: Optional[str] = None
+    totalCandidates: int
+    results: list[RankedMatchResponse]
+
+class CandidateResponse(BaseModel):
+    resumeId: str
+    fileName: Optional[str] = None
+    similarity: float
+    semanticScore: int
+
+class CandidateSearchResponse(BaseModel):
+    jobId: str
+    k: int
+    searchTimeMs: float
+    candidates: list[CandidateResponse]
+
+class JobSuggestionResponse(BaseModel):
+    jobId: str
+    title: str
+    rank: int
+    overallScore: int
+    recommendation: str
+    categoryScores: Dict[str, Any]
+    gapAnalysis: Optional[Dict[str, Any]] = None  # Only with includeExplanation
+
+class JobSuggestionsResponse(BaseModel):
+    resumeId: str
+    k: int
+    shortlistSize: int
+    jobs: list[JobSuggestionResponse]
+
+class RankRequestInput(BaseModel):
+    # Same job reference as MatchRequestInput
+    jobDescription: Optional[JobDescriptionInput] = None
+    jobId: Optional[str] = None
+    recallK: int = 200   # Lexical shortlist size (stage 1)
+    topK: int = 20       # Results returned after the semantic rerank (stage 2)
+    # Optional cross-encoder rerank of the topK shortlist (stage 3), bounded by a time budget
+    crossEncoderRerank: bool = False
+    rerankBudgetMs: Optional[float] = None
+    # Keep the best-ranked copy of each near-duplicate resume group
+    collapseDuplicates: bool = False
+    includeExplanation: bool = False
+
+class HybridRankedResponse(RankedMatchResponse):
+    lexicalRank: Optional[int] = None
+    lexicalScore: float = 0.0
+    rerankScore: Optional[int] = None
+
+class RankResponse(BaseModel):
+    jobId: Optional[str] = None
+    recalled: int
+    timings: Dict[str, float]
+    crossEncoder: Optional[Dict[str, Any]] = None
+    results: list[HybridRankedResponse]
+
+class RankingJobRequestInput(BaseModel):
+    # Same job reference as MatchRequestInput
+    jobDescription: Optional[JobDescriptionInput] = None
+    jobId: Optional[str] = None
+    # Candidates: every completed resume, or those matching the filter (no limit by default)
+    filter: Optional[RankingFilterInput] = None
+    topK: int = 50
+
+class RankingJobResponse(BaseModel):
+    rankingId: str
+    status: str
+    jobId: Optional[str] = None
+    topK: int
+    processed: int
+    total: Optional[int] = None
+    progress: float
+    createdAt: datetime.datetime
+    startedAt: Optional[datetime.datetime] = None
+    finishedAt: Optional[datetime.datetime] = None
+    error: Optional[str] = None
+    # Current top-k: final once status is 'completed', partial while 'running'
+    results: list[RankedMatchResponse]
+
+class SearchResultResponse(BaseModel):
+    resumeId: str
+    fileName: Optional[str] = None
+    uploadedAt: Optional[datetime.datetime] = None
+    rank: float
+    headline: str  # Matching fragments, terms wrapped in <mark></mark>
+
+class SearchResponse(BaseModel):
+    query: str
+    results: list[SearchResultResponse]
+    # Pass as `cursor` to fetch the next page; None on the last page
+    nextCursor: Optional[str] = None
+
+class DuplicateResponse(BaseModel):
+    resumeId: str
+    similarity: float  # Estimated Jaccard similarity of the word shingles
+
+class DuplicatesResponse(BaseModel):
+    resumeId: str
+    threshold: float
+    candidatesChecked: int
+    duplicates: list[DuplicateResponse]
+
+class JobResponse(BaseModel):
+    """Response model for a registered job description."""
+    jobId: str
+    title: str
+    description: str
+    requirements: Dict[str, Any]
+    normalizedRequirements: Dict[str, Any]
+    jdHash: str
+    createdAt: datetime.datetime
+    standing: bool = False
+
+class StandingRankingEntry(BaseModel):
+    resumeId: str
+    fileName: Optional[str] = None
+    rank: int
+    overallScore: int
+    categoryScores: Dict[str, Any]
+    scoredAt: datetime.datetime
+
+class StandingRankingResponse(BaseModel):
+    jobId: str
+    standing: bool
+    results: list[StandingRankingEntry]
 
 class MatchResultResponse(BaseModel):
     matchId: str
+    # True when the components came from the match store instead of the models
+    cached: bool = False
     overallScore: int
     recommendation: str
-    explanation: Dict[str, Any]
+    # Built only with options.includeExplanation (or later via GET /matches/{id}/explanation)
+    explanation: Optional[Dict[str, Any]] = None
     categoryScores: Dict[str, Any]
+    gapAnalysis: Optional[Dict[str, Any]] = None
+
+class MatchExplanationResponse(BaseModel):
+    matchId: str
+    resumeId: str
+    explanation: Dict[str, Any]
     gapAnalysis: Dict[str, Any]
 
 
-# --- 3. API Endpoints ---
+# --- 3. Helpers ---
+
+def job_to_response(db_job) -> JobResponse:
+    return JobResponse(
+        jobId=db_job.id,
+        title=db_job.title,
+        description=db_job.description,
+        requirements=db_job.requirements or {},
+        normalizedRequirements=db_job.normalized_requirements or {},
+        jdHash=db_job.jd_hash,
+        createdAt=db_job.created_at,
+        standing=bool(db_job.standing),
+    )
+
+def ranking_job_to_response(db_ranking) -> RankingJobResponse:
+    total = db_ranking.total
+    processed = db_ranking.processed or 0
+    return RankingJobResponse(
+        rankingId=db_ranking.id,
+        status=db_ranking.status,
+        jobId=db_ranking.job_id,
+        topK=db_ranking.top_k,
+        processed=processed,
+        total=total,
+        progress=1.0 if db_ranking.status == "completed" else (round(processed / total, 4) if total else 0.0),
+        createdAt=db_ranking.created_at,
+        startedAt=db_ranking.started_at,
+        finishedAt=db_ranking.finished_at,
+        error=db_ranking.error,
+        results=[
+            RankedMatchResponse(
+                resumeId=result['resumeId'],
+                rank=rank,
+                overallScore=result['overallScore'],
+                recommendation=result['recommendation'],
+                categoryScores=result['categoryScores'],
+                gapAnalysis=result.get('gapAnalysis'),
+            )
+            for rank, result in enumerate(db_ranking.results or [], start=1)
+        ],
+    )
+
+def encode_search_cursor(rank: float, resume_id: str) -> str:
+    """Opaque keyset cursor: the (rank, id) of the last result of a page."""
+    return base64.urlsafe_b64encode(json.dumps([rank, resume_id]).encode("utf-8")).decode("ascii")
+
+def decode_search_cursor(cursor: str):
+    try:
+        rank, resume_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(rank), str(resume_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=422, detail="Invalid search cursor.")
+
+def combine_or_422(components: Dict[str, Any], weights: Optional[Dict[str, float]], include_explanation: bool) -> Dict[str, Any]:
+    """
+    Applies request weights to match components. Weights are only fully checked here: without a
+    per-skill similarity its weight is dropped, so e.g. {semanticSkills: 1} alone becomes invalid.
+    """
+    try:
+        return combine_match_components(components, weights, include_explanation)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def current_job_embedding(db: Session, db_job: Any):
+    """
+    The job's embedding for the current model version. A job stored under another model or
+    backend is re-encoded and saved on first use (backfill_job_embeddings does the rest).
+    """
+    job_embedding = get_stored_embedding(db_job)
+    if job_embedding is not None or not db_job.description:
+        return job_embedding
+
+    embeddings = encode_texts([db_job.description])
+    if embeddings is None:
+        return None
+    db_job.embedding = embeddings[0].tolist()
+    db_job.embedding_model = EMBEDDING_MODEL_VERSION
+    db.commit()
+    return embeddings[0]
+
+def resolve_job_description(db: Session, match_request: Any):
+    """
+    Returns (job description dict, precomputed job embedding or None) for a match request.
+    A registered job reuses its stored embedding, so the JD is never re-encoded.
+    """
+    if match_request.jobId:
+        db_job = get_job(db, match_request.jobId)
+        if db_job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        job_description = {
+            "title": db_job.title,
+            "description": db_job.description,
+            "requirements": db_job.requirements or {},
+        }
+        return job_description, current_job_embedding(db, db_job)
+
+    if match_request.jobDescription is None:
+        raise HTTPException(status_code=422, detail="Either jobDescription or jobId is required.")
+    return match_request.jobDescription.dict(), None
+
+
+# --- 4. API Endpoints ---
 
 # Health Check Endpoint (Must-Have)
 @app.get("/health", summary="Health Check")
@@ -84,6 +412,36 @@ async def health_check():
     return {"status": "ok", "message": "Resume Parser API is running!"}
 
 
+# Parsing Cascade Metrics
+@app.get("/metrics/parsing", summary="Parsing Cascade Metrics")
+def parsing_metrics():
+    """
+    Reports how many documents were handled by each extraction tier
+    (rule parser only, transformer fallback, or 'fallback' when the rules had to read
+    unsegmented text or no section could take a low-confidence field) and which fields fell back most often.
+    """
+    return {
+        "tiers": metrics.get_counters("parser_tier"),
+        "tierShares": metrics.get_shares("parser_tier"),
+        "fallbackFields": metrics.get_counters("parser_fallback_fields"),
+        "nerCache": metrics.get_counters("ner_cache"),
+    }
+
+
+# Resource Governor Diagnostics
+@app.get("/diagnostics/resources", summary="Effective CPU and Thread Settings")
+def resource_diagnostics():
+    """
+    Reports how the CPU budget is divided: the API process's settings and those published by
+    every running Celery child (CPUs detected, concurrency, threads per process, pinned cores,
+    and the thread counts torch and the native BLAS/OpenMP pools actually report).
+    """
+    return {
+        "api": effective_settings(),
+        "workers": metrics.get_published("resources"),
+    }
+
+
 @app.post("/resumes/upload", response_model=UploadResponse, status_code=202, summary="Upload and Parse Resume")
 async def upload_resume(
     file: UploadFile = File(..., description="The resume file (PDF, DOCX, TXT, etc.)"),
@@ -143,6 +501,36 @@ async def upload_resume(
         estimatedProcessingTime=30
     )
 
+# Full-Text Search Endpoint (declared before /resumes/{id} so 'search' is not taken for an id)
+@app.get("/resumes/search", response_model=SearchResponse, summary="Full-Text Search Over Resume Content")
+def search_resume_text(
+    q: str = Query(..., min_length=1, max_length=500, description='Web-search syntax: words, "quoted phrases", OR, -excluded'),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Searches the extracted text of every completed resume through the GIN-indexed tsvector
+    (no scan of parsed_data). Results are ranked with ts_rank_cd, highlighted with ts_headline
+    and paginated by keyset on (rank, id), so page 1000 is as cheap as page 1.
+    """
+    rows = search_resumes(db, q, limit=limit + 1, after=decode_search_cursor(cursor) if cursor else None)
+    page = rows[:limit]
+    return SearchResponse(
+        query=q,
+        results=[
+            SearchResultResponse(
+                resumeId=row.id,
+                fileName=row.file_name,
+                uploadedAt=row.uploaded_at,
+                rank=row.rank,
+                headline=row.headline or "",
+            )
+            for row in page
+        ],
+        nextCursor=encode_search_cursor(page[-1].rank, page[-1].id) if len(rows) > limit else None,
+    )
+
 # Retrieve Parsed Data Endpoint (Must-Have)
 @app.get("/resumes/{id}", response_model=ResumeDataResponse, summary="Retrieve Parsed Resume Data")
 def retrieve_parsed_data(id: str, db: Session = Depends(get_db)):
@@ -168,6 +556,114 @@ def get_parsing_status(id: str, db: Session = Depends(get_db)):
         
     return {"id": db_resume.id, "status": db_resume.status}
 
+# Near-Duplicate Lookup (MinHash LSH)
+@app.get("/resumes/{id}/duplicates", response_model=DuplicatesResponse, summary="Possible Duplicates of a Resume")
+def find_duplicate_resumes(
+    id: str,
+    threshold: float = Query(DUPLICATE_THRESHOLD, ge=0.0, le=1.0, description="Minimum estimated text similarity"),
+    db: Session = Depends(get_db)
+):
+    """
+    Resumes whose extracted text is nearly identical to this one (resubmissions with different
+    formatting or small edits). Candidates come from the LSH band index, so the lookup does not
+    depend on the corpus size; each candidate is then verified against its MinHash signature.
+    """
+    db_resume = get_resume(db, id)
+    if db_resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    signature = unpack_signature(db_resume.minhash)
+    if signature is None:
+        raise HTTPException(status_code=409, detail="Resume has no text signature yet.")
+
+    candidates = get_lsh_candidates(db, id)
+    duplicates = []
+    for resume_id, blob in get_resume_signatures(db, candidates).items():
+        other = unpack_signature(blob)
+        similarity = estimated_jaccard(signature, other) if other is not None else 0.0
+        if similarity >= threshold:
+            duplicates.append(DuplicateResponse(resumeId=resume_id, similarity=round(similarity, 4)))
+    duplicates.sort(key=lambda d: (-d.similarity, d.resumeId))
+
+    return DuplicatesResponse(resumeId=id, threshold=threshold, candidatesChecked=len(candidates), duplicates=duplicates)
+
+# Skill Pre-Filter Endpoint (inverted skill index)
+@app.post("/resumes/filter/skills", response_model=SkillFilterResponse, summary="Find Resumes Having At Least k Skills")
+def filter_resumes_by_skills(skill_filter: SkillFilterInput, db: Session = Depends(get_db)):
+    """
+    Returns resumes having at least `minMatch` of the given skills, most matches first.
+    Runs as one indexed GROUP BY over resume_skills, so it is cheap enough to run before scoring.
+    """
+    skills = normalize_skills(skill_filter.skills)
+    if not skills:
+        raise HTTPException(status_code=422, detail="At least one skill is required.")
+    min_match = max(1, min(skill_filter.minMatch, len(skills)))
+
+    rows = get_resumes_with_skills(db, skills, min_match, limit=skill_filter.limit, offset=skill_filter.offset)
+    return SkillFilterResponse(
+        skills=skills,
+        minMatch=min_match,
+        results=[SkillFilterResult(resumeId=resume_id, matchedSkills=matched) for resume_id, matched in rows],
+    )
+
+# Delete Resume Endpoint
+@app.delete("/resumes/{id}", status_code=204, summary="Delete Resume")
+def remove_resume(id: str, db: Session = Depends(get_db)):
+    """
+    Deletes a resume record. Its embedding disappears from the ANN index with the row.
+    """
+    if not delete_resume(db, id):
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+# Reverse Matching Endpoint: top jobs for a resume
+@app.get("/resumes/{id}/jobs", response_model=JobSuggestionsResponse, summary="Top-k Jobs for a Resume")
+def suggest_jobs(
+    id: str,
+    k: int = Query(10, ge=1, le=100, description="Number of jobs to return"),
+    shortlist: int = Query(50, ge=1, le=1000, description="ANN shortlist size re-scored with skill overlap"),
+    includeExplanation: bool = Query(False, description="Add the gap analysis of each suggested job"),
+    db: Session = Depends(get_db)
+):
+    """
+    Suggests registered jobs for a candidate. The stored resume embedding queries the
+    job-side HNSW index; only the shortlisted jobs are re-scored with skill overlap.
+    """
+    db_resume = get_resume(db, id)
+    if db_resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    resume_embedding = get_stored_embedding(db_resume)
+    if db_resume.status != "completed" or resume_embedding is None:
+        raise HTTPException(
+            status_code=409,
+            detail="Resume has no embedding for the current model version. Current status: " + db_resume.status
+        )
+
+    neighbors = get_nearest_jobs(db, resume_embedding.tolist(), EMBEDDING_MODEL_VERSION, max(k, shortlist))
+    ranked = score_jobs_for_resume(
+        db_resume,
+        [job for job, _ in neighbors],
+        [1 - distance for _, distance in neighbors],
+        include_gap_analysis=includeExplanation
+    )[:k]
+
+    return JobSuggestionsResponse(
+        resumeId=id,
+        k=k,
+        shortlistSize=len(neighbors),
+        jobs=[
+            JobSuggestionResponse(
+                jobId=result['jobId'],
+                title=result['title'],
+                rank=rank,
+                overallScore=result['overallScore'],
+                recommendation=result['recommendation'],
+                categoryScores=result['categoryScores'],
+                gapAnalysis=result.get('gapAnalysis'),
+            )
+            for rank, result in enumerate(ranked, start=1)
+        ],
+    )
+
 # Resume-Job Matching Endpoint (Advanced Feature - High Points!)
 @app.post("/resumes/{id}/match", response_model=MatchResultResponse, summary="Match Resume with Job Description")
 def match_resume(
@@ -177,6 +673,8 @@ def match_resume(
 ):
     """
     Performs an AI-powered comparison between a parsed resume and a job description.
+    Component scores are persisted: repeating a match returns the same matchId without
+    running the models, and `options.weights` only changes how the stored components are combined.
     """
     db_resume = get_resume(db, id)
     if db_resume is None:
@@ -188,10 +686,387 @@ def match_resume(
             detail="Resume parsing not complete. Current status: " + db_resume.status
         )
 
-    # Use the imported logic to calculate the score
-    match_results = calculate_match_score(db_resume, match_request.dict())
+    job_description, job_embedding = resolve_job_description(db, match_request)
+    weights = match_request.options.weights.dict() if match_request.options.weights else None
+    try:
+        resolve_match_weights(weights)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # Components are stored per (resume, JD content, model version); only the weighting is redone
+    jd_hash = compute_jd_hash(job_description)
+    model_version = match_model_version()
+    include_explanation = bool(match_request.options.includeExplanation)
+    stored = get_match_result(db, id, jd_hash, model_version)
+    if stored is not None:
+        return MatchResultResponse(
+            matchId=stored.id, cached=True,
+            **combine_or_422(stored.components, weights, include_explanation)
+        )
+
+    try:
+        components = compute_match_components(db_resume, job_description, job_embedding)
+    except Exception as e:
+        # Nothing is stored for a failed match, so the next request retries it
+        print(f"CRITICAL ERROR in match_resume: {e}")
+        return MatchResultResponse(matchId=str(uuid.uuid4()), **fallback_match_result())
+
+    if components["semanticDegraded"]:
+        # Same for a match scored without the embedding model: served once, never cached
+        print(f"Warning: semantic score unavailable for resume {id}; match not stored.")
+        return MatchResultResponse(matchId=str(uuid.uuid4()), **combine_or_422(components, weights, include_explanation))
+
+    stored = save_match_result(db, str(uuid.uuid4()), id, jd_hash, model_version, components)
+    return MatchResultResponse(matchId=stored.id, **combine_or_422(stored.components, weights, include_explanation))
+
+# Match Explanation Endpoint: built on demand from the stored components
+@app.get("/matches/{id}/explanation", response_model=MatchExplanationResponse, summary="Explain a Stored Match")
+def explain_match(
+    id: str,
+    skills: Optional[float] = Query(None, ge=0, description="Weight of the skill score (default 0.4)"),
+    semantic: Optional[float] = Query(None, ge=0, description="Weight of the semantic score (default 0.6)"),
+    semanticSkills: Optional[float] = Query(None, ge=0, description="Weight of the per-skill semantic score (default 0)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Returns the explanation and gap analysis of a match returned by POST /resumes/{id}/match.
+    Computed from the persisted components (no model call), so callers that only rank
+    can skip explanations and fetch them for the few matches a recruiter opens.
+    """
+    stored = get_match_result_by_id(db, id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    weights = {"skills": skills, "semantic": semantic, "semanticSkills": semanticSkills}
+    try:
+        explanation = build_match_explanation(stored.components, weights)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return MatchExplanationResponse(matchId=stored.id, resumeId=stored.resume_id, **explanation)
+
+# Batch Matching Endpoint (one JD vs many resumes)
+@app.post("/match/batch", response_model=BatchMatchResponse, summary="Rank Many Resumes Against One Job Description")
+def batch_match(match_request: BatchMatchRequestInput, db: Session = Depends(get_db)):
+    """
+    Scores one job description against a list of resumes (or a filter) and returns a ranked list.
+    Resumes and their stored embeddings are loaded in one query and scored with one matrix operation.
+    """
+    if match_request.resumeIds is None and match_request.filter is None:
+        raise HTTPException(status_code=422, detail="Either resumeIds or filter is required.")
+
+    job_description, job_embedding = resolve_job_description(db, match_request)
+
+    resume_filter = match_request.filter or ResumeFilterInput(limit=None)
+    resumes = get_resumes_for_scoring(
+        db,
+        resume_ids=match_request.resumeIds,
+        uploaded_after=resume_filter.uploadedAfter,
+        uploaded_before=resume_filter.uploadedBefore,
+        file_name_contains=resume_filter.fileNameContains,
+        limit=resume_filter.limit,
+        skills=normalize_skills(resume_filter.skills or []),
+        min_skill_match=resume_filter.minSkillMatch,
+    )
+
+    try:
+        ranked = score_resumes_batch(
+            resumes, job_description, job_embedding,
+            include_gap_analysis=bool(match_request.options.includeExplanation)
+        )
+    except Exception as e:
+        print(f"CRITICAL ERROR in batch_match: {e}")
+        raise HTTPException(status_code=500, detail="Batch scoring failed.")
+
+    if match_request.options.collapseDuplicates:
+        ranked = collapse_duplicates(ranked, {resume.id: resume.minhash for resume in resumes})
+
+    if match_request.topK:
+        ranked = ranked[:match_request.topK]
+
+    return BatchMatchResponse(
+        jobId=match_request.jobId,
+        totalCandidates=len(resumes),
+        results=[
+            RankedMatchResponse(
+                resumeId=result['resumeId'],
+                rank=rank,
+                overallScore=result['overallScore'],
+                recommendation=result['recommendation'],
+                categoryScores=result['categoryScores'],
+                gapAnalysis=result.get('gapAnalysis'),
+                duplicates=result.get('duplicates'),
+            )
+            for rank, result in enumerate(ranked, start=1)
+        ],
+    )
+
+# Hybrid Ranking Endpoint (lexical recall + embedding rerank)
+@app.post("/rank", response_model=RankResponse, summary="Hybrid Candidate Ranking")
+def rank_candidates(rank_request: RankRequestInput, db: Session = Depends(get_db)):
+    """
+    Two-stage retrieval over all resumes: Postgres full-text recall (exact terms such as
+    certifications and rare tools), then SentenceTransformer + skill rerank of the shortlist.
+    Optionally a cross-encoder reorders the final shortlist within rerankBudgetMs.
+    Returns per-stage timings alongside the ranked list.
+    """
+    job_description, job_embedding = resolve_job_description(db, rank_request)
+
+    try:
+        ranked, stats = hybrid_rank(
+            db, job_description, job_embedding,
+            recall_k=max(1, rank_request.recallK),
+            top_k=max(1, rank_request.topK),
+            rerank=rank_request.crossEncoderRerank,
+            rerank_budget_ms=RERANK_DEFAULT_BUDGET_MS if rank_request.rerankBudgetMs is None else rank_request.rerankBudgetMs,
+            collapse=rank_request.collapseDuplicates,
+            include_gap_analysis=rank_request.includeExplanation
+        )
+    except Exception as e:
+        print(f"CRITICAL ERROR in rank_candidates: {e}")
+        raise HTTPException(status_code=500, detail="Hybrid ranking failed.")
+
+    return RankResponse(
+        jobId=rank_request.jobId,
+        recalled=stats['recalled'],
+        timings=stats['timings'],
+        crossEncoder=stats['crossEncoder'],
+        results=[
+            HybridRankedResponse(
+                resumeId=result['resumeId'],
+                rank=rank,
+                overallScore=result['overallScore'],
+                recommendation=result['recommendation'],
+                categoryScores=result['categoryScores'],
+                gapAnalysis=result.get('gapAnalysis'),
+                duplicates=result.get('duplicates'),
+                lexicalRank=result['lexicalRank'],
+                lexicalScore=result['lexicalScore'],
+                rerankScore=result.get('rerankScore'),
+            )
+            for rank, result in enumerate(ranked, start=1)
+        ],
+    )
+
+# Asynchronous Ranking Jobs (one JD vs the whole resume table)
+@app.post("/rankings", response_model=RankingJobResponse, status_code=202, summary="Start a Background Ranking Job")
+def start_ranking_job(ranking_request: RankingJobRequestInput, db: Session = Depends(get_db)):
+    """
+    Queues a Celery job that scores the JD against every matching resume in bounded batches.
+    Poll GET /rankings/{id} (or stream GET /rankings/{id}/events) for progress and the current top-k.
+    """
+    if not 1 <= ranking_request.topK <= 1000:
+        raise HTTPException(status_code=422, detail="topK must be between 1 and 1000.")
+    job_description, _ = resolve_job_description(db, ranking_request)
+
+    resume_filter = ranking_request.filter or RankingFilterInput()
+    filters = {
+        "uploaded_after": resume_filter.uploadedAfter.isoformat() if resume_filter.uploadedAfter else None,
+        "uploaded_before": resume_filter.uploadedBefore.isoformat() if resume_filter.uploadedBefore else None,
+        "file_name_contains": resume_filter.fileNameContains,
+        "skills": normalize_skills(resume_filter.skills or []),
+        "min_skill_match": resume_filter.minSkillMatch,
+        "limit": resume_filter.limit,
+    }
+
+    db_ranking = create_ranking_job(
+        db, str(uuid.uuid4()), job_description, filters, ranking_request.topK, job_id=ranking_request.jobId
+    )
+    run_ranking_job.delay(db_ranking.id)
+    return ranking_job_to_response(db_ranking)
+
+@app.get("/rankings/{id}", response_model=RankingJobResponse, summary="Ranking Job Progress and Results")
+def retrieve_ranking_job(id: str, db: Session = Depends(get_db)):
+    db_ranking = get_ranking_job(db, id)
+    if db_ranking is None:
+        raise HTTPException(status_code=404, detail="Ranking job not found")
+    return ranking_job_to_response(db_ranking)
+
+@app.get("/rankings/{id}/events", summary="Stream Ranking Job Progress (Server-Sent Events)")
+def stream_ranking_job(
+    id: str,
+    interval: float = Query(1.0, ge=0.2, le=30, description="Polling interval in seconds"),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events: a `progress` event whenever the job advances (with the current top-k),
+    then a final `completed` or `failed` event. The stream ends with a `timeout` event when the
+    job has not advanced for RANKING_EVENTS_STALL_SECONDS or after RANKING_EVENTS_MAX_SECONDS.
+    """
+    if get_ranking_job(db, id) is None:
+        raise HTTPException(status_code=404, detail="Ranking job not found")
+
+    def poll(stream_db: Session):
+        """One blocking read of the job (run in the threadpool, released between polls)."""
+        stream_db.expire_all()
+        db_ranking = get_ranking_job(stream_db, id)
+        try:
+            if db_ranking is None:
+                return None, None
+            return (db_ranking.status, db_ranking.processed), ranking_job_to_response(db_ranking).json()
+        finally:
+            # Ends the read transaction between polls
+            stream_db.rollback()
+
+    async def events():
+        # Async, so an open stream does not hold a threadpool worker while it waits.
+        # Own session: the request-scoped one may be closed before the stream ends
+        stream_db = next(get_db())
+        started = last_change = time.monotonic()
+        last_state = None
+        try:
+            while True:
+                state, payload = await run_in_threadpool(poll, stream_db)
+                if state is None:
+                    return
+                now = time.monotonic()
+                if state != last_state:
+                    last_state, last_change = state, now
+                    event = state[0] if state[0] in ("completed", "failed") else "progress"
+                    yield f"event: {event}\ndata: {payload}\n\n"
+                    if event != "progress":
+                        return
+                # A job that stopped advancing (worker gone) or runs too long ends the stream;
+                # the client can still poll GET /rankings/{id}
+                if now - last_change > RANKING_EVENTS_STALL_SECONDS or now - started > RANKING_EVENTS_MAX_SECONDS:
+                    yield f"event: timeout\ndata: {payload}\n\n"
+                    return
+                await asyncio.sleep(interval)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Job Description Registry
+@app.post("/jobs", response_model=JobResponse, status_code=201, summary="Register a Job Description")
+def create_job(job_description: JobDescriptionInput, db: Session = Depends(get_db)):
+    """
+    Stores a job description once, with its embedding and normalized requirements.
+    Registering the same content again returns the existing job.
+    """
+    job_dict = job_description.dict()
+    jd_hash = compute_jd_hash(job_dict)
+
+    existing = get_job_by_hash(db, jd_hash)
+    if existing is not None:
+        return job_to_response(existing)
+
+    embeddings = encode_texts([job_description.description]) if job_description.description else None
+
+    try:
+        db_job = create_job_record(
+            db,
+            job_id=str(uuid.uuid4()),
+            title=job_description.title,
+            description=job_description.description,
+            requirements=job_dict['requirements'],
+            normalized_requirements=normalize_requirements(job_dict['requirements']),
+            jd_hash=jd_hash,
+            embedding=embeddings[0].tolist() if embeddings is not None else None,
+            embedding_model=EMBEDDING_MODEL_VERSION if embeddings is not None else None,
+        )
+    except Exception as e:
+        print(f"DB Job Creation Error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create job record.")
+
+    return job_to_response(db_job)
+
+@app.get("/jobs/{id}", response_model=JobResponse, summary="Retrieve a Registered Job Description")
+def retrieve_job(id: str, db: Session = Depends(get_db)):
+    db_job = get_job(db, id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_response(db_job)
+
+# Standing Queries: rankings maintained incrementally as resumes are parsed
+@app.put("/jobs/{id}/standing", response_model=JobResponse, summary="Register a Job as a Standing Query")
+def register_standing_job(id: str, db: Session = Depends(get_db)):
+    """
+    Marks a job as a standing query. Every resume completed from now on is scored against it
+    by the worker; existing resumes are ranked once by a background task.
+    """
+    db_job = get_job(db, id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if current_job_embedding(db, db_job) is None:
+        raise HTTPException(status_code=409, detail="Job has no embedding for the current model version.")
+
+    if not db_job.standing:
+        db_job = set_job_standing(db, id, True)
+        seed_standing_ranking.delay(id)
+    return job_to_response(db_job)
+
+@app.delete("/jobs/{id}/standing", status_code=204, summary="Stop a Standing Query")
+def remove_standing_job(id: str, db: Session = Depends(get_db)):
+    """Stops scoring new resumes against the job and drops its materialized ranking."""
+    if set_job_standing(db, id, False) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@app.get("/jobs/{id}/ranking", response_model=StandingRankingResponse, summary="Materialized Ranking of a Standing Job")
+def standing_job_ranking(
+    id: str,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Reads the ranking maintained for a standing job: an indexed range scan, no scoring.
+    """
+    db_job = get_job(db, id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    rows = get_job_ranking(db, id, limit=limit, offset=offset)
+    return StandingRankingResponse(
+        jobId=id,
+        standing=bool(db_job.standing),
+        results=[
+            StandingRankingEntry(
+                resumeId=ranking.resume_id,
+                fileName=file_name,
+                rank=offset + position,
+                overallScore=ranking.overall_score,
+                categoryScores=ranking.category_scores or {},
+                scoredAt=ranking.scored_at,
+            )
+            for position, (ranking, file_name) in enumerate(rows, start=1)
+        ],
+    )
+
+# Approximate Nearest-Neighbor Candidate Search
+@app.get("/jobs/{id}/candidates", response_model=CandidateSearchResponse, summary="Top-k Candidates for a Job")
+def job_candidates(
+    id: str,
+    k: int = Query(10, ge=1, le=1000, description="Number of candidates to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    Returns the k resumes whose stored embeddings are closest to the job embedding,
+    using the pgvector HNSW index instead of scanning every resume.
+    """
+    db_job = get_job(db, id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    job_embedding = current_job_embedding(db, db_job)
+    if job_embedding is None:
+        raise HTTPException(status_code=409, detail="Job has no embedding for the current model version.")
+
+    start_time = time.perf_counter()
+    neighbors = get_nearest_resumes(db, job_embedding.tolist(), EMBEDDING_MODEL_VERSION, k)
+    search_time_ms = (time.perf_counter() - start_time) * 1000
 
-    return MatchResultResponse(
-        matchId=str(uuid.uuid4()),
-        **match_results
+    return CandidateSearchResponse(
+        jobId=id,
+        k=k,
+        searchTimeMs=round(search_time_ms, 2),
+        candidates=[
+            CandidateResponse(
+                resumeId=resume.id,
+                fileName=resume.file_name,
+                similarity=round(1 - distance, 4),
+                # Same 0-100 scaling as calculate_semantic_score
+                semanticScore=int((2 - distance) / 2 * 100),
+            )
+            for resume, distance in neighbors
+        ],
     )
@@ -1,28 +1,65 @@
 
-from sentence_transformers import SentenceTransformer, util
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+import hashlib
+import json
+import os
+import numpy as np
 import torch
 
+from .embedding_backends import load_embedding_model, backend_model_name, backend_model_version, EMBEDDING_DIM
+from .resource_governor import inference_slot
+from .skills import normalize_skills, extract_skill_ids
+from .skill_taxonomy import taxonomy_version
+from .skill_vectors import get_skill_vocabulary, summarize_skill_similarity, SKILL_MATCH_THRESHOLD, SKILL_PARTIAL_THRESHOLD
+
 # --- 1. Model Initialization ---
-# Using a good all-around model for text embedding/semantic search
-MODEL_NAME = 'all-MiniLM-L6-v2' 
+# 'minilm' (all-MiniLM-L6-v2, the default), 'static' (static embeddings, much faster on CPU)
+# or 'onnx' (MiniLM with int8 ONNX Runtime kernels). Compare them with src/benchmark_embeddings.py.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "minilm").lower()
+MODEL_NAME = backend_model_name(EMBEDDING_BACKEND)
+# Stored next to every persisted embedding; embeddings from another version are recomputed
+EMBEDDING_MODEL_VERSION = backend_model_version(EMBEDDING_BACKEND)
 try:
     # Check if a GPU is available, otherwise use CPU (safer for Docker)
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    model = SentenceTransformer(MODEL_NAME, device=device)
-    print(f"INFO: Matching model loaded successfully on {device}.")
+    model = load_embedding_model(EMBEDDING_BACKEND, device=device)
+    print(f"INFO: Matching model loaded successfully with the '{EMBEDDING_BACKEND}' backend on {model.device}.")
 except Exception as e:
     print(f"CRITICAL ERROR: Failed to load SentenceTransformer model. Matching will return default score. Error: {e}")
     model = None
 
+# --- Multi-vector resume embeddings ---
+# The model truncates at 256 word pieces, so resumes are encoded as section chunks of
+# at most CHUNK_MAX_WORDS words, and chunk similarities are pooled at match time.
+CHUNK_MAX_WORDS = int(os.getenv("CHUNK_MAX_WORDS", "150"))
+# 'max' (best matching chunk) or 'weighted' (section-weighted mean of chunk similarities)
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "max").lower()
+SECTION_WEIGHTS = {
+    "summary": 1.0,
+    "skills": 1.0,
+    "experience": 1.0,
+    "projects": 0.6,
+    "certifications": 0.5,
+    "education": 0.4,
+}
+
+# Default contribution of each 0-100 component to overallScore (requests may override them)
+DEFAULT_MATCH_WEIGHTS = {"skills": 0.40, "semantic": 0.60, "semanticSkills": 0.0}
+
+# Required skills extracted from JD descriptions without a `required` list, per JD hash and taxonomy
+EXTRACTED_REQUIREMENTS_CACHE_SIZE = 10000
+
 # --- 2. Helper Functions ---
 
 def get_text_from_data(resume_data: Any) -> str:
     """Extracts and concatenates relevant text fields for matching."""
     
     # Access the parsed JSON data correctly from the SQLAlchemy model attribute
-    data = resume_data.parsed_data or {}
-    
+    return get_text_from_parsed(resume_data.parsed_data or {})
+
+def get_text_from_parsed(data: Dict[str, Any]) -> str:
+    """Same as get_text_from_data, for a parsed_data dict that is not saved yet (worker side)."""
     text_parts = []
     
     # 1. Summary
@@ -31,15 +68,7 @@ def get_text_from_data(resume_data: Any) -> str:
         text_parts.append(summary)
 
     # 2. Skills
-    technical_skills = data.get('skills', {}).get('technical', [])
-    
-    # Handle the complex nested structure of skills
-    if isinstance(technical_skills, list):
-        for category in technical_skills:
-            if isinstance(category, dict) and 'items' in category:
-                text_parts.extend(category['items'])
-            elif isinstance(category, str):
-                text_parts.append(category)
+    text_parts.extend(_flatten_skill_items(data.get('skills', {}).get('technical', [])))
 
     # 3. Experience descriptions (simplified)
     for exp in data.get('experience', []):
@@ -48,37 +77,341 @@ def get_text_from_data(resume_data: Any) -> str:
         
     return " ".join([p for p in text_parts if p]).strip()
 
-def calculate_semantic_score(resume_text: str, job_description_text: str) -> float:
-    """Calculates semantic similarity using Sentence Transformers."""
-    # Ensure model is loaded and inputs exist before attempting calculation
-    if model is None or not resume_text or not job_description_text:
+def _flatten_skill_items(technical_skills: Any) -> List[str]:
+    """Handle the complex nested structure of skills (plain strings or {"items": [...]} groups)."""
+    items = []
+    if isinstance(technical_skills, list):
+        for category in technical_skills:
+            if isinstance(category, dict) and 'items' in category:
+                items.extend(category['items'])
+            elif isinstance(category, str):
+                items.append(category)
+    return items
+
+def chunk_text(text: str, max_words: int = CHUNK_MAX_WORDS) -> List[str]:
+    """Splits text into windows of at most max_words words, so no part is truncated by the model."""
+    words = text.split()
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words)]
+
+def get_chunks_from_parsed(data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Returns (section, text) chunks covering the whole parsed resume."""
+    chunks = []
+
+    def add(section: str, text: str):
+        chunks.extend((section, chunk) for chunk in chunk_text(text or ""))
+
+    add("summary", data.get('summary', {}).get('text', ''))
+    add("skills", ", ".join(_flatten_skill_items(data.get('skills', {}).get('technical', []))))
+    for exp in data.get('experience', []):
+        add("experience", " ".join(p for p in (exp.get('title'), exp.get('company'), exp.get('description')) if p))
+    add("projects", "; ".join(p for p in data.get('projects', []) if isinstance(p, str)))
+    add("certifications", "; ".join(c for c in data.get('certifications', []) if isinstance(c, str)))
+    for edu in data.get('education', []):
+        add("education", " ".join(p for p in (edu.get('degree'), edu.get('institution')) if p))
+    return chunks
+
+def encode_texts(texts: List[str]) -> Optional[np.ndarray]:
+    """Encodes texts in one batched call into L2-normalized float32 vectors (rows)."""
+    if model is None or not texts:
+        return None
+    with inference_slot():
+        return model.encode(texts, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+def encode_resumes(parsed_list: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Computes the matching embeddings of many parsed resumes with ONE batched encode call.
+    Each result has the chunk matrix, the chunk sections and a single document vector
+    (section-weighted mean of the chunks) used by the ANN indexes. None if a resume has no text.
+    """
+    all_chunks, owners = [], []
+    for i, parsed_data in enumerate(parsed_list):
+        for section, text in get_chunks_from_parsed(parsed_data or {}):
+            all_chunks.append((section, text))
+            owners.append(i)
+
+    results = [None] * len(parsed_list)
+    vectors = encode_texts([text for _, text in all_chunks])
+    if vectors is None:
+        return results
+
+    owners = np.array(owners)
+    for i in range(len(parsed_list)):
+        rows = np.flatnonzero(owners == i)
+        if rows.size == 0:
+            continue
+        sections = [all_chunks[r][0] for r in rows]
+        chunk_matrix = vectors[rows]
+        weights = np.array([SECTION_WEIGHTS.get(section, 1.0) for section in sections], dtype=np.float32)
+        document = (chunk_matrix * weights[:, None]).sum(axis=0)
+        document /= max(np.linalg.norm(document), 1e-12)
+        results[i] = {"embedding": document, "chunks": chunk_matrix, "sections": sections}
+    return results
+
+def encode_resume(parsed_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Computes the matching embeddings of one parsed resume (stored at parse time)."""
+    return encode_resumes([parsed_data])[0]
+
+def pack_chunk_embeddings(chunk_matrix: np.ndarray) -> bytes:
+    """Compact storage: float16 is plenty for cosine similarity and halves the size."""
+    return chunk_matrix.astype(np.float16).tobytes()
+
+def get_stored_embedding(record: Any) -> Optional[np.ndarray]:
+    """Returns the persisted embedding of a resume/job if it was produced by the current model version."""
+    embedding = getattr(record, 'embedding', None)
+    if embedding is None or getattr(record, 'embedding_model', None) != EMBEDDING_MODEL_VERSION:
+        return None
+    return np.asarray(embedding, dtype=np.float32)
+
+def get_stored_chunks(record: Any) -> Optional[Tuple[np.ndarray, List[str]]]:
+    """Returns (chunk matrix, sections) of a resume if stored by the current model version."""
+    blob = getattr(record, 'chunk_embeddings', None)
+    sections = getattr(record, 'chunk_sections', None)
+    if not blob or not sections or getattr(record, 'embedding_model', None) != EMBEDDING_MODEL_VERSION:
+        return None
+    return np.frombuffer(blob, dtype=np.float16).reshape(len(sections), -1).astype(np.float32), sections
+
+def pool_chunk_scores(cosine_matrix: np.ndarray, sections: List[str], pooling: Optional[str] = None) -> np.ndarray:
+    """Pools an (m, n_chunks) matrix of chunk similarities into m scores (CHUNK_POOLING by default)."""
+    if (pooling or CHUNK_POOLING) == "weighted":
+        weights = np.array([SECTION_WEIGHTS.get(section, 1.0) for section in sections], dtype=np.float32)
+        return cosine_matrix @ weights / weights.sum()
+    return cosine_matrix.max(axis=1)
+
+def normalize_requirements(requirements: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Lowercased, stripped and deduplicated requirement lists (order preserved)."""
+    requirements = requirements or {}
+    return {
+        key: list(dict.fromkeys(s.strip().lower() for s in (requirements.get(key) or []) if s and s.strip()))
+        for key in ('required', 'preferred')
+    }
+
+def compute_jd_hash(job_description: Dict[str, Any]) -> str:
+    """Content hash of a job description (title, whitespace-normalized text and normalized requirements)."""
+    payload = {
+        "title": " ".join((job_description.get('title') or '').split()).lower(),
+        "description": " ".join((job_description.get('description') or '').split()),
+        "requirements": normalize_requirements(job_description.get('requirements')),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+def calculate_semantic_score(
+    resume_text: str,
+    job_description_text: str,
+    resume_embedding: Optional[np.ndarray] = None,
+    job_embedding: Optional[np.ndarray] = None
+) -> Optional[float]:
+    """
+    Calculates semantic similarity with the configured embedding backend.
+    Precomputed (normalized) embeddings are used when given, so at most one text is encoded.
+    Returns 0.0 when there is no text to compare, and None when the score could not be
+    computed (model unavailable or encode error), so callers never persist a degraded score.
+    """
+    # Inputs must exist before attempting calculation
+    if (job_embedding is None and not job_description_text) or (resume_embedding is None and not resume_text):
         return 0.0
+    if model is None:
+        return None
 
     try:
-        # Encode the texts into embeddings
-        embeddings = model.encode([resume_text, job_description_text], convert_to_tensor=True, device=model.device)
-        
-        # Calculate cosine similarity
-        cosine_scores = util.cos_sim(embeddings[0], embeddings[1])
+        if resume_embedding is None and job_embedding is None:
+            # Encode both texts in one call
+            resume_embedding, job_embedding = encode_texts([resume_text, job_description_text])
+        elif resume_embedding is None:
+            resume_embedding = encode_texts([resume_text])[0]
+        elif job_embedding is None:
+            job_embedding = encode_texts([job_description_text])[0]
+        # Calculate cosine similarity (embeddings are normalized)
+        cosine_score = float(np.dot(resume_embedding, job_embedding))
         
         # Scale score from -1 to 1 to 0 to 100 for easier interpretation
-        score = (cosine_scores.item() + 1) / 2 * 100
+        score = (cosine_score + 1) / 2 * 100
         return score
         
     except Exception as e:
         # Catch any internal Torch/Transformer errors gracefully
         print(f"Error during semantic embedding: {e}")
-        return 0.0
+        return None
+
+def resume_semantic_score(
+    resume_data: Any,
+    job_description_text: str,
+    job_embedding: Optional[np.ndarray] = None
+) -> Optional[float]:
+    """
+    Semantic score (0-100) of a stored resume, using the best representation available:
+    pooled chunk vectors, then the single stored embedding, then encoding the text.
+    None when it could not be computed (see calculate_semantic_score).
+    """
+    chunks = get_stored_chunks(resume_data)
+    if chunks is None or model is None or (job_embedding is None and not job_description_text):
+        resume_embedding = get_stored_embedding(resume_data)
+        resume_text = get_text_from_data(resume_data) if resume_embedding is None else ""
+        return calculate_semantic_score(resume_text, job_description_text, resume_embedding, job_embedding)
+
+    try:
+        if job_embedding is None:
+            job_embedding = encode_texts([job_description_text])[0]
+        chunk_matrix, sections = chunks
+        cosine_score = float(pool_chunk_scores((chunk_matrix @ job_embedding)[None, :], sections)[0])
+        return (cosine_score + 1) / 2 * 100
+    except Exception as e:
+        print(f"Error during chunked semantic scoring: {e}")
+        return None
 
 # --- 3. Main Matching Function ---
 
-def calculate_match_score(resume_data: Any, job_description_input: Dict[str, Any]) -> Dict[str, Any]:
+def extract_resume_skills(parsed_data: Dict[str, Any]) -> List[str]:
     """
-    Combines skill matching and semantic similarity into a single score.
+    Flattens the (possibly nested) technical skills of a parsed resume into canonical
+    taxonomy ids (unknown skills stay lowercase strings), so 'JS' matches 'JavaScript'.
+    """
+    return normalize_skills(_flatten_skill_items((parsed_data or {}).get('skills', {}).get('technical', [])))
+
+def required_skills_of(requirements: Optional[Dict[str, Any]]) -> List[str]:
+    """Canonical required skills of a job description (same keys as extract_resume_skills)."""
+    return normalize_skills((requirements or {}).get('required', []) or [])
+
+def job_required_skills(job_description: Dict[str, Any], jd_hash: Optional[str] = None) -> Tuple[List[str], bool]:
     """
+    Required skills of a job description and whether they were extracted from its text.
+    An empty `required` list falls back to the taxonomy skills mentioned in the title and
+    description (the same matcher pass used on resumes), cached per JD hash and taxonomy version.
+    """
+    required_skills = required_skills_of(job_description.get('requirements'))
+    if required_skills:
+        return required_skills, False
+
+    text = f"{job_description.get('title') or ''}\n{job_description.get('description') or ''}"
+    version = taxonomy_version()
+    if version == "none":
+        # No matcher: nothing to extract, and nothing worth caching until it loads
+        return extract_skill_ids(text), True
+    return list(_extracted_requirements(jd_hash or compute_jd_hash(job_description), version, text)), True
+
+@lru_cache(maxsize=EXTRACTED_REQUIREMENTS_CACHE_SIZE)
+def _extracted_requirements(jd_hash: str, version: str, text: str) -> Tuple[str, ...]:
+    # `text` is determined by jd_hash; it is only passed through to the matcher
+    return tuple(extract_skill_ids(text))
+
+def skill_similarity_matrix(required_skills: List[str], candidate_skills: List[str]) -> Optional[np.ndarray]:
+    """
+    (n_required, n_candidates) cosine matrix between skill embeddings, from the precomputed
+    taxonomy vectors (one matrix product, no per-skill model call). Identical ids score 1.0.
+    None when the skill vocabulary is unavailable.
+    """
+    if not required_skills:
+        return None
+    vocabulary = get_skill_vocabulary(encode_texts, EMBEDDING_MODEL_VERSION)
+    if vocabulary is None:
+        return None
+    if not candidate_skills:
+        return np.zeros((len(required_skills), 0), dtype=np.float32)
+    similarity = vocabulary.vectors(required_skills) @ vocabulary.vectors(candidate_skills).T
+    similarity[np.equal.outer(np.array(required_skills, dtype=object), np.array(candidate_skills, dtype=object))] = 1.0
+    return similarity
+
+def resolve_match_weights(weights: Optional[Dict[str, float]] = None, semantic_skills: bool = True) -> Dict[str, float]:
+    """
+    Request weights over DEFAULT_MATCH_WEIGHTS, normalized to sum to 1.
+    Without a semantic skill score its weight is dropped (redistributed to the others).
+    """
+    merged = dict(DEFAULT_MATCH_WEIGHTS)
+    merged.update({key: float(value) for key, value in (weights or {}).items() if key in merged and value is not None})
+    if not semantic_skills:
+        merged['semanticSkills'] = 0.0
+    if any(value < 0 for value in merged.values()) or sum(merged.values()) <= 0:
+        raise ValueError("Match weights must be non-negative and not all zero.")
+    total = sum(merged.values())
+    return {key: value / total for key, value in merged.items()}
+
+def _weighted_points(
+    skill_score: float,
+    semantic_score: float,
+    skill_similarity: Optional[Dict[str, Any]],
+    weights: Optional[Dict[str, float]]
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Resolved weights and the points each component contributes to overallScore."""
+    weights = resolve_match_weights(weights, semantic_skills=skill_similarity is not None)
+    return weights, {
+        "skills": skill_score * weights['skills'],
+        "semantic": semantic_score * weights['semantic'],
+        "semanticSkills": skill_similarity["score"] * weights['semanticSkills'] if skill_similarity is not None else 0.0,
+    }
+
+def build_match_result(
+    skill_score: float,
+    semantic_score: float,
+    skill_similarity: Optional[Dict[str, Any]] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Weights the raw 0-100 component scores into the score payload (no explanation).
+    Shared by single and batch scoring so both return identical category scores.
+    `skill_similarity` (from summarize_skill_similarity) adds the semanticSkillMatch category.
+    """
+    _, points = _weighted_points(skill_score, semantic_score, skill_similarity, weights)
     
-    # Fallback structure to ensure the endpoint always returns a valid response
-    fallback_response = {
+    # Combined Score
+    final_score = int(sum(points.values()))
+    
+    recommendation = "Strong Match" if final_score >= 80 else ("Good Match" if final_score >= 60 else "Needs Development")
+
+    result = {
+        "overallScore": final_score,
+        "recommendation": recommendation,
+        "categoryScores": {
+            "skillsMatch": {"score": int(skill_score)}, # Original 0-100 score
+            "semanticMatch": {"score": int(semantic_score)}, # Original 0-100 score
+        },
+    }
+    if skill_similarity is not None:
+        result["categoryScores"]["semanticSkillMatch"] = {"score": skill_similarity["score"]}
+    return result
+
+def build_match_explanation(components: Dict[str, Any], weights: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Explanation and gap analysis of a match, built from its components only when a caller
+    asks for them (options.includeExplanation, GET /matches/{id}/explanation).
+    With per-skill similarities, their thresholds decide the missing and partially matched skills.
+    """
+    skill_similarity = components.get("skillSimilarity")
+    weights, points = _weighted_points(components["skillScore"], components["semanticScore"], skill_similarity, weights)
+    final_score = int(sum(points.values()))
+
+    key_factors = [
+        f"Semantic similarity contributes {round(points['semantic'])} points.",
+        f"Rule-based skill match achieved {round(points['skills'])} points.",
+        f"Matched {components['matchedCount']} out of {components['totalRequired']} core skills."
+    ]
+    if points['semanticSkills']:
+        key_factors.append(f"Per-skill semantic match contributes {round(points['semanticSkills'])} points.")
+    if components.get("requirementsExtracted"):
+        key_factors.append("No required skills were listed; they were extracted from the job description.")
+
+    return {
+        "explanation": {
+            "summary": f"Combined similarity analysis resulted in a score of {final_score}. "
+                       f"Semantic match was weighted {round(weights['semantic'] * 100)}%.",
+            "keyFactors": key_factors
+        },
+        "gapAnalysis": build_gap_analysis(components),
+    }
+
+def build_gap_analysis(components: Dict[str, Any]) -> Dict[str, Any]:
+    """Missing (and partially matched) skills of a match: the only explanation part ranked lists return."""
+    skill_similarity = components.get("skillSimilarity")
+    gap_analysis = {
+        "missingSkills": components["missingSkills"],
+        "improvementAreas": ["Enhance quantifiable achievements.", "Include more industry-specific jargon."],
+    }
+    if skill_similarity is not None:
+        gap_analysis["missingSkills"] = skill_similarity["missingSkills"]
+        gap_analysis["partialSkills"] = skill_similarity["partialSkills"]
+    return gap_analysis
+
+def fallback_match_result() -> Dict[str, Any]:
+    """Fallback structure to ensure the endpoint always returns a valid response."""
+    return {
         "overallScore": 50,
         "recommendation": "Needs Review (AI Matching Failed)",
         "explanation": {"summary": "An internal error prevented the semantic matching from running. Manual review required.", "keyFactors": []},
@@ -86,63 +419,253 @@ def calculate_match_score(resume_data: Any, job_description_input: Dict[str, Any
         "gapAnalysis": {},
     }
 
+def match_model_version() -> str:
+    """
+    Everything besides the resume and the JD that the match components depend on:
+    embedding model, chunk pooling, skill taxonomy and per-skill thresholds.
+    Stored components with another version are recomputed.
+    """
+    return (f"{EMBEDDING_MODEL_VERSION}|pool:{CHUNK_POOLING}|taxonomy:{taxonomy_version()}"
+            f"|skills:{SKILL_PARTIAL_THRESHOLD}-{SKILL_MATCH_THRESHOLD}")
+
+def compute_match_components(
+    resume_data: Any,
+    job_description: Dict[str, Any],
+    job_embedding: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    The expensive, weight-independent part of a match: raw 0-100 skill and semantic scores
+    plus what the gap analysis needs. JSON serializable, so it can be persisted and re-combined.
+    `job_embedding` is the stored embedding of a registered job (see /jobs), if any.
+    `semanticDegraded` is set when the semantic score could not be computed (scored as 0);
+    such components must not be persisted.
+    """
+    job_description_text = job_description.get('description', '')
+    
+    # Simple Skill Match (Rule-based score); without a required list, skills named in the JD text
+    required_skills, requirements_extracted = job_required_skills(job_description)
+    
+    # Access the parsed data for skills correctly
+    extracted_skills = extract_resume_skills(resume_data.parsed_data)
+
+    matched_count = len(set(required_skills) & set(extracted_skills))
+    total_required = len(required_skills) if required_skills else 1
+    
+    # Semantic Score (LLM/Transformer-based score)
+    # Uses the embeddings stored at parse time; falls back to the text for older rows
+    semantic_score = resume_semantic_score(resume_data, job_description_text, job_embedding)
+
+    # Per-skill semantic match: one required x candidate similarity matrix
+    similarity = skill_similarity_matrix(required_skills, extracted_skills)
+
+    return {
+        "skillScore": (matched_count / total_required) * 100,
+        "semanticScore": float(semantic_score or 0.0),
+        "semanticDegraded": semantic_score is None,
+        "matchedCount": matched_count,
+        "totalRequired": total_required,
+        "missingSkills": list(set(required_skills) - set(extracted_skills)),
+        "skillSimilarity": summarize_skill_similarity(required_skills, extracted_skills, similarity) if similarity is not None else None,
+        "requirementsExtracted": requirements_extracted,
+    }
+
+def combine_match_components(
+    components: Dict[str, Any],
+    weights: Optional[Dict[str, float]] = None,
+    include_explanation: bool = True
+) -> Dict[str, Any]:
+    """Cheap part of a match: applies the weights to stored or fresh components (no model call)."""
+    result = build_match_result(components["skillScore"], components["semanticScore"], components.get("skillSimilarity"), weights)
+    if include_explanation:
+        result.update(build_match_explanation(components, weights))
+    return result
+
+def calculate_match_score(
+    resume_data: Any,
+    job_description_input: Dict[str, Any],
+    job_embedding: Optional[np.ndarray] = None,
+    weights: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Combines skill matching and semantic similarity into a single score.
+    `job_embedding` is the stored embedding of a registered job (see /jobs), if any.
+    """
     # CRITICAL FIX: The logic must be inside try/except block to prevent 500 error
     try:
-        # Extract Text for semantic matching
-        resume_text = get_text_from_data(resume_data)
-        job_description_text = job_description_input['jobDescription'].get('description', '')
-        
-        # Simple Skill Match (Rule-based score)
-        required_skills = [s.lower() for s in job_description_input['jobDescription'].get('requirements', {}).get('required', [])]
-        
-        # Access the parsed data for skills correctly
-        parsed_skills_data = resume_data.parsed_data.get('skills', {})
-        extracted_skills_list = parsed_skills_data.get('technical', [])
-        
-        # Flatten skills into a single list of strings
-        extracted_skills = []
-        if isinstance(extracted_skills_list, list):
-            for item in extracted_skills_list:
-                if isinstance(item, dict) and 'items' in item:
-                    extracted_skills.extend([s.lower() for s in item['items']])
-                elif isinstance(item, str):
-                    extracted_skills.append(item.lower())
-
-        matched_count = len(set(required_skills) & set(extracted_skills))
-        total_required = len(required_skills) if required_skills else 1
-        
-        skill_score = (matched_count / total_required) * 100 * 0.40 # 40% weight
-        
-        # Semantic Score (LLM/Transformer-based score)
-        semantic_score = calculate_semantic_score(resume_text, job_description_text) * 0.60 # 60% weight
-        
-        # Combined Score
-        final_score = int(skill_score + semantic_score)
-        
-        recommendation = "Strong Match" if final_score >= 80 else ("Good Match" if final_score >= 60 else "Needs Development")
-
-        return {
-            "overallScore": final_score,
-            "recommendation": recommendation,
-            "explanation": {
-                "summary": f"Combined similarity analysis resulted in a score of {final_score}. Semantic match was highly weighted.",
-                "keyFactors": [
-                    f"Semantic similarity contributes {round(semantic_score)} points.",
-                    f"Rule-based skill match achieved {round(skill_score)} points.",
-                    f"Matched {matched_count} out of {total_required} core skills."
-                ]
-            },
-            "categoryScores": {
-                "skillsMatch": {"score": int(skill_score / 0.4)}, # Return original 0-100 score
-                "semanticMatch": {"score": int(semantic_score / 0.6)}, # Return original 0-100 score
-            },
-            "gapAnalysis": {
-                "missingSkills": list(set(required_skills) - set(extracted_skills)),
-                "improvementAreas": ["Enhance quantifiable achievements.", "Include more industry-specific jargon."],
-            }
-        }
+        components = compute_match_components(resume_data, job_description_input['jobDescription'], job_embedding)
+        return combine_match_components(components, weights)
         
     except Exception as e:
         # If anything in the complex logic fails, catch it and return the safe fallback
         print(f"CRITICAL ERROR in calculate_match_score: {e}")
-        return fallback_response
\ No newline at end of file
+        return fallback_match_result()
+
+# --- 4. Batch Scoring (one JD vs many resumes) ---
+
+def get_embedding_matrix(resumes: List[Any], dim: Optional[int] = None) -> np.ndarray:
+    """
+    Stacks the stored embeddings of many resumes into an (n, dim) matrix.
+    Rows without a current-version embedding are encoded together in one batched call.
+    Resumes without text, or whose encoding failed, get a NaN row (semantic score 0,
+    as in resume_semantic_score).
+    """
+    rows = [get_stored_embedding(r) for r in resumes]
+    texts = {i: get_text_from_data(resumes[i]) for i, row in enumerate(rows) if row is None}
+    missing = [i for i, text in texts.items() if text]
+    if missing:
+        encoded = encode_texts([texts[i] for i in missing])
+        for i, row in zip(missing, encoded if encoded is not None else []):
+            rows[i] = row
+    # `dim` (the job embedding's) keeps the shape right when no row has a vector at all
+    dim = dim or next((row.shape[0] for row in rows if row is not None), EMBEDDING_DIM)
+    return np.vstack([row if row is not None else np.full(dim, np.nan, dtype=np.float32) for row in rows])
+
+def batch_cosine_scores(resumes: List[Any], job_embedding: np.ndarray) -> np.ndarray:
+    """
+    Cosine score of every resume vs one JD. Resumes with stored chunks are scored by pooling
+    all their chunks: every chunk of every resume goes through ONE matrix product, then
+    np.maximum.reduceat / np.add.reduceat pool them per resume. NaN where no vector is available.
+    """
+    scores = get_embedding_matrix(resumes, job_embedding.shape[0]) @ job_embedding
+
+    chunked = [(i, get_stored_chunks(r)) for i, r in enumerate(resumes)]
+    chunked = [(i, c) for i, c in chunked if c is not None]
+    if not chunked:
+        return scores
+
+    lengths = np.array([len(sections) for _, (_, sections) in chunked])
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    chunk_cosines = np.vstack([matrix for _, (matrix, _) in chunked]) @ job_embedding
+
+    if CHUNK_POOLING == "weighted":
+        weights = np.array([SECTION_WEIGHTS.get(s, 1.0) for _, (_, sections) in chunked for s in sections], dtype=np.float32)
+        pooled = np.add.reduceat(chunk_cosines * weights, offsets) / np.add.reduceat(weights, offsets)
+    else:
+        pooled = np.maximum.reduceat(chunk_cosines, offsets)
+
+    scores[[i for i, _ in chunked]] = pooled
+    return scores
+
+def skill_match_matrix(required_skills: List[str], resume_skills: List[List[str]]) -> np.ndarray:
+    """Boolean (n_resumes, n_required) matrix: True where a resume has a required skill."""
+    index = {skill: j for j, skill in enumerate(required_skills)}
+    matrix = np.zeros((len(resume_skills), len(required_skills)), dtype=bool)
+    for i, skills in enumerate(resume_skills):
+        columns = [index[s] for s in set(skills) if s in index]
+        matrix[i, columns] = True
+    return matrix
+
+def score_resumes_batch(
+    resumes: List[Any],
+    job_description: Dict[str, Any],
+    job_embedding: Optional[np.ndarray] = None,
+    include_gap_analysis: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Scores one job description against many resumes with a single matrix cosine
+    operation and a bulk skill-overlap matrix. Returns results sorted by overallScore,
+    each with the same category scores as calculate_match_score (and its gap analysis
+    only when `include_gap_analysis` is set).
+    """
+    if not resumes:
+        return []
+
+    required_skills, _ = job_required_skills(job_description)
+    total_required = len(required_skills) if required_skills else 1
+
+    # Semantic component: (n, dim) @ (dim,) -> n cosine scores (embeddings are normalized)
+    if job_embedding is None and job_description.get('description'):
+        encoded = encode_texts([job_description['description']])
+        job_embedding = encoded[0] if encoded is not None else None
+    if job_embedding is not None and model is not None:
+        cosine_scores = batch_cosine_scores(resumes, job_embedding)
+        # No text / failed encode: 0, like the single-match path (not the 50 of a zero vector)
+        semantic_scores = np.where(np.isnan(cosine_scores), 0.0, (cosine_scores + 1) / 2 * 100)
+    else:
+        semantic_scores = np.zeros(len(resumes), dtype=np.float32)
+
+    # Skill component: matched counts for every resume at once
+    resume_skills = [extract_resume_skills(r.parsed_data) for r in resumes]
+    matches = skill_match_matrix(required_skills, resume_skills)
+    matched_counts = matches.sum(axis=1)
+    skill_scores = matched_counts / total_required * 100
+    required_array = np.array(required_skills, dtype=object)
+
+    # Per-skill semantic match: ONE required x (all distinct resume skills) similarity matrix,
+    # sliced per resume
+    skill_vocabulary = list(dict.fromkeys(skill for skills in resume_skills for skill in skills))
+    similarity = skill_similarity_matrix(required_skills, skill_vocabulary)
+    column = {skill: j for j, skill in enumerate(skill_vocabulary)}
+
+    results = []
+    for i, resume in enumerate(resumes):
+        skill_similarity = None
+        if similarity is not None:
+            columns = [column[skill] for skill in resume_skills[i]]
+            skill_similarity = summarize_skill_similarity(required_skills, resume_skills[i], similarity[:, columns])
+        result = build_match_result(float(skill_scores[i]), float(semantic_scores[i]), skill_similarity)
+        if include_gap_analysis:
+            result['gapAnalysis'] = build_gap_analysis({
+                "missingSkills": list(required_array[~matches[i]]) if required_skills else [],
+                "skillSimilarity": skill_similarity,
+            })
+        result['resumeId'] = resume.id
+        results.append(result)
+
+    results.sort(key=lambda r: r['overallScore'], reverse=True)
+    return results
+
+# --- 5. Reverse Matching (one resume vs a shortlist of jobs) ---
+
+def score_jobs_for_resume(
+    resume_data: Any,
+    jobs: List[Any],
+    cosine_scores: List[float],
+    include_gap_analysis: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Re-scores an ANN shortlist (or the standing jobs) for one resume with the same skill-overlap
+    and weighting as calculate_match_score. Cosine scores come from the index (or from
+    the pooled resume chunks vs the stored job embeddings), so no model call is needed.
+    Returns results sorted by overallScore.
+    """
+    resume_skills = extract_resume_skills(resume_data.parsed_data)
+    extracted_skills = set(resume_skills)
+
+    # Refine the document-level index scores with pooled chunk similarities in one (m, n) product
+    chunks = get_stored_chunks(resume_data)
+    job_embeddings = [get_stored_embedding(job) for job in jobs]
+    if chunks is not None and jobs and all(e is not None for e in job_embeddings):
+        chunk_matrix, sections = chunks
+        cosine_scores = pool_chunk_scores(np.vstack(job_embeddings) @ chunk_matrix.T, sections).tolist()
+
+    # Per-skill semantic match: ONE (all distinct required skills) x resume skills matrix, sliced per job
+    job_required = [
+        job_required_skills({"title": job.title, "description": job.description, "requirements": job.requirements}, job.jd_hash)
+        for job in jobs
+    ]
+    required_vocabulary = list(dict.fromkeys(skill for skills, _ in job_required for skill in skills))
+    similarity = skill_similarity_matrix(required_vocabulary, resume_skills)
+    row = {skill: j for j, skill in enumerate(required_vocabulary)}
+
+    results = []
+    for job, (required_skills, _), cosine_score in zip(jobs, job_required, cosine_scores):
+        matched_count = len(set(required_skills) & extracted_skills)
+        total_required = len(required_skills) if required_skills else 1
+
+        skill_similarity = None
+        if similarity is not None:
+            rows = [row[skill] for skill in required_skills]
+            skill_similarity = summarize_skill_similarity(required_skills, resume_skills, similarity[rows])
+        result = build_match_result(matched_count / total_required * 100, (cosine_score + 1) / 2 * 100, skill_similarity)
+        if include_gap_analysis:
+            result['gapAnalysis'] = build_gap_analysis({
+                "missingSkills": list(set(required_skills) - extracted_skills),
+                "skillSimilarity": skill_similarity,
+            })
+        result['jobId'] = job.id
+        result['title'] = job.title
+        results.append(result)
+
+    results.sort(key=lambda r: r['overallScore'], reverse=True)
+    return results
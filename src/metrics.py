@@ -0,0 +1,72 @@
+# src/metrics.py
+
+import json
+import os
+from typing import Dict, Any
+
+import redis
+
+# Counters live in Redis so the API can report what the Celery workers did.
+# Use the same REDIS_URL as Celery (docker-compose.yml).
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+METRICS_PREFIX = "metrics:"
+
+try:
+    redis_client = redis.Redis.from_url(REDIS_URL, socket_timeout=1)
+except Exception as e:
+    print(f"Warning: Could not create Redis client for metrics. Error: {e}")
+    redis_client = None
+
+def increment(group: str, name: str, amount: int = 1) -> None:
+    """Increments one counter in a metrics group. Metrics must never break the caller."""
+    if redis_client is None:
+        return
+    try:
+        redis_client.hincrby(METRICS_PREFIX + group, name, amount)
+    except Exception as e:
+        print(f"Warning: Failed to record metric {group}.{name}: {e}")
+
+def get_counters(group: str) -> Dict[str, int]:
+    """Returns all counters of a group as {name: count}."""
+    if redis_client is None:
+        return {}
+    try:
+        raw = redis_client.hgetall(METRICS_PREFIX + group)
+    except Exception as e:
+        print(f"Warning: Failed to read metrics group {group}: {e}")
+        return {}
+    return {key.decode(): int(value) for key, value in raw.items()}
+
+def get_shares(group: str) -> Dict[str, float]:
+    """Returns each counter of a group as a share (0-1) of the group total."""
+    counters = get_counters(group)
+    total = sum(counters.values())
+    return {name: round(count / total, 4) for name, count in counters.items()} if total else {}
+
+def publish(group: str, name: str, value: Dict[str, Any]) -> None:
+    """Stores a JSON snapshot under a name (e.g. one per worker process), for the API to report."""
+    if redis_client is None:
+        return
+    try:
+        redis_client.hset(METRICS_PREFIX + group, name, json.dumps(value, default=str))
+    except Exception as e:
+        print(f"Warning: Failed to publish {group}.{name}: {e}")
+
+def unpublish(group: str, name: str) -> None:
+    if redis_client is None:
+        return
+    try:
+        redis_client.hdel(METRICS_PREFIX + group, name)
+    except Exception as e:
+        print(f"Warning: Failed to remove {group}.{name}: {e}")
+
+def get_published(group: str) -> Dict[str, Dict[str, Any]]:
+    """Returns every snapshot of a group as {name: value}."""
+    if redis_client is None:
+        return {}
+    try:
+        raw = redis_client.hgetall(METRICS_PREFIX + group)
+    except Exception as e:
+        print(f"Warning: Failed to read metrics group {group}: {e}")
+        return {}
+    return {key.decode(): json.loads(value) for key, value in raw.items()}
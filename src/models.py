@@ -1,8 +1,10 @@
 # src/models.py
 
-from sqlalchemy import create_engine, Column, String, DateTime, JSON
+from sqlalchemy import create_engine, Column, String, DateTime, JSON, Text, LargeBinary, Boolean, Integer, SmallInteger, BigInteger, Float, Index, ForeignKey, Computed, UniqueConstraint, inspect, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from pgvector.sqlalchemy import Vector
 import datetime
 import os
 
@@ -14,6 +16,12 @@ engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Output size of the matching embeddings (every backend in embedding_backends.py produces 384 dimensions)
+EMBEDDING_DIM = 384
+
+# HNSW build parameters for the approximate nearest-neighbor indexes (pgvector defaults)
+HNSW_INDEX_OPTIONS = {'m': 16, 'ef_construction': 64}
+
 # --- 2. Resume Model Definition ---
 class Resume(Base):
     """
@@ -30,5 +38,199 @@ class Resume(Base):
     # The crucial column for storing AI-extracted structured data
     parsed_data = Column(JSON, nullable=True) 
 
+    # Matching embedding computed once at parse time (pgvector), plus the model that produced it
+    embedding = Column(Vector(EMBEDDING_DIM), nullable=True)
+    embedding_model = Column(String, nullable=True)
+    # Section/chunk vectors (float16 matrix, one row per chunk) and the section of each row
+    chunk_embeddings = Column(LargeBinary, nullable=True)
+    chunk_sections = Column(JSON, nullable=True)
+
+    # Extracted document text and its full-text vector (generated by Postgres, GIN indexed)
+    raw_text = Column(Text, nullable=True)
+    search_vector = Column(TSVECTOR, Computed("to_tsvector('english', coalesce(raw_text, ''))", persisted=True))
+
+    # MinHash signature of the extracted text (uint32 array, see near_duplicates.py)
+    minhash = Column(LargeBinary, nullable=True)
+
     # We can add a simple index for easy lookups
-    __table_args__ = ({'schema': 'public'},)
\ No newline at end of file
+    __table_args__ = (
+        # Lexical recall index for hybrid retrieval / full-text search
+        Index('ix_resumes_search_vector', search_vector, postgresql_using='gin'),
+        # ANN index for "which resumes best fit this job": kept up to date by Postgres on insert/update/delete
+        Index(
+            'ix_resumes_embedding_hnsw', embedding,
+            postgresql_using='hnsw',
+            postgresql_with=HNSW_INDEX_OPTIONS,
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        ),
+        {'schema': 'public'},
+    )
+
+# --- 3. Inverted Skill Index ---
+class ResumeSkill(Base):
+    """
+    One row per (resume, canonical skill id), extracted from parsed_data at parse time.
+    Lets "at least k of these skills" run as an indexed GROUP BY instead of scanning JSON.
+    """
+    __tablename__ = "resume_skills"
+
+    resume_id = Column(String, ForeignKey('public.resumes.id', ondelete='CASCADE'), primary_key=True)
+    skill = Column(String, primary_key=True)
+
+    __table_args__ = (
+        # skill-first index: WHERE skill IN (...) GROUP BY resume_id
+        Index('ix_resume_skills_skill_resume', 'skill', 'resume_id'),
+        {'schema': 'public'},
+    )
+
+# --- 4. Near-Duplicate LSH Index ---
+class ResumeLSHBand(Base):
+    """
+    One row per (band, bucket key) of a resume's MinHash signature. Resumes sharing any
+    (band, bucket) are near-duplicate candidates: an indexed equality lookup per band
+    instead of a comparison against every stored signature.
+    """
+    __tablename__ = "resume_lsh_bands"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    resume_id = Column(String, ForeignKey('public.resumes.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        # Replacing the bands of one resume on re-parse
+        Index('ix_resume_lsh_bands_resume', 'resume_id'),
+        {'schema': 'public'},
+    )
+
+# --- 5. Job Description Model Definition ---
+class Job(Base):
+    """
+    A job description registered once and reused across match calls.
+    The embedding and normalized requirements are computed at creation time.
+    """
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    requirements = Column(JSON, nullable=True)            # As submitted: {"required": [...], "preferred": [...]}
+    normalized_requirements = Column(JSON, nullable=True) # Lowercased, deduplicated requirement sets
+    jd_hash = Column(String, index=True)                  # Content hash, used to deduplicate registrations
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    embedding = Column(Vector(EMBEDDING_DIM), nullable=True)
+    embedding_model = Column(String, nullable=True)
+
+    # Standing query: every newly parsed resume is scored against it (see job_rankings)
+    standing = Column(Boolean, default=False, index=True)
+
+    __table_args__ = (
+        # Job-side ANN index for "which roles fit this candidate"
+        Index(
+            'ix_jobs_embedding_hnsw', embedding,
+            postgresql_using='hnsw',
+            postgresql_with=HNSW_INDEX_OPTIONS,
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+        ),
+        {'schema': 'public'},
+    )
+
+# --- 6. Persisted Match Results ---
+class MatchResult(Base):
+    """
+    Weight-independent components of one resume/JD match (skill, semantic and per-skill scores).
+    Keyed by (resume, JD content hash, model version): reopening a candidate reads the stored
+    components, and a request with different weights only re-combines them.
+    """
+    __tablename__ = "match_results"
+
+    id = Column(String, primary_key=True)   # The matchId returned to clients
+    resume_id = Column(String, ForeignKey('public.resumes.id', ondelete='CASCADE'), nullable=False)
+    jd_hash = Column(String, nullable=False)
+    model_version = Column(String, nullable=False)
+    components = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('resume_id', 'jd_hash', 'model_version', name='uq_match_results_key'),
+        {'schema': 'public'},
+    )
+
+# --- 7. Materialized Rankings for Standing Queries ---
+class JobRanking(Base):
+    """
+    Score of one resume against one standing job, written when the resume is parsed
+    (and once for the existing resumes when the job becomes standing).
+    Reading a ranking is a range scan of ix_job_rankings_job_score instead of a re-score.
+    """
+    __tablename__ = "job_rankings"
+
+    job_id = Column(String, ForeignKey('public.jobs.id', ondelete='CASCADE'), primary_key=True)
+    resume_id = Column(String, ForeignKey('public.resumes.id', ondelete='CASCADE'), primary_key=True)
+    overall_score = Column(Integer, nullable=False)
+    skill_score = Column(Float, nullable=True)
+    semantic_score = Column(Float, nullable=True)
+    category_scores = Column(JSON, nullable=True)
+    scored_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_job_rankings_job_score', job_id, overall_score.desc(), resume_id),
+        {'schema': 'public'},
+    )
+
+# --- 8. Asynchronous Ranking Jobs ---
+class RankingJob(Base):
+    """
+    One JD scored against every resume matching a filter, run by a Celery worker.
+    Progress and the current top-k are written after each batch, so clients can poll
+    (or stream) partial results while the job runs.
+    """
+    __tablename__ = "ranking_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    status = Column(String, default="queued")       # 'queued', 'running', 'completed', 'failed'
+    job_id = Column(String, ForeignKey('public.jobs.id', ondelete='SET NULL'), nullable=True)
+    job_description = Column(JSON, nullable=False)  # {"title", "description", "requirements"}
+    filters = Column(JSON, nullable=True)           # scoring_candidates_query arguments
+    top_k = Column(Integer, nullable=False)
+    processed = Column(Integer, default=0)
+    total = Column(Integer, nullable=True)
+    results = Column(JSON, nullable=True)           # Current top-k, best first
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = ({'schema': 'public'},)
+
+# --- 9. Schema Initialization ---
+
+def _add_missing_columns(connection):
+    """
+    create_all only creates missing tables. Columns added to existing models later
+    (e.g. embeddings) are added here so older databases keep working.
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name, schema=table.schema):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name, schema=table.schema)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=connection.dialect)
+                if column.computed is not None:
+                    column_type += f" GENERATED ALWAYS AS ({column.computed.sqltext}) STORED"
+                connection.execute(text(
+                    f'ALTER TABLE {table.schema or "public"}.{table.name} ADD COLUMN {column.name} {column_type}'
+                ))
+                print(f"Added column {table.name}.{column.name}")
+
+def init_db():
+    """Creates the pgvector extension, all tables, and any columns/indexes missing from older schemas."""
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        Base.metadata.create_all(bind=connection)
+        _add_missing_columns(connection)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
@@ -0,0 +1,115 @@
+# src/near_duplicates.py
+
+import hashlib
+import os
+import re
+import zlib
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Near-duplicate resumes (the same candidate resubmitted with different formatting) have
+# almost the same word shingles. A MinHash signature estimates the Jaccard similarity of two
+# shingle sets; LSH banding turns "similar signatures" into "equal bucket keys", so candidates
+# are found with indexed equality lookups instead of comparing against every stored resume.
+
+# --- 1. Configuration ---
+SHINGLE_WORDS = 3
+MINHASH_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard share a bucket with high probability,
+# pairs below ~0.5 rarely do. Candidates are then verified against DUPLICATE_THRESHOLD.
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.8"))
+
+# Fixed seed: signatures are persisted, so every process must use the same hash functions.
+# Changing the seed or the sizes above requires recomputing the stored signatures.
+_MINHASH_SEED = 20240501
+_rng = np.random.default_rng(_MINHASH_SEED)
+# Multiply-shift hashing: ((a * x + b) mod 2^64) >> 32, with odd a (uint64 wraps by design)
+_A = _rng.integers(1, 2**63, size=MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"\w+")
+
+# --- 2. Signatures ---
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """32-bit hashes of the distinct word n-grams of a text (case, punctuation and layout ignored)."""
+    words = _WORD.findall((text or "").lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    size = min(SHINGLE_WORDS, len(words))
+    shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """(MINHASH_PERMUTATIONS,) uint32 signature of a text, or None when it has no words."""
+    hashes = shingle_hashes(text)
+    if hashes.size == 0:
+        return None
+    # (permutations, shingles) in one broadcast, minimum per permutation
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+def pack_signature(signature: np.ndarray) -> bytes:
+    return signature.astype(np.uint32).tobytes()
+
+def unpack_signature(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    if not blob or len(blob) != MINHASH_PERMUTATIONS * 4:
+        return None
+    return np.frombuffer(blob, dtype=np.uint32)
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket key per band (stored in resume_lsh_bands with its band number)."""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "big", signed=True)
+        for band in signature.reshape(LSH_BANDS, LSH_ROWS)
+    ]
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Share of equal MinHash values: an unbiased estimate of the shingle-set Jaccard similarity."""
+    return float(np.mean(a == b))
+
+# --- 3. Collapsing a Ranked List ---
+
+def collapse_duplicates(
+    ranked: List[Dict[str, Any]],
+    signatures: Dict[str, Optional[bytes]],
+    threshold: float = DUPLICATE_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """
+    Keeps the best-ranked resume of every near-duplicate group and lists the others under its
+    'duplicates'. Candidate pairs come from equal band buckets within the list (no pass over
+    the corpus) and are verified against `threshold`. `ranked` must be in rank order.
+    """
+    unpacked = {resume_id: unpack_signature(blob) for resume_id, blob in signatures.items()}
+    keys: Dict[int, List[Tuple[int, int]]] = {}
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    for position, result in enumerate(ranked):
+        signature = unpacked.get(result['resumeId'])
+        if signature is None:
+            continue
+        keys[position] = list(enumerate(band_buckets(signature)))
+        for key in keys[position]:
+            buckets.setdefault(key, []).append(position)
+
+    groups: Dict[int, List[int]] = {}  # kept position -> positions collapsed into it
+    collapsed_positions = set()
+    for position in sorted(keys):
+        if position in collapsed_positions:
+            continue
+        signature = unpacked[ranked[position]['resumeId']]
+        candidates = {p for key in keys[position] for p in buckets[key] if p > position and p not in collapsed_positions}
+        for other in sorted(candidates):
+            if estimated_jaccard(signature, unpacked[ranked[other]['resumeId']]) >= threshold:
+                groups.setdefault(position, []).append(other)
+                collapsed_positions.add(other)
+
+    collapsed = []
+    for position, result in enumerate(ranked):
+        if position in collapsed_positions:
+            continue
+        result['duplicates'] = [ranked[p]['resumeId'] for p in groups.get(position, [])]
+        collapsed.append(result)
+    return collapsed
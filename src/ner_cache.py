@@ -0,0 +1,218 @@
+# src/ner_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import redis
+
+from . import metrics
+
+# --- 1. Configuration ---
+# 'redis' (shared by all workers), 'disk' (per-host SQLite file) or 'none'
+NER_CACHE_BACKEND = os.getenv("NER_CACHE_BACKEND", "redis").lower()
+# Size bound: least recently used entries beyond this count are evicted
+NER_CACHE_MAX_ENTRIES = int(os.getenv("NER_CACHE_MAX_ENTRIES", "100000"))
+NER_CACHE_PATH = os.getenv("NER_CACHE_PATH", "cache/ner_cache.sqlite3")
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+# Part of every key: bump when the stored entity format changes (2 = offsets into the normalized text)
+NER_CACHE_FORMAT = "2"
+
+# --- 2. Keys ---
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a chunk, so reformatted re-uploads share cache entries."""
+    return " ".join(text.split())
+
+def cache_key(text: str, model_version: str) -> str:
+    """Content address of a chunk: hash of the normalized text plus the model identifier."""
+    digest = hashlib.sha256()
+    digest.update(f"{NER_CACHE_FORMAT}:{model_version}".encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+def normalized_offsets(text: str) -> Tuple[List[int], List[int]]:
+    """
+    Offset maps between a text and normalize_text(text): (raw -> normalized, normalized -> raw).
+    A whitespace run maps to its collapsed space; both lists have an entry for the end of the text.
+    """
+    to_normalized, to_raw = [], []
+    space_at = None
+    for raw, char in enumerate(text):
+        if char.isspace():
+            if to_raw and space_at is None:
+                space_at = raw  # leading whitespace is dropped, inner runs become one space
+            to_normalized.append(len(to_raw))
+            continue
+        if space_at is not None:
+            to_raw.append(space_at)
+            space_at = None
+        to_normalized.append(len(to_raw))
+        to_raw.append(raw)
+    to_normalized.append(len(to_raw))
+    to_raw.append(len(text))
+    return to_normalized, to_raw
+
+# --- 3. Stores ---
+
+class RedisNERCache:
+    """
+    Entries are plain keys; a sorted set tracks last access time so the
+    oldest entries can be evicted once the size bound is exceeded.
+    """
+    PREFIX = "ner_cache:"
+    LRU_KEY = "ner_cache:lru"
+
+    def __init__(self, url: str, max_entries: int):
+        self.client = redis.Redis.from_url(url, socket_timeout=1)
+        self.max_entries = max_entries
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+        values = self.client.mget([self.PREFIX + key for key in keys])
+        hits = {key: time.time() for key, value in zip(keys, values) if value is not None}
+        if hits:
+            self.client.zadd(self.LRU_KEY, hits)
+        return [json.loads(value) if value is not None else None for value in values]
+
+    def set_many(self, items: Dict[str, List[Dict[str, Any]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        pipe = self.client.pipeline()
+        for key, entities in items.items():
+            pipe.set(self.PREFIX + key, json.dumps(entities))
+        pipe.zadd(self.LRU_KEY, {key: now for key in items})
+        pipe.execute()
+        self._evict()
+
+    def _evict(self) -> None:
+        overflow = self.client.zcard(self.LRU_KEY) - self.max_entries
+        if overflow > 0:
+            evicted = self.client.zpopmin(self.LRU_KEY, overflow)
+            self.client.delete(*[self.PREFIX + key.decode() for key, _ in evicted])
+
+class DiskNERCache:
+    """SQLite-backed store for single-host deployments; evicts by last access time."""
+
+    def __init__(self, path: str, max_entries: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS ner_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ner_cache_accessed ON ner_cache (accessed_at)")
+        self.connection.commit()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+        if not keys:
+            return []
+        with self.lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = dict(self.connection.execute(
+                f"SELECT key, value FROM ner_cache WHERE key IN ({placeholders})", keys
+            ).fetchall())
+            if rows:
+                self.connection.executemany(
+                    "UPDATE ner_cache SET accessed_at = ? WHERE key = ?", [(time.time(), key) for key in rows]
+                )
+                self.connection.commit()
+        return [json.loads(rows[key]) if key in rows else None for key in keys]
+
+    def set_many(self, items: Dict[str, List[Dict[str, Any]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO ner_cache (key, value, accessed_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(entities), now) for key, entities in items.items()],
+            )
+            self.connection.execute(
+                "DELETE FROM ner_cache WHERE key IN "
+                "(SELECT key FROM ner_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.connection.commit()
+
+def create_ner_cache(backend: str = NER_CACHE_BACKEND):
+    """Builds the configured store, or returns None when caching is disabled/unavailable."""
+    try:
+        if backend == "redis":
+            return RedisNERCache(REDIS_URL, NER_CACHE_MAX_ENTRIES)
+        if backend == "disk":
+            return DiskNERCache(NER_CACHE_PATH, NER_CACHE_MAX_ENTRIES)
+    except Exception as e:
+        print(f"Warning: Could not initialize the '{backend}' NER cache. Caching disabled. Error: {e}")
+    return None
+
+ner_cache = create_ner_cache()
+
+# --- 4. Cached Inference ---
+
+def _to_json_safe(entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pipeline scores are numpy floats; make them JSON serializable."""
+    return [
+        {key: (float(value) if key == "score" else value) for key, value in entity.items()}
+        for entity in entities
+    ]
+
+def _remap_offsets(entities: List[Dict[str, Any]], start_map: List[int], end_map) -> List[Dict[str, Any]]:
+    remapped = []
+    for entity in entities:
+        entity = dict(entity)
+        if entity.get('start') is not None and entity.get('end') is not None:
+            entity['start'], entity['end'] = start_map[entity['start']], end_map(entity['end'])
+        remapped.append(entity)
+    return remapped
+
+def to_normalized_offsets(entities: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """Entity offsets in `text` -> offsets in normalize_text(text), the form stored in the cache."""
+    to_normalized, _ = normalized_offsets(text)
+    return _remap_offsets(entities, to_normalized, lambda end: to_normalized[end])
+
+def to_raw_offsets(entities: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """Cached (normalized) entity offsets -> offsets in this exact `text`."""
+    _, to_raw = normalized_offsets(text)
+    # An end offset is exclusive: map the entity's last character, not the gap after it
+    return _remap_offsets(entities, to_raw, lambda end: to_raw[end - 1] + 1 if end > 0 else to_raw[0])
+
+def cached_ner(texts: List[str], ner_function, model_version: str) -> List[List[Dict[str, Any]]]:
+    """
+    Returns NER output for each text, calling `ner_function` (a batched pipeline call)
+    only for the texts that are not cached yet. Cache failures fall back to inference.
+    Entries store offsets into the normalized text and are mapped back onto each caller's
+    text, so re-indented or re-wrapped copies get offsets into their own layout.
+    """
+    if ner_cache is None or not texts:
+        return ner_function(texts) if texts else []
+
+    keys = [cache_key(text, model_version) for text in texts]
+    try:
+        cached = ner_cache.get_many(keys)
+    except Exception as e:
+        print(f"Warning: NER cache read failed, running inference. Error: {e}")
+        cached = [None] * len(texts)
+
+    missing = [i for i, value in enumerate(cached) if value is None]
+    cached = [to_raw_offsets(value, text) if value is not None else None for value, text in zip(cached, texts)]
+    if missing:
+        fresh = ner_function([texts[i] for i in missing])
+        new_items = {}
+        for i, entities in zip(missing, fresh):
+            cached[i] = _to_json_safe(entities)
+            new_items[keys[i]] = to_normalized_offsets(cached[i], texts[i])
+        try:
+            ner_cache.set_many(new_items)
+        except Exception as e:
+            print(f"Warning: NER cache write failed. Error: {e}")
+
+    metrics.increment("ner_cache", "hits", len(texts) - len(missing))
+    metrics.increment("ner_cache", "misses", len(missing))
+    return cached
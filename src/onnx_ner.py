@@ -0,0 +1,82 @@
+# src/onnx_ner.py
+
+from transformers import AutoTokenizer
+from transformers import pipeline
+from pathlib import Path
+import os
+
+from .resource_governor import onnx_session_options
+
+# Optimum wraps the ONNX export, quantization and ONNX Runtime inference
+from optimum.onnxruntime import ORTModelForTokenClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+# --- 1. Configuration ---
+# Directory where the exported (fp32) and quantized (int8) models are cached.
+# In Docker this lives under /app, which is a shared volume for api and worker.
+ONNX_MODEL_DIR = Path(os.getenv("ONNX_NER_DIR", "models/onnx-ner"))
+
+# Target instruction set for the int8 kernels: 'avx2', 'avx512', 'avx512_vnni' or 'arm64'
+ONNX_QUANTIZATION_ARCH = os.getenv("ONNX_QUANTIZATION_ARCH", "avx2")
+
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+# --- 2. Export and Quantization ---
+
+def _model_dir(model_name: str) -> Path:
+    """Returns the cache directory for a given Hugging Face model id or local path."""
+    return ONNX_MODEL_DIR / model_name.replace("/", "__")
+
+def export_quantized_model(model_name: str, force: bool = False) -> Path:
+    """
+    Exports a token-classification model to ONNX and applies dynamic int8 quantization.
+    Returns the directory containing the quantized model and its tokenizer.
+    """
+    base_dir = _model_dir(model_name)
+    fp32_dir = base_dir / "fp32"
+    int8_dir = base_dir / "int8"
+
+    if not force and (int8_dir / QUANTIZED_FILE_NAME).exists():
+        return int8_dir
+
+    print(f"Exporting {model_name} to ONNX (this only happens once)...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = ORTModelForTokenClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(fp32_dir)
+    tokenizer.save_pretrained(fp32_dir)
+
+    # Dynamic quantization: weights are stored as int8, activations are quantized on the fly.
+    # No calibration dataset is needed, which keeps the export reproducible.
+    quantization_config = getattr(AutoQuantizationConfig, ONNX_QUANTIZATION_ARCH)(
+        is_static=False,
+        per_channel=False,
+    )
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(save_dir=int8_dir, quantization_config=quantization_config)
+    tokenizer.save_pretrained(int8_dir)
+
+    print(f"Quantized ONNX model saved to {int8_dir}")
+    return int8_dir
+
+# --- 3. Inference Pipeline ---
+
+def load_onnx_ner_pipeline(model_name: str):
+    """
+    Builds a Hugging Face 'ner' pipeline backed by ONNX Runtime.
+    The pipeline post-processing is unchanged, so the output keeps the same
+    contract as the PyTorch path (entity_group, word, score, start, end).
+    """
+    int8_dir = export_quantized_model(model_name)
+
+    # Thread pool sized by the resource governor (ORT would otherwise use every core)
+    model = ORTModelForTokenClassification.from_pretrained(
+        int8_dir, file_name=QUANTIZED_FILE_NAME, session_options=onnx_session_options()
+    )
+    tokenizer = AutoTokenizer.from_pretrained(int8_dir)
+
+    return pipeline(
+        "ner",
+        model=model,
+        tokenizer=tokenizer,
+        aggregation_strategy="simple"
+    )
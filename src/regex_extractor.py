@@ -0,0 +1,182 @@
+# src/regex_extractor.py
+
+import re
+import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+# --- 1. Precompiled Patterns ---
+# Every field is a named group of ONE master pattern, so the text is scanned
+# in a single linear pass (re.finditer) instead of once per field.
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_MONTH_NAME = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+
+# A single date: "Jan 2020", "January, 2020", "01/2020", "2020-01" or a bare year "2020"
+_DATE = (
+    rf"(?:{_MONTH_NAME},?\s+(?:19|20)\d{{2}}"
+    r"|(?:0?[1-9]|1[0-2])[/.](?:19|20)\d{2}"
+    r"|(?:19|20)\d{2}-(?:0[1-9]|1[0-2])"
+    r"|(?:19|20)\d{2})"
+)
+_PRESENT = r"(?:present|current|now|today|ongoing|date)"
+
+_MASTER_PATTERN = re.compile(
+    # Emails first: they may contain things that look like URLs
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+    # Profile links before generic URLs so they are classified precisely
+    r"|(?P<linkedin>(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/(?:in|pub)/[A-Za-z0-9_%-]+/?)"
+    r"|(?P<github>(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})/?)"
+    r"|(?P<url>(?:https?://|www\.)[^\s<>()\"',;]+)"
+    # Date ranges: "Jan 2020 - Present", "2018 – 2021", "03/2019 to 12/2020"
+    rf"|(?P<date_range>(?P<range_start>{_DATE})\s*(?:-|–|—|to|until)\s*(?P<range_end>{_DATE}|{_PRESENT}))"
+    # International phone numbers: optional +country code, 7-15 digits with separators
+    r"|(?P<phone>(?<![\w/])(?:\+\d{1,3}[\s.-]?)?(?:\(\d{1,4}\)[\s.-]?)?\d{2,4}(?:[\s.-]?\d{2,4}){2,4}(?![\w/]))",
+    re.IGNORECASE,
+)
+
+_MONTH_YEAR = re.compile(rf"(?P<month>{_MONTH_NAME}),?\s+(?P<year>(?:19|20)\d{{2}})", re.IGNORECASE)
+_NUMERIC_MONTH_YEAR = re.compile(r"(?P<month>0?[1-9]|1[0-2])[/.](?P<year>(?:19|20)\d{2})")
+_ISO_MONTH_YEAR = re.compile(r"(?P<year>(?:19|20)\d{2})-(?P<month>0[1-9]|1[0-2])")
+_PRESENT_PATTERN = re.compile(_PRESENT, re.IGNORECASE)
+
+# --- 2. Date Helpers ---
+
+def _parse_date(value: str) -> Optional[Tuple[int, Optional[int]]]:
+    """Converts a matched date string to (year, month). A bare year has no month (None)."""
+    value = value.strip()
+    if _PRESENT_PATTERN.fullmatch(value):
+        today = datetime.date.today()
+        return today.year, today.month
+
+    match = _MONTH_YEAR.fullmatch(value)
+    if match:
+        return int(match.group("year")), _MONTHS[match.group("month")[:3].lower()]
+
+    match = _NUMERIC_MONTH_YEAR.fullmatch(value) or _ISO_MONTH_YEAR.fullmatch(value)
+    if match:
+        return int(match.group("year")), int(match.group("month"))
+
+    if value.isdigit():
+        return int(value), None
+    return None
+
+def _range_months(start: Tuple[int, Optional[int]], end: Tuple[int, Optional[int]]) -> int:
+    """
+    Length of a date range in months. Month-precise ranges count both ends ("Jan-Dec 2020" is
+    12 months); a bare year takes the other end's month and the count is end - start, so
+    "2016 - 2019" is 3 years, not 4. A same-year range of bare years counts as one year.
+    """
+    if start[1] is not None and end[1] is not None:
+        return (end[0] - start[0]) * 12 + (end[1] - start[1]) + 1
+    if start[1] is None and end[1] is None:
+        return (end[0] - start[0]) * 12 or 12
+    start_month = start[1] if start[1] is not None else end[1]
+    end_month = end[1] if end[1] is not None else start[1]
+    return (end[0] - start[0]) * 12 + (end_month - start_month)
+
+def format_duration(months: int) -> str:
+    """Human readable duration, e.g. 38 -> '3 years 2 months'."""
+    years, remainder = divmod(months, 12)
+    parts = []
+    if years:
+        parts.append(f"{years} year{'s' if years != 1 else ''}")
+    if remainder:
+        parts.append(f"{remainder} month{'s' if remainder != 1 else ''}")
+    return " ".join(parts) or "less than a month"
+
+def _digit_count(value: str) -> int:
+    return sum(ch.isdigit() for ch in value)
+
+_DIGIT_GROUPS = re.compile(r"\d+")
+_YEAR = re.compile(r"(?:19|20)\d{2}")
+
+def _is_plausible_phone(value: str) -> bool:
+    """
+    Rejects digit runs the phone pattern also matches: lists of years ("2018 2019 2020")
+    and long unseparated IDs ("123456789012"). A number without a country code or area code
+    parentheses needs separators, unless it is a plain 10-11 digit mobile number.
+    """
+    digits = _digit_count(value)
+    if not 7 <= digits <= 15:
+        return False
+    groups = _DIGIT_GROUPS.findall(value)
+    if value.startswith("+") or "(" in value:
+        return True
+    if len(groups) == 1:
+        return 10 <= digits <= 11
+    return not all(_YEAR.fullmatch(group) for group in groups)
+
+# --- 3. Main Extraction Function ---
+
+def extract_fast_fields(text: str) -> Dict[str, Any]:
+    """
+    Extracts contact details, links and date ranges in one pass over the text.
+    Every match keeps its character span so later stages can mask it out of the
+    NER input and attach date ranges to nearby entities.
+    """
+    fields = {
+        "emails": [],
+        "phones": [],
+        "links": {"linkedin": "", "github": "", "urls": []},
+        "dateRanges": [],
+        "spans": [],  # (start, end) of everything matched here
+    }
+
+    for match in _MASTER_PATTERN.finditer(text):
+        kind = match.lastgroup if match.lastgroup not in ("range_start", "range_end") else "date_range"
+        value = match.group(kind).strip()
+
+        if kind == "email":
+            fields["emails"].append(value)
+        elif kind == "linkedin":
+            fields["links"]["linkedin"] = fields["links"]["linkedin"] or value.rstrip("/")
+        elif kind == "github":
+            fields["links"]["github"] = fields["links"]["github"] or value.rstrip("/")
+        elif kind == "url":
+            fields["links"]["urls"].append(value.rstrip("."))
+        elif kind == "phone":
+            # Too short/long, unseparated or all years: a year list, zip code, ID, etc.
+            if not _is_plausible_phone(value):
+                continue
+            fields["phones"].append(value)
+        elif kind == "date_range":
+            start = _parse_date(match.group("range_start"))
+            end = _parse_date(match.group("range_end"))
+            if not start or not end:
+                continue
+            months = _range_months(start, end)
+            if months <= 0 or end[0] < start[0]:
+                continue
+            start_month = start[1] or end[1] or 1
+            end_month = end[1] or start[1] or 1
+            fields["dateRanges"].append({
+                "start": f"{start[0]:04d}-{start_month:02d}",
+                "end": "present" if _PRESENT_PATTERN.fullmatch(match.group("range_end").strip()) else f"{end[0]:04d}-{end_month:02d}",
+                "months": months,
+                "duration": format_duration(months),
+                "offset": match.start(),
+            })
+
+        fields["spans"].append(match.span())
+
+    # Keep first-seen order while removing duplicates
+    fields["emails"] = list(dict.fromkeys(fields["emails"]))
+    fields["phones"] = list(dict.fromkeys(fields["phones"]))
+    fields["links"]["urls"] = list(dict.fromkeys(fields["links"]["urls"]))
+    return fields
+
+def mask_spans(text: str, spans: List[Tuple[int, int]]) -> str:
+    """
+    Blanks out already-extracted spans with spaces. Character offsets are preserved,
+    so NER entity positions still line up with the original text.
+    """
+    if not spans:
+        return text
+    chars = list(text)
+    for start, end in spans:
+        chars[start:end] = " " * (end - start)
+    return "".join(chars)
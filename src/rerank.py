@@ -0,0 +1,96 @@
+# src/rerank.py
+
+import os
+import time
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from .resource_governor import inference_slot
+
+# --- 1. Model Setup ---
+# A small cross-encoder reads (job, resume) pairs jointly: better ordering than bi-encoder
+# cosine, but far too slow to run on every resume - only the final shortlist goes through it.
+CROSS_ENCODER_MODEL_NAME = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "8"))
+RERANK_DEFAULT_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+# Load the cross-encoder when the API starts instead of inside the first rerank's budget
+RERANK_PRELOAD = os.getenv("RERANK_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+_cross_encoder = None
+_cross_encoder_failed = False
+
+def get_cross_encoder():
+    """Loads the cross-encoder on first use, so deployments that never rerank do not pay for it."""
+    global _cross_encoder, _cross_encoder_failed
+    if _cross_encoder is None and not _cross_encoder_failed:
+        try:
+            from sentence_transformers import CrossEncoder
+            _cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL_NAME, max_length=512)
+            print(f"INFO: Cross-encoder {CROSS_ENCODER_MODEL_NAME} loaded.")
+        except Exception as e:
+            print(f"Warning: Could not load cross-encoder. Reranking disabled. Error: {e}")
+            _cross_encoder_failed = True
+    return _cross_encoder
+
+# --- 2. Budgeted Rerank ---
+
+def rerank_with_budget(
+    query_text: str,
+    ranked: List[Dict[str, Any]],
+    candidate_texts: Dict[str, str],
+    budget_ms: float = RERANK_DEFAULT_BUDGET_MS,
+    batch_size: int = RERANK_BATCH_SIZE
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Scores the bi-encoder ranked list with the cross-encoder, batch by batch in the current order.
+    Stops before a batch that would overrun the budget (estimated from the slowest batch so far).
+    The scored prefix is reordered by cross-encoder score; anything left unscored keeps its
+    bi-encoder order after it. Returns (new order, stats).
+    """
+    stats = {"applied": False, "scored": 0, "budgetExhausted": False, "budgetMs": budget_ms}
+    # A lazy load counts against the budget (see RERANK_PRELOAD)
+    start = time.perf_counter()
+    cross_encoder = get_cross_encoder()
+    if cross_encoder is None or not ranked:
+        return ranked, stats
+
+    slowest_batch_ms = 0.0
+    scores: List[float] = []
+
+    for offset in range(0, len(ranked), batch_size):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms + slowest_batch_ms > budget_ms:
+            stats["budgetExhausted"] = True
+            break
+
+        batch = ranked[offset:offset + batch_size]
+        batch_start = time.perf_counter()
+        try:
+            # Shares the process's inference slots with encode_texts (see resource_governor.py)
+            with inference_slot():
+                logits = cross_encoder.predict(
+                    [(query_text, candidate_texts.get(result['resumeId'], "")) for result in batch],
+                    batch_size=batch_size,
+                    show_progress_bar=False,
+                )
+        except Exception as e:
+            # Treat a model error like an exhausted budget: keep what was scored so far
+            print(f"Error during cross-encoder rerank: {e}")
+            break
+        slowest_batch_ms = max(slowest_batch_ms, (time.perf_counter() - batch_start) * 1000)
+        scores.extend(np.asarray(logits, dtype=np.float32).reshape(-1).tolist())
+
+    if not scores:
+        return ranked, stats
+
+    scored = ranked[:len(scores)]
+    for result, logit in zip(scored, scores):
+        # Sigmoid of the relevance logit, on the same 0-100 scale as the other scores
+        result['rerankScore'] = int(100 / (1 + np.exp(-logit)))
+    # Sort on the raw logits: the rounded 0-100 scores saturate and would create ties
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    scored = [scored[i] for i in order]
+
+    stats.update({"applied": True, "scored": len(scores), "elapsedMs": round((time.perf_counter() - start) * 1000, 2)})
+    return scored + ranked[len(scores):], stats
@@ -0,0 +1,171 @@
+# src/resource_governor.py
+
+import math
+import os
+import socket
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+# Every inference library sizes its thread pool to all cores by default. With several Celery
+# children per container (and concurrent encodes in the API threadpool) that multiplies into
+# far more runnable threads than cores, which hurts tail latency badly. The governor divides
+# the container's CPUs between the processes (or concurrent requests) that run inference.
+# Kept free of model imports: it must run before torch/onnxruntime create their pools.
+
+# --- 1. Configuration ---
+# Overrides the detected CPU count (affinity mask and cgroup quota)
+CPU_LIMIT = int(os.getenv("CPU_LIMIT", "0"))
+# Concurrent encodes allowed in the API process; each gets CPUs / this many threads
+API_INFERENCE_CONCURRENCY = int(os.getenv("API_INFERENCE_CONCURRENCY", "2"))
+# Pin each Celery child to its own block of cores (needs at least one core per child)
+PIN_CPUS = os.getenv("PIN_CPUS", "false").lower() in ("1", "true", "yes")
+# Tesseract's OpenMP threads per OCR call; one page per thread is the efficient setting
+TESSERACT_THREADS = int(os.getenv("TESSERACT_THREADS", "1"))
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+_settings: Dict[str, Any] = {}
+_inference_slots: Optional[threading.BoundedSemaphore] = None
+
+# --- 2. CPU Budget ---
+
+def _cgroup_cpu_quota() -> Optional[float]:
+    """CPUs granted by the container's cgroup quota (v2, then v1), or None when unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+def _allowed_cores() -> List[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def available_cpus() -> Tuple[int, str]:
+    """(CPUs this container may use, where the number came from)."""
+    if CPU_LIMIT > 0:
+        return CPU_LIMIT, "CPU_LIMIT"
+    cpus, source = len(_allowed_cores()), "affinity"
+    quota = _cgroup_cpu_quota()
+    if quota is not None and math.ceil(quota) < cpus:
+        cpus, source = max(1, math.ceil(quota)), "cgroup"
+    return cpus, source
+
+# --- 3. Applying the Plan ---
+
+def _pin(slot: int, threads: int) -> Optional[List[int]]:
+    """Gives Celery child `slot` its own block of `threads` cores (wrapping when there are too few)."""
+    cores = _allowed_cores()
+    start = (slot * threads) % len(cores)
+    block = [cores[(start + i) % len(cores)] for i in range(min(threads, len(cores)))]
+    try:
+        os.sched_setaffinity(0, block)
+        return block
+    except (AttributeError, OSError) as e:
+        print(f"Warning: Could not pin process to cores {block}: {e}")
+        return None
+
+def configure_process(role: str, concurrency: Optional[int] = None, slot: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Sizes every thread pool of this process for `concurrency` inference processes (worker)
+    or concurrent requests (api) sharing the CPU budget. Safe to call again: a Celery child
+    calls it after the fork with its pool index (`slot`) and inherits the parent's concurrency.
+    Environment variables set by the operator win over the computed values.
+    """
+    global _inference_slots
+    concurrency = max(1, int(concurrency or _settings.get("concurrency") or 1))
+    cpus, source = available_cpus()
+    threads = max(1, cpus // concurrency)
+
+    for name in _THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(threads))
+    # Read by each tesseract subprocess (pytesseract spawns one per OCR call)
+    os.environ.setdefault("OMP_THREAD_LIMIT", str(TESSERACT_THREADS))
+    # The Rust tokenizer pool is one more pool per process, and it deadlocks after a fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    threads = int(os.environ["OMP_NUM_THREADS"])
+
+    _settings.update({
+        "role": role,
+        "pid": os.getpid(),
+        "cpus": cpus,
+        "cpuSource": source,
+        "concurrency": concurrency,
+        "threadsPerProcess": threads,
+        "slot": slot,
+        "pinnedCores": _pin(slot, threads) if PIN_CPUS and slot is not None else None,
+    })
+
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only allowed before the first parallel op; after a fork the parent's value stays
+            pass
+    try:
+        # numpy's BLAS pool was sized when numpy was imported
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+    _inference_slots = threading.BoundedSemaphore(concurrency if role == "api" else 1)
+    return effective_settings()
+
+def intra_op_threads() -> int:
+    """Thread count for inference sessions created in this process (the whole budget if unconfigured)."""
+    return int(_settings.get("threadsPerProcess") or available_cpus()[0])
+
+def onnx_session_options():
+    """ONNX Runtime session options honouring the plan (ORT ignores OMP_NUM_THREADS)."""
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads()
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    return options
+
+@contextmanager
+def inference_slot():
+    """Bounds concurrent model calls in this process, so each keeps its share of the cores."""
+    slots = _inference_slots
+    if slots is None:
+        yield
+        return
+    with slots:
+        yield
+
+# --- 4. Diagnostics ---
+
+def effective_settings() -> Dict[str, Any]:
+    """The plan, plus what the libraries report they actually use."""
+    report = dict(_settings)
+    report["host"] = socket.gethostname()
+    report["env"] = {name: os.environ.get(name) for name in (*_THREAD_ENV_VARS, "OMP_THREAD_LIMIT", "TOKENIZERS_PARALLELISM")}
+    report["affinity"] = _allowed_cores()
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        report["torch"] = {"intraOpThreads": torch.get_num_threads(), "interOpThreads": torch.get_num_interop_threads()}
+    try:
+        from threadpoolctl import threadpool_info
+        report["nativePools"] = [
+            {"api": pool.get("internal_api"), "threads": pool.get("num_threads")} for pool in threadpool_info()
+        ]
+    except ImportError:
+        pass
+    return report
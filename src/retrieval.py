@@ -0,0 +1,100 @@
+# src/retrieval.py
+
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .crud import lexical_search_resumes, get_resumes_for_scoring
+from .matching import score_resumes_batch, get_text_from_data
+from .rerank import rerank_with_budget, RERANK_DEFAULT_BUDGET_MS
+from .near_duplicates import collapse_duplicates
+from .skills import extract_skill_mentions
+
+# --- 1. Configuration ---
+# Cap on the lexical recall terms (title and required skills always come first,
+# so exact-term requirements are never dropped)
+LEXICAL_QUERY_MAX_TERMS = 50
+
+# --- 2. Two-Stage Hybrid Retrieval ---
+
+def build_lexical_terms(job_description: Dict[str, Any]) -> List[str]:
+    """
+    Title + required/preferred skills + the taxonomy skills mentioned in the description.
+    Generic JD words ('experience', 'team', 'work') are left out: ORed together they match
+    almost every resume, and the recall would rank the whole table.
+    """
+    requirements = job_description.get('requirements') or {}
+    terms = [job_description.get('title') or ""]
+    terms.extend(requirements.get('required') or [])
+    terms.extend(requirements.get('preferred') or [])
+    terms.extend(extract_skill_mentions(job_description.get('description') or ""))
+
+    unique = {}
+    for term in terms:
+        term = " ".join(str(term).split())
+        if term:
+            unique.setdefault(term.lower(), term)
+    return list(unique.values())[:LEXICAL_QUERY_MAX_TERMS]
+
+def hybrid_rank(
+    db: Session,
+    job_description: Dict[str, Any],
+    job_embedding: Optional[np.ndarray] = None,
+    recall_k: int = 200,
+    top_k: int = 20,
+    rerank: bool = False,
+    rerank_budget_ms: float = RERANK_DEFAULT_BUDGET_MS,
+    collapse: bool = False,
+    include_gap_analysis: bool = False
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Stage 1: lexical recall of `recall_k` resumes through the Postgres tsvector GIN index
+    (catches exact terms such as certifications and rare tools).
+    Stage 2: rerank the shortlist with the SentenceTransformer + skill scoring of score_resumes_batch
+    (catches paraphrases).
+    Stage 3 (optional): cross-encoder rerank of the top_k within `rerank_budget_ms`,
+    falling back to the stage 2 order for whatever the budget did not cover.
+    With `collapse`, near-duplicate resumes are folded into their best-ranked copy before
+    the top_k cut (signatures of the shortlist only, no corpus-wide comparison).
+    Returns (top_k results, stats with the number recalled, per-stage timings in ms
+    and the cross-encoder outcome).
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    lexical_hits = lexical_search_resumes(db, build_lexical_terms(job_description), limit=recall_k)
+    timings['lexicalRecallMs'] = (time.perf_counter() - start) * 1000
+
+    stage_start = time.perf_counter()
+    lexical_ranks = {resume_id: rank for rank, (resume_id, _) in enumerate(lexical_hits, start=1)}
+    lexical_scores = {resume_id: float(score) for resume_id, score in lexical_hits}
+    resumes = get_resumes_for_scoring(db, resume_ids=list(lexical_ranks)) if lexical_ranks else []
+    timings['loadMs'] = (time.perf_counter() - stage_start) * 1000
+
+    stage_start = time.perf_counter()
+    ranked = score_resumes_batch(resumes, job_description, job_embedding, include_gap_analysis=include_gap_analysis)
+    if collapse:
+        ranked = collapse_duplicates(ranked, {resume.id: resume.minhash for resume in resumes})
+    ranked = ranked[:top_k]
+    timings['semanticRerankMs'] = (time.perf_counter() - stage_start) * 1000
+
+    for result in ranked:
+        result['lexicalRank'] = lexical_ranks.get(result['resumeId'])
+        result['lexicalScore'] = round(lexical_scores.get(result['resumeId'], 0.0), 4)
+
+    rerank_stats = None
+    if rerank and ranked:
+        stage_start = time.perf_counter()
+        texts = {resume.id: get_text_from_data(resume) for resume in resumes}
+        query_text = " ".join(p for p in (job_description.get('title'), job_description.get('description')) if p)
+        ranked, rerank_stats = rerank_with_budget(query_text, ranked, texts, budget_ms=rerank_budget_ms)
+        timings['crossEncoderRerankMs'] = (time.perf_counter() - stage_start) * 1000
+
+    timings['totalMs'] = (time.perf_counter() - start) * 1000
+    return ranked, {
+        "recalled": len(lexical_hits),
+        "timings": {stage: round(ms, 2) for stage, ms in timings.items()},
+        "crossEncoder": rerank_stats,
+    }
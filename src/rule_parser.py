@@ -0,0 +1,155 @@
+# src/rule_parser.py
+
+import re
+from typing import List, Dict, Any, Optional
+
+# --- 1. Configuration ---
+# Fields with a rule confidence at or above this value skip the transformer entirely
+RULE_CONFIDENCE_THRESHOLD = 0.75
+
+# Which section the transformer needs to re-read when a field falls below the threshold
+FIELD_SECTIONS = {
+    "name": "header",
+    "experience": "experience",
+    "education": "education",
+}
+
+_TITLE_KEYWORDS = re.compile(
+    r"\b(engineer|developer|manager|analyst|scientist|architect|consultant|designer|lead|"
+    r"intern|director|administrator|specialist|officer|head|associate|programmer|researcher)\b",
+    re.IGNORECASE,
+)
+_INSTITUTION_KEYWORDS = re.compile(
+    r"\b(university|college|institute|school|academy|polytechnic|iit|nit|mit)\b", re.IGNORECASE
+)
+_DEGREE_KEYWORDS = re.compile(
+    r"\b(b\.?\s?tech|m\.?\s?tech|b\.?\s?sc|m\.?\s?sc|b\.?\s?s|m\.?\s?s|b\.?\s?e|m\.?\s?e|b\.?\s?a|m\.?\s?a|mba|ph\.?\s?d|"
+    r"bachelor(?:'s)?|master(?:'s)?|diploma|associate degree)\b",
+    re.IGNORECASE,
+)
+# Separators used by the common templates: "Title at Company", "Title | Company", "Company, Title"
+_ENTRY_SEPARATORS = re.compile(r"\s+at\s+|\s*\|\s*|\s+[-–—]\s+|\s*,\s*|\s{2,}|\t", re.IGNORECASE)
+_NAME_LINE = re.compile(r"^[A-Z][a-zA-Z'.-]+(?:\s+[A-Z][a-zA-Z'.-]+){1,3}$")
+
+# --- 2. Field Parsers ---
+
+def _lines(text: str) -> List[str]:
+    return [line.strip(" \t*•-") for line in text.splitlines() if line.strip(" \t*•-")]
+
+def _parse_name(header_text: str) -> Dict[str, Any]:
+    """The candidate's name is almost always the first line of the header block."""
+    for line in _lines(header_text)[:3]:
+        candidate = line.split("|")[0].strip()
+        if _NAME_LINE.match(candidate) and not _TITLE_KEYWORDS.search(candidate):
+            return {"value": candidate, "confidence": 0.9}
+    return {"value": "", "confidence": 0.0}
+
+def _split_entry(line: str) -> List[str]:
+    return [part.strip() for part in _ENTRY_SEPARATORS.split(line) if part and part.strip()]
+
+def _parse_experience(section: Dict[str, Any], date_ranges: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Template layouts put each role on a line with its date range ("Senior Engineer, Google  Jan 2020 - Present").
+    Confidence is the share of date-ranged lines that split cleanly into a title and a company.
+    """
+    if section is None:
+        return {"value": [], "confidence": 0.0}
+
+    text, offset = section["text"], section["start"]
+    ranges = [r for r in date_ranges if section["start"] <= r["offset"] < section["end"]]
+    if not ranges:
+        return {"value": [], "confidence": 0.0}
+
+    entries, clean = [], 0
+    for date_range in ranges:
+        # Locate the line holding this date range and drop the dates themselves
+        line_start = text.rfind("\n", 0, date_range["offset"] - offset) + 1
+        line_end = text.find("\n", date_range["offset"] - offset)
+        line = text[line_start:line_end if line_end != -1 else len(text)]
+        line = line[:date_range["offset"] - offset - line_start].strip(" \t|,-–—()")
+
+        parts = _split_entry(line)
+        title = next((p for p in parts if _TITLE_KEYWORDS.search(p)), "")
+        company = next((p for p in parts if p != title), "")
+        if title and company:
+            clean += 1
+        entries.append({
+            "title": title,
+            "company": company,
+            "startDate": date_range["start"],
+            "endDate": date_range["end"],
+            "duration": date_range["duration"],
+        })
+
+    return {"value": entries, "confidence": round(clean / len(ranges), 2)}
+
+def _parse_education(section: Dict[str, Any], date_ranges: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Institutions are recognized by keyword; confidence drops for lines we could not classify."""
+    if section is None:
+        return {"value": [], "confidence": 0.0}
+
+    entries, unknown = [], 0
+    for line in _lines(section["text"]):
+        parts = _split_entry(line)
+        institution = next((p for p in parts if _INSTITUTION_KEYWORDS.search(p)), "")
+        degree = next((p for p in parts if _DEGREE_KEYWORDS.search(p)), "")
+        if institution:
+            entries.append({"institution": institution, "degree": degree})
+        elif degree and entries and not entries[-1]["degree"]:
+            entries[-1]["degree"] = degree
+        elif not degree:
+            unknown += 1
+
+    if not entries:
+        return {"value": [], "confidence": 0.0}
+
+    ranges = [r for r in date_ranges if section["start"] <= r["offset"] < section["end"]]
+    for entry, date_range in zip(entries, ranges):
+        entry.update({"startDate": date_range["start"], "endDate": date_range["end"]})
+    return {"value": entries, "confidence": round(len(entries) / (len(entries) + unknown), 2)}
+
+# --- 3. Main Rule Parsing Function ---
+
+def parse_with_rules(
+    sections: List[Dict[str, Any]],
+    fast_fields: Dict[str, Any],
+    section_fields: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Cheap layout-based parse. Returns {field: {"value": ..., "confidence": 0-1}}
+    for every field the cascade may hand over to the transformer. When there is no header
+    section the name is looked for at the top of the first section instead, and is marked
+    {"source": "fallback"} so the cascade does not count it as a template hit.
+    """
+    by_name: Dict[str, Optional[Dict[str, Any]]] = {}
+    for section in sections:
+        by_name.setdefault(section["name"], section)
+
+    date_ranges = fast_fields.get("dateRanges", [])
+    header = by_name.get("header")
+    if header:
+        name = _parse_name(header["text"])
+    elif sections:
+        # Below the threshold: only used when the transformer finds no name either
+        name = _parse_name(sections[0]["text"])
+        name = {**name, "confidence": min(name["confidence"], RULE_CONFIDENCE_THRESHOLD / 2), "source": "fallback"}
+    else:
+        name = {"value": "", "confidence": 0.0}
+
+    return {
+        "name": name,
+        "experience": _parse_experience(by_name.get("experience"), date_ranges),
+        "education": _parse_education(by_name.get("education"), date_ranges),
+        # Skills come straight from the skills section; a short list usually means it was not a real list
+        "skills": {
+            "value": section_fields.get("skills", []),
+            "confidence": 0.9 if len(section_fields.get("skills", [])) >= 3 else 0.3,
+        },
+    }
+
+def low_confidence_fields(rule_fields: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Fields that the transformer must re-extract."""
+    return [
+        field for field in FIELD_SECTIONS
+        if rule_fields.get(field, {}).get("confidence", 0.0) < RULE_CONFIDENCE_THRESHOLD
+    ]
@@ -0,0 +1,104 @@
+# src/section_segmenter.py
+
+import re
+from typing import List, Dict, Any
+
+# --- 1. Heading Vocabulary ---
+# Canonical section name -> headings commonly used for it in resumes
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "education": ["education", "academic background", "academics", "education and training",
+                  "qualifications", "academic qualifications"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "core competencies",
+               "competencies", "technologies", "tech stack", "tools and technologies"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects", "selected projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications",
+                       "licenses & certifications", "courses", "training"],
+    "references": ["references", "referees"],
+}
+
+# Sections whose content needs the NER model (names, companies, institutions).
+# Everything else is handled by the cheap handlers below or dropped.
+NER_SECTIONS = {"header", "experience", "education"}
+
+_ALIAS_TO_SECTION = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+# One multiline pattern: a heading is a short line consisting only of a known alias,
+# optionally decorated (bullets, '#', trailing colon). Longest aliases first so
+# "work experience" wins over "experience".
+_HEADING_PATTERN = re.compile(
+    r"^[ \t]*[#*•\-=_]*[ \t]*(?P<heading>"
+    + "|".join(re.escape(a) for a in sorted(_ALIAS_TO_SECTION, key=len, reverse=True))
+    + r")[ \t]*:?[ \t]*[#*=_\-]*[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+_LIST_SPLIT = re.compile(r"[,;|•·▪●\n]|\s[-–]\s|\t")
+
+# --- 2. Segmentation ---
+
+def segment_sections(text: str) -> List[Dict[str, Any]]:
+    """
+    Splits resume text into sections using heading lines.
+    Each section keeps its character offsets in the original text. Text before the
+    first heading is the 'header' (name and contact block). A resume without any
+    recognizable heading is returned as a single 'header' section.
+    """
+    sections = []
+    current_name, current_start = "header", 0
+
+    for match in _HEADING_PATTERN.finditer(text):
+        sections.append({"name": current_name, "start": current_start, "end": match.start()})
+        current_name = _ALIAS_TO_SECTION[match.group("heading").lower()]
+        current_start = match.end()
+    sections.append({"name": current_name, "start": current_start, "end": len(text)})
+
+    for section in sections:
+        section["text"] = text[section["start"]:section["end"]]
+    return [s for s in sections if s["text"].strip()]
+
+# --- 3. Cheap Section Handlers (no model) ---
+
+def split_list_items(section_text: str) -> List[str]:
+    """Splits a skills/certifications block on commas, bullets, pipes and newlines."""
+    items = []
+    for raw in _LIST_SPLIT.split(section_text):
+        item = raw.strip(" \t*-:.")
+        # Drop category labels like "Languages:" left over from "Languages: Python, Go"
+        if ":" in item:
+            item = item.split(":", 1)[1].strip()
+        if item and len(item) <= 60:
+            items.append(item)
+    return list(dict.fromkeys(items))
+
+def first_lines(section_text: str) -> List[str]:
+    """Returns the non-empty lines of a block, bullets stripped (used for projects)."""
+    lines = []
+    for line in section_text.splitlines():
+        line = line.strip(" \t*•-")
+        if line:
+            lines.append(line)
+    return lines
+
+def handle_cheap_sections(sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Extracts the fields that do not need NER directly from their sections.
+    'references' is dropped on purpose: it contains other people's names and companies.
+    """
+    result = {"summary": "", "skills": [], "projects": [], "certifications": []}
+    for section in sections:
+        name, text = section["name"], section["text"]
+        if name == "summary":
+            result["summary"] = " ".join(text.split())
+        elif name == "skills":
+            result["skills"].extend(split_list_items(text))
+        elif name == "projects":
+            # Keep project titles; long descriptions are not needed for structured data
+            result["projects"].extend(line for line in first_lines(text) if len(line) <= 100)
+        elif name == "certifications":
+            result["certifications"].extend(first_lines(text))
+    result["skills"] = list(dict.fromkeys(result["skills"]))
+    return result
@@ -0,0 +1,299 @@
+# src/skill_taxonomy.py
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import deque
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+# --- 1. Configuration ---
+# Source taxonomy: [{"id", "name", "aliases", "exactOnly"}]. Terms listed in "exactOnly"
+# are too ambiguous to look for in free text ("go", "r", "node", "excel in", "Spring 2019")
+# and are only used to canonicalize a whole skill string, such as a required skill or a
+# skills-section item. An id that is not also a name or alias is lookup-only as well.
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "data", "skill_taxonomy.json")
+)
+# Compiled automaton: one .npy file per array, memory-mapped by every worker
+SKILL_TAXONOMY_DIR = os.getenv("SKILL_TAXONOMY_DIR", "models/skill_taxonomy")
+
+# Part of the compiled digest: bump when compile_taxonomy changes what it builds
+_COMPILER_VERSION = "2"
+
+_ARRAYS = ("edge_offsets", "edge_chars", "edge_targets", "fail", "output", "output_link", "depth", "scan",
+           "skill_ids", "skill_names")
+
+def _normalize_term(term: str) -> str:
+    """Lowercase with collapsed whitespace. Punctuation is kept: it matters for 'c++', '.net', 'ci/cd'."""
+    return " ".join((term or "").lower().split())
+
+# --- 2. Compilation ---
+
+def _source_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read() + _COMPILER_VERSION.encode()).hexdigest()
+
+def compile_taxonomy(taxonomy_path: str = SKILL_TAXONOMY_PATH, output_dir: str = SKILL_TAXONOMY_DIR) -> str:
+    """
+    Builds the Aho-Corasick automaton for every name/alias/id of the taxonomy and writes it
+    as flat arrays (CSR edge lists, failure and output links). Returns the output directory.
+    The directory is replaced atomically, so workers never see a half-written automaton.
+    """
+    with open(taxonomy_path, "r", encoding="utf-8") as f:
+        taxonomy = json.load(f)
+
+    # Trie as a list of {char: state} dicts; terminal[state] = (skill index, scan flag)
+    children: List[Dict[int, int]] = [{}]
+    terminal: Dict[int, Tuple[int, bool]] = {}
+    conflicts = 0
+    for index, entry in enumerate(taxonomy):
+        exact_only = {_normalize_term(t) for t in entry.get("exactOnly", [])}
+        listed = [(term, True) for term in [entry["name"], *entry.get("aliases", [])]]
+        for term, is_listed in [*listed, (entry["id"], False)]:
+            term = _normalize_term(term)
+            if not term:
+                continue
+            state = 0
+            for char in map(ord, term):
+                if char not in children[state]:
+                    children[state][char] = len(children)
+                    children.append({})
+                state = children[state][char]
+            if state in terminal:
+                conflicts += terminal[state][0] != index
+                continue
+            # An id nobody listed as a name/alias ("aws-s3") is a lookup key, not resume text
+            scan = is_listed and term not in exact_only
+            terminal[state] = (index, scan)
+
+    if conflicts:
+        print(f"Warning: {conflicts} skill terms map to more than one skill; the first skill listed wins.")
+
+    n_states = len(children)
+    fail = np.zeros(n_states, dtype=np.int32)
+    output = np.full(n_states, -1, dtype=np.int32)
+    output_link = np.full(n_states, -1, dtype=np.int32)
+    depth = np.zeros(n_states, dtype=np.int32)
+    scan = np.zeros(n_states, dtype=np.uint8)
+    for state, (index, scan_term) in terminal.items():
+        output[state] = index
+        scan[state] = scan_term
+
+    # Breadth-first: a state's failure link always points to a shallower, already finished state
+    queue = deque()
+    for state in children[0].values():
+        depth[state] = 1
+        queue.append(state)
+    while queue:
+        state = queue.popleft()
+        for char, child in children[state].items():
+            depth[child] = depth[state] + 1
+            link = fail[state]
+            while link and char not in children[link]:
+                link = fail[link]
+            target = children[link].get(char, 0)
+            fail[child] = target if target != child else 0  # depth-1 states fail to the root
+            # Nearest proper suffix that is itself a term
+            suffix = fail[child]
+            output_link[child] = suffix if output[suffix] >= 0 else output_link[suffix]
+            queue.append(child)
+
+    edge_offsets = np.zeros(n_states + 1, dtype=np.int64)
+    edge_offsets[1:] = np.cumsum([len(c) for c in children])
+    edge_chars = np.empty(edge_offsets[-1], dtype=np.uint32)
+    edge_targets = np.empty(edge_offsets[-1], dtype=np.int32)
+    for state, edges in enumerate(children):
+        start = edge_offsets[state]
+        for i, char in enumerate(sorted(edges)):
+            edge_chars[start + i] = char
+            edge_targets[start + i] = edges[char]
+
+    arrays = {
+        "edge_offsets": edge_offsets, "edge_chars": edge_chars, "edge_targets": edge_targets,
+        "fail": fail, "output": output, "output_link": output_link, "depth": depth, "scan": scan,
+        "skill_ids": np.array([entry["id"] for entry in taxonomy], dtype=str),
+        "skill_names": np.array([entry["name"] for entry in taxonomy], dtype=str),
+    }
+
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent)
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f"{name}.npy"), array)
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump({"source": _source_digest(taxonomy_path), "skills": len(taxonomy),
+                   "terms": len(terminal), "states": n_states}, f)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(staging, output_dir)
+    return output_dir
+
+# --- 3. Matching ---
+
+class SkillMatcher:
+    """
+    Aho-Corasick matcher over the memory-mapped automaton arrays. Loading only maps the
+    files, so a large dictionary is available immediately and shared through the page cache
+    by all worker processes; transitions are decoded per state the first time they are used.
+    """
+
+    def __init__(self, compiled_dir: str = SKILL_TAXONOMY_DIR):
+        for name in _ARRAYS:
+            setattr(self, name, np.load(os.path.join(compiled_dir, f"{name}.npy"), mmap_mode="r"))
+        self._transitions: Dict[int, Dict[int, int]] = {}
+        self._index_by_id: Optional[Dict[str, int]] = None
+
+    def _edges(self, state: int) -> Dict[int, int]:
+        edges = self._transitions.get(state)
+        if edges is None:
+            start, end = int(self.edge_offsets[state]), int(self.edge_offsets[state + 1])
+            edges = dict(zip(self.edge_chars[start:end].tolist(), self.edge_targets[start:end].tolist()))
+            self._transitions[state] = edges
+        return edges
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Single pass over the text. Returns (skill index, start, end) spans, leftmost-longest
+        and non-overlapping, for terms standing on word boundaries ('java' does not match 'javascript').
+        Whitespace runs match a single space, so terms may wrap across lines.
+        """
+        if not text:
+            return []
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            lowered = text  # rare case-mappings that change the length would break the offsets
+
+        positions: List[int] = []  # text offset of each character fed to the automaton
+        candidates = []
+        state = 0
+        previous_space = True
+        for offset, char in enumerate(lowered):
+            if char.isspace():
+                if previous_space:
+                    continue
+                char, previous_space = " ", True
+            else:
+                previous_space = False
+            positions.append(offset)
+            code = ord(char)
+
+            while True:
+                target = self._edges(state).get(code)
+                if target is not None:
+                    state = target
+                    break
+                if state == 0:
+                    break
+                state = int(self.fail[state])
+
+            hit = state if self.output[state] >= 0 else int(self.output_link[state])
+            while hit > 0:
+                if self.scan[hit]:
+                    start = positions[len(positions) - int(self.depth[hit])]
+                    candidates.append((start, offset + 1, int(self.output[hit])))
+                hit = int(self.output_link[hit])
+
+        matches = []
+        last_end = 0
+        for start, end, index in sorted(candidates, key=lambda c: (c[0], -c[1])):
+            if start < last_end:
+                continue
+            if (text[start].isalnum() and start > 0 and text[start - 1].isalnum()) or \
+               (text[end - 1].isalnum() and end < len(text) and text[end].isalnum()):
+                continue
+            matches.append((index, start, end))
+            last_end = end
+        return matches
+
+    def extract_ids(self, text: str) -> List[str]:
+        """Canonical ids of the skills mentioned in the text, in order of first mention."""
+        return list(dict.fromkeys(str(self.skill_ids[index]) for index, _, _ in self.find(text)))
+
+    def extract_names(self, text: str) -> List[str]:
+        """Display names of the skills mentioned in the text, in order of first mention."""
+        return list(dict.fromkeys(str(self.skill_names[index]) for index, _, _ in self.find(text)))
+
+    def canonicalize(self, term: str) -> Optional[str]:
+        """Canonical id when the whole term is a known name/alias/id (exactOnly terms included), else None."""
+        state = 0
+        for code in map(ord, _normalize_term(term)):
+            state = self._edges(state).get(code, -1)
+            if state < 0:
+                return None
+        index = int(self.output[state]) if state else -1
+        return str(self.skill_ids[index]) if index >= 0 else None
+
+    def index_of(self, skill_id: str) -> Optional[int]:
+        """Row of a canonical id in the skill arrays, or None for unknown skills."""
+        if self._index_by_id is None:
+            self._index_by_id = {str(skill_id): i for i, skill_id in enumerate(self.skill_ids)}
+        return self._index_by_id.get(skill_id)
+
+    def display_name(self, skill_id: str) -> str:
+        index = self.index_of(skill_id)
+        return str(self.skill_names[index]) if index is not None else skill_id
+
+def compiled_digest(compiled_dir: str = SKILL_TAXONOMY_DIR) -> Optional[str]:
+    """Digest of the taxonomy file a compiled automaton was built from (None if not compiled)."""
+    try:
+        with open(os.path.join(compiled_dir, "meta.json")) as f:
+            return json.load(f).get("source")
+    except (OSError, ValueError):
+        return None
+
+def _is_stale(taxonomy_path: str, compiled_dir: str) -> bool:
+    return compiled_digest(compiled_dir) != _source_digest(taxonomy_path)
+
+_skill_matcher = None
+_skill_matcher_failed = False
+
+def get_skill_matcher() -> Optional[SkillMatcher]:
+    """
+    Shared matcher, compiled on first use when the automaton is missing or older than the
+    taxonomy file. Returns None when the taxonomy is unavailable (plain normalization is used then).
+    """
+    global _skill_matcher, _skill_matcher_failed
+    if _skill_matcher is None and not _skill_matcher_failed:
+        try:
+            if os.path.exists(SKILL_TAXONOMY_PATH) and _is_stale(SKILL_TAXONOMY_PATH, SKILL_TAXONOMY_DIR):
+                try:
+                    compile_taxonomy(SKILL_TAXONOMY_PATH, SKILL_TAXONOMY_DIR)
+                except OSError as e:
+                    # Another worker compiling at the same time; use whatever it installed
+                    print(f"Warning: Could not compile the skill taxonomy ({e}); loading the existing build.")
+            _skill_matcher = SkillMatcher(SKILL_TAXONOMY_DIR)
+        except Exception as e:
+            print(f"Warning: Could not load the skill taxonomy. Skill normalization falls back to lowercasing. Error: {e}")
+            _skill_matcher_failed = True
+    return _skill_matcher
+
+def taxonomy_version() -> str:
+    """Short identifier of the taxonomy in use, for keys of results that depend on it."""
+    if get_skill_matcher() is None:
+        return "none"
+    return (compiled_digest(SKILL_TAXONOMY_DIR) or "none")[:12]
+
+# --- 4. CLI ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the skill taxonomy into a memory-mappable matcher.")
+    parser.add_argument("--taxonomy", default=SKILL_TAXONOMY_PATH, help="Taxonomy JSON file.")
+    parser.add_argument("--output-dir", default=SKILL_TAXONOMY_DIR, help="Directory for the compiled arrays.")
+    parser.add_argument("--text", help="Optional text to run the compiled matcher on.")
+    args = parser.parse_args()
+
+    output_dir = compile_taxonomy(args.taxonomy, args.output_dir)
+    with open(os.path.join(output_dir, "meta.json")) as f:
+        print(f"Compiled {output_dir}: {json.load(f)}")
+    if args.text:
+        matcher = SkillMatcher(output_dir)
+        for index, start, end in matcher.find(args.text):
+            print(f"  {args.text[start:end]!r} -> {matcher.skill_ids[index]}")
+
+if __name__ == "__main__":
+    main()
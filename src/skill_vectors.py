@@ -0,0 +1,177 @@
+# src/skill_vectors.py
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+from .skill_taxonomy import get_skill_matcher, compiled_digest, SkillMatcher, SKILL_TAXONOMY_DIR
+
+# --- 1. Configuration ---
+# One embedding per taxonomy skill, in taxonomy order, memory-mapped like the matcher itself
+SKILL_VECTORS_DIR = os.getenv("SKILL_VECTORS_DIR", "models/skill_vectors")
+# Cosine at or above SKILL_MATCH_THRESHOLD counts as having the skill; between the two
+# thresholds it is a partial match worth its similarity; below SKILL_PARTIAL_THRESHOLD it is missing.
+SKILL_MATCH_THRESHOLD = float(os.getenv("SKILL_MATCH_THRESHOLD", "0.8"))
+SKILL_PARTIAL_THRESHOLD = float(os.getenv("SKILL_PARTIAL_THRESHOLD", "0.5"))
+# Skills outside the taxonomy are encoded on demand and kept in a bounded in-process cache
+FREE_TEXT_CACHE_SIZE = 10000
+
+# --- 2. Build ---
+
+def build_skill_vectors(
+    encode: Callable[[List[str]], Optional[np.ndarray]],
+    model_version: str,
+    matcher: SkillMatcher,
+    taxonomy_dir: str = SKILL_TAXONOMY_DIR,
+    output_dir: str = SKILL_VECTORS_DIR
+) -> str:
+    """Encodes the display name of every taxonomy skill (one batched call) and stores the float16 matrix."""
+    vectors = encode([str(name) for name in matcher.skill_names])
+    if vectors is None:
+        raise RuntimeError("the embedding model is not available")
+
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent)
+    np.save(os.path.join(staging, "vectors.npy"), vectors.astype(np.float16))
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump({"taxonomy": compiled_digest(taxonomy_dir), "model": model_version,
+                   "skills": int(vectors.shape[0]), "dim": int(vectors.shape[1])}, f)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(staging, output_dir)
+    return output_dir
+
+def _is_stale(model_version: str, taxonomy_dir: str, vectors_dir: str) -> bool:
+    try:
+        with open(os.path.join(vectors_dir, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return True
+    return meta.get("model") != model_version or meta.get("taxonomy") != compiled_digest(taxonomy_dir)
+
+# --- 3. Vocabulary ---
+
+class SkillVectorVocabulary:
+    """
+    Skill id -> embedding. Taxonomy skills are rows of the memory-mapped matrix;
+    anything else is encoded once (batched) and cached.
+    """
+
+    def __init__(self, matcher: SkillMatcher, encode: Callable[[List[str]], Optional[np.ndarray]],
+                 vectors_dir: str = SKILL_VECTORS_DIR):
+        self.matcher = matcher
+        self.encode = encode
+        self.matrix = np.load(os.path.join(vectors_dir, "vectors.npy"), mmap_mode="r")
+        self._free_text: Dict[str, np.ndarray] = {}
+
+    def vectors(self, skills: List[str]) -> np.ndarray:
+        """(len(skills), dim) float32 matrix of L2-normalized skill embeddings."""
+        rows = np.zeros((len(skills), self.matrix.shape[1]), dtype=np.float32)
+        unknown = []
+        for i, skill in enumerate(skills):
+            index = self.matcher.index_of(skill)
+            # One lookup: the shared cache may be cleared by another request thread at any time
+            cached = self._free_text.get(skill) if index is None else None
+            if index is not None:
+                rows[i] = self.matrix[index]
+            elif cached is not None:
+                rows[i] = cached
+            else:
+                unknown.append(i)
+
+        texts = list(dict.fromkeys(skills[i] for i in unknown))
+        encoded = self.encode(texts) if texts else None
+        if encoded is not None:
+            fresh = dict(zip(texts, encoded))
+            if len(self._free_text) + len(texts) > FREE_TEXT_CACHE_SIZE:
+                self._free_text.clear()
+            self._free_text.update(fresh)
+            for i in unknown:
+                rows[i] = fresh[skills[i]]
+        return rows
+
+_vocabulary = None
+_vocabulary_failed = False
+
+def get_skill_vocabulary(
+    encode: Callable[[List[str]], Optional[np.ndarray]],
+    model_version: str
+) -> Optional[SkillVectorVocabulary]:
+    """
+    Shared vocabulary, rebuilt on first use when the taxonomy or the embedding model changed.
+    Returns None without a taxonomy or a model (semantic skill matching is skipped then).
+    """
+    global _vocabulary, _vocabulary_failed
+    if _vocabulary is None and not _vocabulary_failed:
+        matcher = get_skill_matcher()
+        if matcher is None:
+            _vocabulary_failed = True
+            return None
+        try:
+            if _is_stale(model_version, SKILL_TAXONOMY_DIR, SKILL_VECTORS_DIR):
+                print(f"INFO: Building skill vectors for {len(matcher.skill_ids)} skills...")
+                try:
+                    build_skill_vectors(encode, model_version, matcher)
+                except OSError as e:
+                    # Another worker building at the same time; use whatever it installed
+                    print(f"Warning: Could not build the skill vectors ({e}); loading the existing build.")
+            _vocabulary = SkillVectorVocabulary(matcher, encode)
+        except Exception as e:
+            print(f"Warning: Could not load skill vectors. Semantic skill matching disabled. Error: {e}")
+            _vocabulary_failed = True
+    return _vocabulary
+
+# --- 4. Per-Skill Matching ---
+
+def summarize_skill_similarity(
+    required_skills: List[str],
+    candidate_skills: List[str],
+    similarity: np.ndarray
+) -> Dict[str, Any]:
+    """
+    Reads one (required, candidate) cosine matrix: each required skill is credited with its
+    best candidate (1.0 above the match threshold, its similarity above the partial threshold).
+    """
+    if not required_skills:
+        return {"score": 0, "missingSkills": [], "partialSkills": []}
+    if similarity.shape[1]:
+        best = similarity.max(axis=1)
+        closest = similarity.argmax(axis=1)
+    else:
+        best = np.zeros(len(required_skills), dtype=np.float32)
+        closest = np.zeros(len(required_skills), dtype=int)
+
+    credit = np.where(best >= SKILL_MATCH_THRESHOLD, 1.0, np.where(best >= SKILL_PARTIAL_THRESHOLD, best, 0.0))
+    partial = (best >= SKILL_PARTIAL_THRESHOLD) & (best < SKILL_MATCH_THRESHOLD)
+    return {
+        "score": int(credit.mean() * 100),
+        "missingSkills": [required_skills[j] for j in np.flatnonzero(best < SKILL_PARTIAL_THRESHOLD)],
+        "partialSkills": [
+            {"skill": required_skills[j], "closestSkill": candidate_skills[closest[j]], "similarity": round(float(best[j]), 3)}
+            for j in np.flatnonzero(partial)
+        ],
+    }
+
+# --- 5. CLI ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped skill embedding matrix for the taxonomy.")
+    parser.parse_args()
+
+    # Imported here: the matching module loads the embedding model
+    from .matching import encode_texts, EMBEDDING_MODEL_VERSION
+    matcher = get_skill_matcher()
+    if matcher is None:
+        raise SystemExit("The skill taxonomy could not be loaded.")
+    output_dir = build_skill_vectors(encode_texts, EMBEDDING_MODEL_VERSION, matcher)
+    with open(os.path.join(output_dir, "meta.json")) as f:
+        print(f"Built {output_dir}: {json.load(f)}")
+
+if __name__ == "__main__":
+    main()
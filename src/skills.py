@@ -0,0 +1,55 @@
+# src/skills.py
+
+import re
+from typing import List, Iterable
+
+from .skill_taxonomy import get_skill_matcher
+
+# Lightweight skill normalization shared by the worker (indexing) and the API (queries).
+# Kept free of model imports so it can be used anywhere.
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_skill(skill: str) -> str:
+    """Lowercases, collapses whitespace and trims punctuation around a skill name ('C++' keeps its '+')."""
+    return _WHITESPACE.sub(" ", skill or "").strip(" \t.,;:()[]").lower()
+
+def canonical_skill(skill: str) -> str:
+    """Taxonomy id for known skills and their aliases ('JS' -> 'javascript'), else the normalized string."""
+    matcher = get_skill_matcher()
+    if matcher is not None:
+        skill_id = matcher.canonicalize(skill) or matcher.canonicalize(normalize_skill(skill))
+        if skill_id:
+            return skill_id
+    return normalize_skill(skill)
+
+def normalize_skills(skills: Iterable[str]) -> List[str]:
+    """Canonical, deduplicated skills (order preserved, empty values dropped)."""
+    return [s for s in dict.fromkeys(canonical_skill(skill) for skill in skills) if s]
+
+def dedupe_skills(skills: Iterable[str]) -> List[str]:
+    """Keeps the first spelling of each canonical skill ('JS' and 'JavaScript' are one skill)."""
+    seen = {}
+    for skill in skills:
+        seen.setdefault(canonical_skill(skill), skill)
+    return [skill for key, skill in seen.items() if key]
+
+def extract_skill_names(text: str) -> List[str]:
+    """Display names of the taxonomy skills mentioned anywhere in the text (one matcher pass)."""
+    matcher = get_skill_matcher()
+    return matcher.extract_names(text) if matcher is not None else []
+
+def extract_skill_ids(text: str) -> List[str]:
+    """Canonical ids of the taxonomy skills mentioned anywhere in the text (same keys as normalize_skills)."""
+    matcher = get_skill_matcher()
+    return matcher.extract_ids(text) if matcher is not None else []
+
+def extract_skill_mentions(text: str) -> List[str]:
+    """Taxonomy skills as written in the text ('Spark', 'k8s'), one per skill, for lexical queries."""
+    matcher = get_skill_matcher()
+    if matcher is None or not text:
+        return []
+    mentions = {}
+    for index, start, end in matcher.find(text):
+        mentions.setdefault(index, " ".join(text[start:end].split()))
+    return list(mentions.values())
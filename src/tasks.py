@@ -2,16 +2,56 @@
 
 from .celery_config import celery_app
 import time
+import datetime
+import heapq
 from pathlib import Path
+import numpy as np
 from src.document_parser import parse_document
 from src.ai_parser import process_ai_extraction
-from src.crud import update_resume_data, get_db
+from src.matching import encode_resume, encode_resumes, pack_chunk_embeddings, get_chunks_from_parsed, EMBEDDING_MODEL_VERSION
+from src.matching import extract_resume_skills, get_text_from_parsed, get_stored_embedding
+from src.matching import score_jobs_for_resume, score_resumes_batch, encode_texts
+from src.crud import update_resume_data, get_db, get_resumes_missing_embeddings, replace_resume_skills, get_jobs_missing_embeddings
+from src.crud import get_completed_resumes_page, get_resumes_missing_text, delete_match_results
+from src.crud import get_job, get_standing_jobs, upsert_job_rankings
+from src.crud import get_ranking_job, update_ranking_job, count_resumes_for_scoring, stream_resumes_for_scoring
+from src.crud import replace_resume_lsh_bands, get_resumes_missing_signatures
+from src.near_duplicates import minhash_signature, pack_signature, band_buckets
+
+def _ranking_row(job_id: str, resume_id: str, result: dict, scored_at: datetime.datetime) -> dict:
+    category_scores = result['categoryScores']
+    return {
+        "job_id": job_id,
+        "resume_id": resume_id,
+        "overall_score": result['overallScore'],
+        "skill_score": category_scores['skillsMatch']['score'],
+        "semantic_score": category_scores['semanticMatch']['score'],
+        "category_scores": category_scores,
+        "scored_at": scored_at,
+    }
+
+def update_standing_rankings(db, db_resume) -> int:
+    """
+    Scores one freshly parsed resume against every standing job at once: one
+    (jobs x dim) @ (dim,) product over the stored job embeddings, refined with the
+    resume chunks by score_jobs_for_resume, then one upsert into job_rankings.
+    """
+    resume_embedding = get_stored_embedding(db_resume)
+    jobs = get_standing_jobs(db, EMBEDDING_MODEL_VERSION) if resume_embedding is not None else []
+    if not jobs:
+        return 0
+
+    cosine_scores = (np.vstack([get_stored_embedding(job) for job in jobs]) @ resume_embedding).tolist()
+    results = score_jobs_for_resume(db_resume, jobs, cosine_scores, include_gap_analysis=False)
+    now = datetime.datetime.utcnow()
+    upsert_job_rankings(db, [_ranking_row(result['jobId'], db_resume.id, result, now) for result in results])
+    return len(results)
 
 @celery_app.task(name='src.tasks.process_resume')
 def process_resume(resume_id: str, file_path: str, file_name: str):
     """
     Handles the heavy-lifting, long-running resume parsing process.
-    1. Extracts raw text. 2. Runs AI extraction. 3. Saves results to DB.
+    1. Extracts raw text. 2. Runs AI extraction. 3. Computes the matching embedding. 4. Saves results to DB.
     """
     start_time = time.time()
     print(f"--- Worker received job: {resume_id} for file: {file_name} ---")
@@ -42,11 +82,44 @@ def process_resume(resume_id: str, file_path: str, file_name: str):
             "processingTime": round(time.time() - start_time, 2)
         }
         
-        # --- STEP 3: DATABASE UPDATE ---
+        # --- STEP 3: MATCHING EMBEDDINGS ---
+        # Section chunks + document vector, computed once here so /match only has to encode the job description
+        embeddings = encode_resume(structured_data)
+        
+        # Near-duplicate signature of the extracted text (formatting-insensitive word shingles)
+        signature = minhash_signature(raw_text)
+
+        # --- STEP 4: DATABASE UPDATE ---
         print(f"Saving structured data for {resume_id}...")
         
         # Update the database record with the final parsed JSON
-        update_resume_data(db, resume_id, structured_data, status="completed")
+        db_resume = update_resume_data(
+            db, resume_id, structured_data, status="completed",
+            embedding=embeddings['embedding'].tolist() if embeddings else None,
+            embedding_model=EMBEDDING_MODEL_VERSION,
+            chunk_embeddings=pack_chunk_embeddings(embeddings['chunks']) if embeddings else None,
+            chunk_sections=embeddings['sections'] if embeddings else None,
+            raw_text=raw_text,
+            minhash=pack_signature(signature) if signature is not None else None
+        )
+        
+        # Inverted skill index for candidate pre-filtering
+        replace_resume_skills(db, resume_id, extract_resume_skills(structured_data))
+        # Matches stored for a previous parse of this resume are stale now
+        delete_match_results(db, resume_id)
+        # LSH buckets for "possible duplicates" lookups
+        if signature is not None:
+            replace_resume_lsh_bands(db, resume_id, band_buckets(signature))
+
+        # Append the resume to the materialized rankings of all standing jobs
+        try:
+            ranked = update_standing_rankings(db, db_resume)
+            if ranked:
+                print(f"Scored {resume_id} against {ranked} standing jobs.")
+        except Exception as e:
+            # The parse itself succeeded; a stale ranking must not mark the resume failed
+            db.rollback()
+            print(f"Warning: Could not update standing rankings for {resume_id}: {e}")
         print(f"Finished job: {resume_id}. Database status updated to 'completed'.")
         
     except Exception as e:
@@ -68,3 +141,274 @@ def process_resume(resume_id: str, file_path: str, file_name: str):
         Path(file_path).unlink(missing_ok=True)
     
     return {"status": "completed", "resume_id": resume_id}
+
+
+@celery_app.task(name='src.tasks.backfill_resume_embeddings')
+def backfill_resume_embeddings(batch_size: int = 64):
+    """
+    Computes embeddings (document vector + section chunks) for completed resumes that
+    have none, or ones from an older model.
+    Run once after deploying, e.g.:
+        celery -A src.celery_config.celery_app call src.tasks.backfill_resume_embeddings
+    """
+    db = next(get_db())
+    updated = 0
+    skipped_ids = []  # Resumes without matchable text can never get an embedding
+    
+    try:
+        while True:
+            page = get_resumes_missing_embeddings(db, EMBEDDING_MODEL_VERSION, limit=batch_size, exclude_ids=skipped_ids)
+            if not page:
+                break
+            
+            batch = [r for r in page if get_chunks_from_parsed(r.parsed_data or {})]
+            skipped_ids.extend(r.id for r in page if r not in batch)
+            if not batch:
+                continue
+            
+            # One batched encode call per page of resumes (all chunks of all resumes)
+            embeddings = encode_resumes([r.parsed_data for r in batch])
+            if all(e is None for e in embeddings):
+                print("Embedding model unavailable, aborting backfill.")
+                break
+            
+            for resume, encoded in zip(batch, embeddings):
+                resume.embedding = encoded['embedding'].tolist()
+                resume.embedding_model = EMBEDDING_MODEL_VERSION
+                resume.chunk_embeddings = pack_chunk_embeddings(encoded['chunks'])
+                resume.chunk_sections = encoded['sections']
+            db.commit()
+            updated += len(batch)
+            print(f"Backfilled embeddings for {updated} resumes...")
+    finally:
+        db.close()
+    
+    return {"status": "completed", "updated": updated, "skipped": len(skipped_ids)}
+
+
+@celery_app.task(name='src.tasks.backfill_job_embeddings')
+def backfill_job_embeddings(batch_size: int = 256):
+    """
+    Re-encodes registered jobs that have no embedding, or one from an older model or backend.
+    Until then they cannot be standing queries or appear in /resumes/{id}/jobs. Run it with
+    backfill_resume_embeddings after changing EMBEDDING_BACKEND, e.g.:
+        celery -A src.celery_config.celery_app call src.tasks.backfill_job_embeddings
+    """
+    db = next(get_db())
+    updated = 0
+    skipped_ids = []  # Jobs without a description can never get an embedding
+
+    try:
+        while True:
+            page = get_jobs_missing_embeddings(db, EMBEDDING_MODEL_VERSION, limit=batch_size, exclude_ids=skipped_ids)
+            if not page:
+                break
+
+            batch = [job for job in page if job.description]
+            skipped_ids.extend(job.id for job in page if not job.description)
+            if not batch:
+                continue
+
+            embeddings = encode_texts([job.description for job in batch])
+            if embeddings is None:
+                print("Embedding model unavailable, aborting backfill.")
+                break
+
+            for job, embedding in zip(batch, embeddings):
+                job.embedding = embedding.tolist()
+                job.embedding_model = EMBEDDING_MODEL_VERSION
+            db.commit()
+            updated += len(batch)
+            print(f"Backfilled embeddings for {updated} jobs...")
+    finally:
+        db.close()
+
+    return {"status": "completed", "updated": updated, "skipped": len(skipped_ids)}
+
+
+@celery_app.task(name='src.tasks.backfill_resume_skills')
+def backfill_resume_skills(batch_size: int = 500):
+    """
+    Rebuilds the inverted skill index (resume_skills) from parsed_data for all completed resumes.
+    Run it again after the skill taxonomy changes, so indexed skills use the current canonical ids.
+        celery -A src.celery_config.celery_app call src.tasks.backfill_resume_skills
+    """
+    db = next(get_db())
+    indexed = 0
+    
+    try:
+        offset = 0
+        while True:
+            page = get_completed_resumes_page(db, offset=offset, limit=batch_size)
+            if not page:
+                break
+            for resume in page:
+                replace_resume_skills(db, resume.id, extract_resume_skills(resume.parsed_data))
+            indexed += len(page)
+            offset += len(page)
+            print(f"Indexed skills for {indexed} resumes...")
+    finally:
+        db.close()
+    
+    return {"status": "completed", "indexed": indexed}
+
+
+@celery_app.task(name='src.tasks.backfill_search_text')
+def backfill_search_text(batch_size: int = 500):
+    """
+    Makes resumes parsed before raw_text existed searchable. The original files are deleted
+    after parsing, so the matching text rebuilt from parsed_data is stored instead.
+        celery -A src.celery_config.celery_app call src.tasks.backfill_search_text
+    """
+    db = next(get_db())
+    updated = 0
+    
+    try:
+        while True:
+            page = get_resumes_missing_text(db, limit=batch_size)
+            if not page:
+                break
+            for resume in page:
+                resume.raw_text = get_text_from_parsed(resume.parsed_data or {})
+            db.commit()
+            updated += len(page)
+            print(f"Backfilled search text for {updated} resumes...")
+    finally:
+        db.close()
+    
+    return {"status": "completed", "updated": updated}
+
+
+@celery_app.task(name='src.tasks.backfill_resume_signatures')
+def backfill_resume_signatures(batch_size: int = 500):
+    """
+    Computes MinHash signatures and LSH buckets for resumes parsed before near-duplicate detection.
+        celery -A src.celery_config.celery_app call src.tasks.backfill_resume_signatures
+    """
+    db = next(get_db())
+    updated = 0
+    skipped_ids = []  # Resumes whose text has no words never get a signature
+
+    try:
+        while True:
+            page = get_resumes_missing_signatures(db, limit=batch_size, exclude_ids=skipped_ids)
+            if not page:
+                break
+            for resume in page:
+                signature = minhash_signature(resume.raw_text)
+                if signature is None:
+                    skipped_ids.append(resume.id)
+                    continue
+                resume.minhash = pack_signature(signature)
+                replace_resume_lsh_bands(db, resume.id, band_buckets(signature))
+                updated += 1
+            db.commit()
+            print(f"Backfilled signatures for {updated} resumes...")
+    finally:
+        db.close()
+
+    return {"status": "completed", "updated": updated, "skipped": len(skipped_ids)}
+
+
+@celery_app.task(name='src.tasks.seed_standing_ranking')
+def seed_standing_ranking(job_id: str, batch_size: int = 500):
+    """
+    Fills the materialized ranking of a job that just became a standing query with
+    all resumes completed so far (one batched score per page). Resumes parsed from now on
+    are added by process_resume.
+    """
+    db = next(get_db())
+    scored = 0
+
+    try:
+        db_job = get_job(db, job_id)
+        if db_job is None or not db_job.standing:
+            return {"status": "skipped", "scored": 0}
+
+        job_description = {"title": db_job.title, "description": db_job.description, "requirements": db_job.requirements or {}}
+        job_embedding = get_stored_embedding(db_job)
+        offset = 0
+        while True:
+            page = get_completed_resumes_page(db, offset=offset, limit=batch_size)
+            if not page:
+                break
+            results = score_resumes_batch(page, job_description, job_embedding, include_gap_analysis=False)
+            now = datetime.datetime.utcnow()
+            upsert_job_rankings(db, [_ranking_row(job_id, result['resumeId'], result, now) for result in results])
+            scored += len(page)
+            offset += len(page)
+            print(f"Ranked {scored} resumes for standing job {job_id}...")
+    finally:
+        db.close()
+
+    return {"status": "completed", "scored": scored}
+
+
+def _parse_filter_dates(filters: dict) -> dict:
+    """Filters are stored as JSON; turn the upload-time bounds back into datetimes."""
+    filters = dict(filters or {})
+    for key in ("uploaded_after", "uploaded_before"):
+        if filters.get(key):
+            filters[key] = datetime.datetime.fromisoformat(filters[key])
+    return filters
+
+@celery_app.task(name='src.tasks.run_ranking_job')
+def run_ranking_job(ranking_id: str, batch_size: int = 500):
+    """
+    Scores one JD against every resume matching the ranking job's filters.
+    Resumes are streamed through a server-side cursor in batches of `batch_size`; each batch
+    is scored with score_resumes_batch (one matrix product) and merged into a bounded top-k,
+    so memory stays flat however many resumes there are. Progress and the current top-k
+    are committed after every batch through a second session (committing the streaming
+    session would close its cursor).
+    """
+    db = next(get_db())
+    stream_db = next(get_db())
+
+    try:
+        ranking = get_ranking_job(db, ranking_id)
+        if ranking is None:
+            return {"status": "missing"}
+
+        job_description = ranking.job_description
+        top_k = ranking.top_k
+        filters = _parse_filter_dates(ranking.filters)
+
+        # The JD is encoded once (or taken from the registered job), never per batch
+        job_embedding = None
+        db_job = get_job(db, ranking.job_id) if ranking.job_id else None
+        if db_job is not None:
+            job_embedding = get_stored_embedding(db_job)
+        if job_embedding is None and job_description.get('description'):
+            encoded = encode_texts([job_description['description']])
+            job_embedding = encoded[0] if encoded is not None else None
+
+        limit = filters.pop("limit", None)
+        total = count_resumes_for_scoring(db, **filters)
+        if limit is not None:
+            total = min(total, limit)
+        update_ranking_job(db, ranking_id, status="running", started_at=datetime.datetime.utcnow(), total=total)
+
+        top, processed = [], 0
+        for batch in stream_resumes_for_scoring(stream_db, batch_size=batch_size, limit=limit, **filters):
+            results = score_resumes_batch(batch, job_description, job_embedding, include_gap_analysis=False)
+            top = heapq.nlargest(top_k, top + results, key=lambda r: r['overallScore'])
+            processed += len(batch)
+            update_ranking_job(db, ranking_id, processed=processed, results=top)
+            print(f"Ranking {ranking_id}: scored {processed} resumes...")
+
+        update_ranking_job(db, ranking_id, status="completed", finished_at=datetime.datetime.utcnow())
+        return {"status": "completed", "processed": processed}
+
+    except Exception as e:
+        print(f"Critical Error in ranking job {ranking_id}: {e}")
+        try:
+            db.rollback()
+            update_ranking_job(db, ranking_id, status="failed", error=str(e), finished_at=datetime.datetime.utcnow())
+        except Exception:
+            print("Failed to update the ranking job with failure status.")
+        raise
+
+    finally:
+        stream_db.close()
+        db.close()
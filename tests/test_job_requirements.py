@@ -0,0 +1,36 @@
+import pytest
+
+from src import skill_taxonomy
+from src.skill_taxonomy import SKILL_TAXONOMY_PATH, SkillMatcher, compile_taxonomy
+
+JOB_DESCRIPTION = {
+    "title": "Senior Data Engineer",
+    "description": (
+        "We are looking for someone who can excel in a fast-paced team and take the helm of our data platform.\n"
+        "You will build batch and streaming pipelines with Spark on GCP, and work with our NLP team on\n"
+        "LLM-backed search. Experience with Airflow and Kafka is a plus. Start date: Spring 2025."
+    ),
+    "requirements": {"required": [], "preferred": []},
+}
+
+
+@pytest.fixture(autouse=True)
+def compiled_matcher(tmp_path, monkeypatch):
+    compiled_dir = compile_taxonomy(SKILL_TAXONOMY_PATH, str(tmp_path / "compiled"))
+    monkeypatch.setattr(skill_taxonomy, "_skill_matcher", SkillMatcher(compiled_dir))
+
+
+def test_requirements_extracted_from_job_text():
+    from src.skills import extract_skill_ids
+    text = f"{JOB_DESCRIPTION['title']}\n{JOB_DESCRIPTION['description']}"
+    skills = extract_skill_ids(text)
+    assert {"spark", "gcp", "nlp", "llm", "airflow", "kafka"} <= set(skills)
+    assert not {"excel", "helm", "spring"} & set(skills)
+
+
+def test_job_required_skills_falls_back_to_job_text():
+    matching = pytest.importorskip("src.matching")
+    skills, extracted = matching.job_required_skills(JOB_DESCRIPTION)
+    assert extracted
+    assert {"spark", "gcp", "nlp"} <= set(skills)
+    assert "excel" not in skills
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("redis")
+
+from src.ner_cache import normalize_text, to_normalized_offsets, to_raw_offsets  # noqa: E402
+
+FIRST = "  Senior Engineer,   Google\n\n   Jan 2020 - Present"
+REFLOWED = "Senior\tEngineer,\nGoogle   Jan 2020 - Present  "
+
+
+def _entities(text):
+    return [
+        {"entity_group": "ORG", "word": "Google", "start": text.index("Google"), "end": text.index("Google") + 6},
+        {"entity_group": "MISC", "word": "Senior Engineer", "start": text.index("Senior"), "end": text.index("Engineer") + 8},
+    ]
+
+
+def test_stored_offsets_point_into_normalized_text():
+    stored = to_normalized_offsets(_entities(FIRST), FIRST)
+    normalized = normalize_text(FIRST)
+    assert [normalized[e["start"]:e["end"]] for e in stored] == ["Google", "Senior Engineer"]
+
+
+def test_cached_offsets_follow_the_callers_layout():
+    stored = to_normalized_offsets(_entities(FIRST), FIRST)
+    entities = to_raw_offsets(stored, REFLOWED)
+    assert [REFLOWED[e["start"]:e["end"]] for e in entities] == ["Google", "Senior\tEngineer"]
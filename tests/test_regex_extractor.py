@@ -0,0 +1,42 @@
+import pytest
+
+from src.regex_extractor import extract_fast_fields
+
+
+@pytest.mark.parametrize("text", [
+    "Awards: 2018 2019 2020",
+    "Employee ID 123456789012",
+    "Zip code 560001",
+    "Order 1234567890123",
+])
+def test_rejects_numbers_that_are_not_phones(text):
+    assert extract_fast_fields(text)["phones"] == []
+
+
+@pytest.mark.parametrize("text, phone", [
+    ("Call +91 98765 43210 anytime", "+91 98765 43210"),
+    ("Phone: (555) 123-4567", "(555) 123-4567"),
+    ("Mobile 555-123-4567", "555-123-4567"),
+    ("Mobile 9876543210", "9876543210"),
+    ("Tel +14155552671", "+14155552671"),
+])
+def test_extracts_phone_numbers(text, phone):
+    assert extract_fast_fields(text)["phones"] == [phone]
+
+
+def test_year_list_does_not_hide_date_ranges():
+    fields = extract_fast_fields("Engineer, 2018 - 2020. Awards 2018 2019 2020")
+    assert fields["phones"] == []
+    assert [r["start"] for r in fields["dateRanges"]] == ["2018-01"]
+
+
+@pytest.mark.parametrize("text, months, duration", [
+    ("2016 - 2019", 36, "3 years"),
+    ("2019-2021", 24, "2 years"),
+    ("Mar 2016 - 2019", 36, "3 years"),
+    ("Jan 2020 - Dec 2020", 12, "1 year"),
+    ("03/2019 to 12/2020", 22, "1 year 10 months"),
+])
+def test_date_range_durations(text, months, duration):
+    (date_range,) = extract_fast_fields(text)["dateRanges"]
+    assert (date_range["months"], date_range["duration"]) == (months, duration)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from src.skill_taxonomy import SKILL_TAXONOMY_PATH, SkillMatcher, compile_taxonomy
+
+
+@pytest.fixture(scope="module")
+def matcher(tmp_path_factory):
+    compiled_dir = tmp_path_factory.mktemp("taxonomy") / "compiled"
+    return SkillMatcher(compile_taxonomy(SKILL_TAXONOMY_PATH, str(compiled_dir)))
+
+
+@pytest.fixture
+def small_matcher(tmp_path):
+    taxonomy = [
+        {"id": "java", "name": "Java", "aliases": []},
+        {"id": "javascript", "name": "JavaScript", "aliases": ["js"]},
+        {"id": "nlp", "name": "Natural Language Processing", "aliases": ["nlp"]},
+        {"id": "k8s", "name": "Kubernetes", "aliases": []},
+        {"id": "go", "name": "Go", "aliases": ["golang"], "exactOnly": ["go"]},
+    ]
+    path = tmp_path / "taxonomy.json"
+    path.write_text(json.dumps(taxonomy))
+    return SkillMatcher(compile_taxonomy(str(path), str(tmp_path / "compiled")))
+
+
+def test_find_respects_word_boundaries(small_matcher):
+    assert small_matcher.extract_ids("JavaScript and Java, javascripts") == ["javascript", "java"]
+
+
+def test_find_matches_terms_across_line_breaks(matcher):
+    assert matcher.extract_ids("Built on Apache\n   Spark") == ["spark"]
+
+
+def test_alias_equal_to_id_is_scanned(small_matcher):
+    assert small_matcher.extract_ids("Shipped NLP features") == ["nlp"]
+
+
+def test_unlisted_id_is_lookup_only(small_matcher):
+    assert small_matcher.extract_ids("k8s clusters") == []
+    assert small_matcher.canonicalize("k8s") == "k8s"
+
+
+def test_exact_only_terms_are_not_scanned(small_matcher):
+    assert small_matcher.extract_ids("Ready to go, golang services") == ["go"]
+    assert small_matcher.canonicalize("Go") == "go"
+
+
+def test_aliases_that_equal_ids_are_extracted(matcher):
+    text = "NLP and LLM pipelines on GCP with Spark; SRE on-call; NodeJS, Tailwind, Rails and OOP."
+    assert set(matcher.extract_ids(text)) >= {"nlp", "llm", "gcp", "spark", "sre", "nodejs", "tailwind", "rails", "oop"}
+
+
+@pytest.mark.parametrize("text", [
+    "You can excel in a fast-paced team",
+    "Ready to take the helm",
+    "Graduated Spring 2019",
+    "Known for swift delivery",
+    "Please express your interest",
+])
+def test_common_words_are_not_skills(matcher, text):
+    assert matcher.extract_ids(text) == []
+
+
+@pytest.mark.parametrize("term, skill_id", [
+    ("Excel", "excel"),
+    ("Helm", "helm"),
+    ("Spring", "spring"),
+    ("Swift", "swift"),
+    ("Microsoft Excel", "excel"),
+])
+def test_exact_only_terms_canonicalize(matcher, term, skill_id):
+    assert matcher.canonicalize(term) == skill_id